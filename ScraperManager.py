@@ -1,71 +1,517 @@
 import os  # Operating system interactions
 import time  # Time operations
 import uuid  # Generating unique IDs
-import json  # JSON handling
-from datetime import datetime  # Date and time operations
-from ipc import IPC
+import math
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta  # Date and time operations
+from configWatcher import ConfigWatcher
+from dataSink import SinkWriter, open_sink
+from ipc import IPC, default_runtime_dir
+from scheduler import Scheduler, RunQueue
+from rateLimiter import RateLimiter
+from responseCache import ResponseCache
 from scraper import Scraper
+from seenIndex import SeenIndex
+from services import ServiceHost
+from statusPublisher import StatusEntry
+from stateStore import StateStore
+from timeseries import TimeSeries
+from workerPool import WorkerPool
 from profileICD import Profile
 from utils import Utils  # Inter-process communication
 
+EXIT_POLL_INTERVAL = 1  # seconds, only used when pidfds are unavailable
+CALL_TIMEOUT = 30  # seconds another thread waits for a call to run on the manager thread
+HISTORY_SERIES = ("telemetry", "resources")  # time series kept per scraper
+RECORDS_RETRY_INTERVAL = 0.1  # seconds between two checks for sink queue room while the data socket is paused
+SPAWN_RETRY_DELAY = 5  # seconds before retrying a profile whose scraper failed to spawn, doubled on each failure
+SPAWN_RETRY_MAX = 600  # seconds, cap of that delay
+
 class ScraperManager:
     
-    def __init__(self, base_path,profiles):
-        self.base_path = base_path
-        self.venv_python = os.path.join(base_path, 'venv', 'bin', 'python')
+    def __init__(self, config, config_path=None):
+        self.base_path = config.base_path
+        self.python = config.venv_python
         self.scrapers = {}
         self.config_profiles = {}
-        self.ipc = IPC()
-        raw_profiles = profiles
-        for profile_name, profile_data in raw_profiles.items():
-            self.config_profiles[profile_name] = Profile(
-                profile_data.config_file,
-                profile_data.interval,
-                None,
-                str(uuid.uuid4()),
-                None,
-                False
+        self.calls = queue.SimpleQueue()
+        self.snapshot = {}
+        self.telemetry_history = OrderedDict()
+        self.telemetry_capacity = config.telemetry_capacity
+        self.telemetry_max_fields = config.telemetry_max_fields
+        self.telemetry_retained = config.telemetry_retained
+        runtime_dir = (config.runtime_dir or default_runtime_dir()) if config.telemetry_transport == 'ipc' else None
+        self.ipc = IPC(config.wire_format, config.telemetry_hwm or None, runtime_dir)
+        self.telemetry_coalesce = config.telemetry_coalesce
+        self.telemetry_dropped = 0
+        self.resource_sample_interval = config.resource_sample_interval
+        self.next_resource_sample = 0
+        self.ipc.init_waker()
+        if config.telemetry_fan_in:
+            self.ipc.init_collector()
+        self.records = None
+        self.records_received = 0
+        if config.data_sink:
+            self.records = SinkWriter(
+                open_sink(config.data_sink, config.data_path, config.data_max_bytes),
+                self.ipc.decode,
+                config.data_batch_size,
+                config.data_flush_interval,
+                config.data_queue_size,
+                config.data_path + ".spill.jsonl"
             )
+            self.ipc.init_data_collector(config.data_hwm or None)
+        self.services = self.start_services(config)
+        self.scheduler = Scheduler()
+        self.run_queue = RunQueue(
+            config.max_concurrent,
+            config.max_concurrent_per_base_path,
+            config.launch_stagger,
+            config.launch_jitter
+        )
+        self.pool_jobs_dir = config.state_path + ".pool"  # jobs of running pool workers, checked even with the pool off
+        self.pool = WorkerPool(config.pool_size, config.pool_preload, self.pool_jobs_dir) if config.pool_size else None
+        self.startup_latency = {}  # launch mode -> [count, total seconds]
+        self.state = StateStore(config.state_path, config.state_history)
+        saved_state = self.state.load()
+        self.removed_profiles = set()
+        for profile_name, profile_data in config.profiles.items():
+            self.add_profile(profile_name, profile_data, saved_state.get(profile_name, {}))
+        self.config_watcher = ConfigWatcher(config_path) if config_path and config.config_reload else None
+        if self.config_watcher and self.config_watcher.fd is not None:
+            self.ipc.watch_fd(self.config_watcher.fd)
+        self.refresh_snapshot()
+
+    def start_services(self, config):
+        """Start the service host with the services the configuration enables, or return None if there are none.
+
+        Whenever the host runs it also serves "rate", unlimited while rate_limits is empty, so that limits added
+        by a configuration reload apply without a restart.
+        """
+        services = {}
+        if config.seen_index:
+            services['seen'] = SeenIndex(config.seen_path, config.seen_capacity, config.seen_error_rate, config.seen_ttl_days)
+        if config.response_cache:
+            services['cache'] = ResponseCache(
+                config.cache_path,
+                config.cache_memory_mb * 1024 * 1024,
+                config.cache_disk_mb * 1024 * 1024,
+                config.cache_ttl
+            )
+        if not services and not config.rate_limits:
+            return None
+        services['rate'] = RateLimiter(config.rate_limits)
+        host = ServiceHost(self.ipc)
+        for name, service in services.items():
+            host.register(name, service)
+        host.start()
+        return host
+
+    def add_profile(self, profile_name, profile_data, saved=None):
+        """Create a profile from its configuration, resuming from its saved state, and schedule it."""
+        saved = saved or {}
+        profile = Profile(
+            profile_data.config_file,
+            profile_data.interval,
+            saved.get("last_exec"),
+            str(uuid.uuid4()),
+            None,
+            False,
+            priority=profile_data.priority,
+            base_path=profile_data.base_path or self.base_path,
+            limits=profile_data.limits
+        )
+        profile.last_outcome = saved.get("last_outcome")
+        profile.last_duration = saved.get("last_duration")
+        self.config_profiles[profile_name] = profile
+        if self.pool:
+            self.pool.add_target(profile.base_path, self.venv_python(profile.base_path))
+        self.schedule_profile(profile_name)
+
+    def check_config(self):
+        """Apply the profiles of the configuration file if it changed since it was last read."""
+        if self.config_watcher is None:
+            return
+        config = self.config_watcher.check()
+        if config is not None:
+            if self.services:
+                self.services.services['rate'].configure(config.rate_limits)
+            elif config.rate_limits:
+                Utils.get_logger().warning("rate_limits need a restart: no service was enabled when the manager started")
+            added, removed, updated = self.apply_profiles(config.profiles)
+            Utils.get_logger().info("Configuration reloaded: added %s, removed %s, updated %s", added, removed, updated)
+
+    def apply_profiles(self, profiles):
+        """Bring the profiles in line with a new configuration, leaving running scrapers alone.
+
+        New profiles are scheduled, changed ones are updated in place (and
+        rescheduled or requeued when their interval or priority changed), and
+        removed ones are dropped, once their scraper finishes if one is running.
+        Returns the added, removed and updated profile names.
+        """
+        added, removed, updated = [], [], []
+        for profile_name in [name for name in self.config_profiles if name not in profiles and name not in self.removed_profiles]:
+            removed.append(profile_name)
+            if self.config_profiles[profile_name].running:
+                self.removed_profiles.add(profile_name)
+            else:
+                self.remove_profile(profile_name)
+        for profile_name, profile_data in profiles.items():
+            profile = self.config_profiles.get(profile_name)
+            if profile is None:
+                self.add_profile(profile_name, profile_data, self.state.last_run(profile_name))
+                added.append(profile_name)
+                continue
+            self.removed_profiles.discard(profile_name)
+            base_path = profile_data.base_path or self.base_path
+            current = (profile.config_file, profile.interval, profile.priority, profile.base_path, profile.limits)
+            if current == (profile_data.config_file, profile_data.interval, profile_data.priority, base_path, profile_data.limits):
+                continue
+            updated.append(profile_name)
+            profile.config_file = profile_data.config_file
+            profile.limits = profile_data.limits
+            if profile.base_path != base_path:
+                profile.base_path = base_path
+                if self.pool:
+                    self.pool.add_target(base_path, self.venv_python(base_path))
+            if profile.priority != profile_data.priority:
+                profile.priority = profile_data.priority
+                queued_at = self.run_queue.queued_at(profile_name)
+                if queued_at is not None:
+                    self.run_queue.remove(profile_name)
+                    self.run_queue.push(profile_name, profile.priority, queued_at)
+            if profile.interval != profile_data.interval:
+                profile.interval = profile_data.interval
+                if not profile.running and profile.queued_at is None:
+                    self.schedule_profile(profile_name)
+        self.update_queue_positions()
+        return added, removed, updated
+
+    def remove_profile(self, profile_name):
+        """Forget a profile that is not running."""
+        self.scheduler.unschedule(profile_name)
+        self.dequeue_profile(profile_name)
+        self.removed_profiles.discard(profile_name)
+        del self.config_profiles[profile_name]
+
+    def call(self, func, *args):
+        """Run func(*args) on the manager thread and return its result (or raise its exception).
+
+        Safe to call from any thread: the call is queued and the main loop woken,
+        so scrapers and profiles are only ever mutated by the manager thread.
+        """
+        future = Future()
+        self.calls.put((future, func, args))
+        self.wake()
+        try:
+            return future.result(CALL_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def run_calls(self):
+        """Execute the calls queued by other threads."""
+        while True:
+            try:
+                future, func, args = self.calls.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def start_profiles(self, profile_names):
+        """Start one scraper for each requested profile and return their ids.
+
+        Nothing starts if one is rejected, and the scrapers already started are stopped if a later one fails to spawn.
+        """
+        self.check_startable(profile_names)
+        unique_ids = []
+        try:
+            for profile_name in profile_names:
+                unique_ids.append(self.start_scraper(profile_name))
+        except Exception:
+            for unique_id in unique_ids:
+                self.stop_scraper(unique_id)
+            raise
+        return unique_ids
+
+    def stop_scrapers(self, unique_ids):
+        """Stop the requested scrapers; nothing stops if one is unknown."""
+        self.check_running(unique_ids)
+        for unique_id in unique_ids:
+            self.stop_scraper(unique_id)
+        return unique_ids
+
+    def check_startable(self, profile_names):
+        """Raise ValueError unless every profile exists, is requested once and is not already running."""
+        if len(set(profile_names)) != len(profile_names):
+            raise ValueError(f"Duplicate profiles in request: {profile_names}")
+        for profile_name in profile_names:
+            profile = self.config_profiles.get(profile_name)
+            if profile is None:
+                raise ValueError(f"Unknown profile: {profile_name}")
+            if profile.running:
+                raise ValueError(f"Profile already running: {profile_name}")
+
+    def check_running(self, unique_ids):
+        """Raise ValueError unless every id belongs to a running scraper."""
+        for unique_id in unique_ids:
+            if unique_id not in self.scrapers:
+                raise ValueError(f"Unknown scraper: {unique_id}")
+
+    def refresh_snapshot(self):
+        """Publish a copy of the status for readers on other threads.
+
+        Entries are rebuilt only for objects whose revision changed, and the
+        snapshot is replaced rather than mutated, so a reader can use the one it
+        picked up without any locking.
+        """
+        previous = self.snapshot
+        self.snapshot = {
+            'scrapers': self.snapshot_entries(previous.get('scrapers', {}), self.scrapers),
+            'profiles': self.snapshot_entries(previous.get('profiles', {}), self.config_profiles),
+            'telemetry': {
+                unique_id: (scraper.telemetry_received, scraper.telemetry_payload)
+                for unique_id, scraper in self.scrapers.items()
+            },
+            'manager': self.stats()
+        }
+
+    @staticmethod
+    def snapshot_entries(previous, objects):
+        entries = {}
+        for key, obj in objects.items():
+            entry = previous.get(key)
+            if entry is None or entry.revision != obj.revision:
+                entry = StatusEntry(obj.revision, obj.to_dict())
+            entries[key] = entry
+        return entries
 
     def start_scraper(self, profile_name):
         """Start a new scraper process."""
+        scraper = self.create_scraper(profile_name)
+        try:
+            scraper.start(self.pool)
+        except Exception:
+            self.abort_scraper(scraper)
+            raise
+        self.register_scraper(scraper)
+        #print(f">> Started scraper [{scraper.unique_id}] for profile [{profile_name}]")
+        return scraper.unique_id
+
+    async def start_scraper_async(self, profile_name):
+        """Start a new scraper process from an asyncio event loop."""
+        scraper = self.create_scraper(profile_name)
+        try:
+            await scraper.start_async(self.pool)
+        except Exception:
+            self.abort_scraper(scraper)
+            raise
+        self.register_scraper(scraper)
+        return scraper
+
+    def create_scraper(self, profile_name):
+        """Take a profile off the schedule, mark it running and build the scraper that will run it."""
         profile = self.config_profiles[profile_name]
-        unique_id = str(uuid.uuid4())
-        scraper = Scraper(profile.config_file, unique_id, profile_name, self.base_path, self.venv_python, self.ipc)
-        scraper.start()
-        self.scrapers[unique_id] = scraper
-        self.update_profile_execution(profile_name, scraper.last_started, unique_id)
+        self.scheduler.unschedule(profile_name)
+        profile.next_run = None
+        self.dequeue_profile(profile_name)
+        # Marked before the spawn so a start racing with an async spawn is rejected
         profile.running = True
-        #print(f">> Started scraper [{unique_id}] for profile [{profile_name}]")
+        unique_id = str(uuid.uuid4())
+        venv_python = self.venv_python(profile.base_path)
+        return Scraper(profile.config_file, unique_id, profile_name, profile.base_path, venv_python, self.ipc, profile.limits)
+
+    def venv_python(self, base_path):
+        """Return the interpreter scrapers under `base_path` run with: the configured one, else base_path/venv."""
+        return self.python or os.path.join(base_path, 'venv', 'bin', 'python')
+
+    def abort_scraper(self, scraper):
+        """Undo create_scraper after the process failed to spawn, and retry the profile after a growing delay."""
+        scraper.release()
+        profile = self.config_profiles[scraper.profile_name]
+        profile.running = False
+        profile.spawn_failures += 1
+        delay = min(SPAWN_RETRY_DELAY * 2 ** (profile.spawn_failures - 1), SPAWN_RETRY_MAX)
+        profile.next_run = datetime.now() + timedelta(seconds=delay)
+        self.scheduler.schedule(scraper.profile_name, profile.next_run)
+
+    def register_scraper(self, scraper):
+        """Track a started scraper and mark its profile as running."""
+        self.scrapers[scraper.unique_id] = scraper
+        # Resource samples get their own series: their rows would leave gaps in telemetry rates and take ring capacity
+        self.telemetry_history[scraper.unique_id] = {
+            series: TimeSeries(self.telemetry_capacity, self.telemetry_max_fields) for series in HISTORY_SERIES
+        }
+        self.update_profile_execution(scraper.profile_name, scraper.last_started, scraper.unique_id)
+        profile = self.config_profiles[scraper.profile_name]
+        if profile.spawn_failures:
+            profile.spawn_failures = 0
+        self.state.record_start(scraper.unique_id, scraper.profile_name, scraper.last_started)
 
     def stop_scraper(self, unique_id):
         """Terminate a running scraper process."""
         scraper = self.scrapers.pop(unique_id, None)
         if scraper:
             scraper.stop()
-            self.ipc.sockets.pop(unique_id, None)
-            self.scrapers.pop(unique_id, None)
+            self.release_scraper(scraper)
+
+    async def stop_scraper_async(self, unique_id):
+        """Terminate a running scraper process without blocking the event loop."""
+        scraper = self.scrapers.pop(unique_id, None)
+        if scraper:
+            await scraper.stop_async()
+            self.release_scraper(scraper)
+
+    def release_scraper(self, scraper):
+        """Close a stopped scraper's subscriber, record how its run ended and reschedule its profile."""
+        self.ipc.remove_subscriber(scraper.unique_id)
+        scraper.last_finished = scraper.last_finished or datetime.now()
+        returncode = scraper.poll()
+        if scraper.stopped:
+            outcome = "stopped"
+        else:
+            outcome = "success" if returncode == 0 else "failed"
+        duration = (scraper.last_finished - scraper.last_started).total_seconds()
+        self.state.record_finish(scraper.unique_id, scraper.last_finished, returncode, outcome, duration)
+        profile = self.config_profiles[scraper.profile_name]
+        profile.running = False
+        profile.last_exec = scraper.last_finished
+        profile.last_outcome = outcome
+        profile.last_duration = duration
+        self.retire_telemetry_history(scraper.unique_id)
+        if scraper.profile_name in self.removed_profiles:
+            self.remove_profile(scraper.profile_name)
+        else:
+            self.schedule_profile(scraper.profile_name)
+
+    def schedule_profile(self, profile_name):
+        """Schedule the next run of a profile one interval after its last execution."""
+        profile = self.config_profiles[profile_name]
+        last_exec = profile.last_exec or datetime.min
+        profile.next_run = last_exec + timedelta(minutes=profile.interval)
+        self.scheduler.schedule(profile_name, profile.next_run)
 
     def schedule_scrapers(self):
-        """Main loop to check and start scrapers, and handle their statuses."""
+        """Main loop: sleep until the next deadline, a scraper exit or incoming telemetry, then act on it."""
         while True:
-            self.check_and_start_scrapers()
+            self.run_calls()
+            self.check_config()
             self.check_scrapers_status()
-            self.receive_monitoring_data()
-            time.sleep(1)
+            self.check_and_start_scrapers()
+            self.refill_pool()
+            self.sample_resources()
+            self.refresh_snapshot()
+            self.receive_monitoring_data(self.next_timeout())
+            # Before the next exit check, so a scraper's last records are still tagged with its profile
+            self.ingest_records()
+
+    def next_timeout(self, exit_polling=True):
+        """Return how long the main loop may block, in milliseconds (None to block until woken).
+
+        With `exit_polling` the wait is capped for scrapers whose exit cannot be watched through a pidfd.
+        """
+        timeout = None
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None:
+            timeout = max((deadline - datetime.now()).total_seconds(), 0)
+        next_launch = self.run_queue.next_launch
+        if self.run_queue and next_launch is not None and next_launch > datetime.now():
+            launch_in = (next_launch - datetime.now()).total_seconds()
+            timeout = launch_in if timeout is None else min(timeout, launch_in)
+        if self.scrapers and self.resource_sample_interval:
+            sample_in = max(self.next_resource_sample - time.monotonic(), 0)
+            timeout = sample_in if timeout is None else min(timeout, sample_in)
+        if self.ipc.records_paused:
+            timeout = RECORDS_RETRY_INTERVAL if timeout is None else min(timeout, RECORDS_RETRY_INTERVAL)
+        config_in = self.config_watcher.timeout() if self.config_watcher else None
+        if config_in is not None:
+            timeout = config_in if timeout is None else min(timeout, config_in)
+        if exit_polling and any(scraper.exit_fd is None for scraper in self.scrapers.values()):
+            timeout = EXIT_POLL_INTERVAL if timeout is None else min(timeout, EXIT_POLL_INTERVAL)
+        return None if timeout is None else math.ceil(timeout * 1000)
+
+    def wake(self):
+        """Interrupt the main loop so it picks up changes made from another thread."""
+        self.ipc.wake()
 
     def check_and_start_scrapers(self):
-        """Check if scrapers need to be started based on their schedule."""
+        """Queue every profile whose deadline has passed, then launch as many as the limits allow."""
+        for profile_name in self.ready_launches():
+            try:
+                self.start_scraper(profile_name)
+            except Exception as e:
+                self.launch_failed(profile_name, e)
+
+    def ready_launches(self):
+        """Yield the profiles that may launch now (see pop_ready_profiles).
+
+        Profiles not yet yielded when the caller stops iterating go back to the run queue.
+        """
+        ready = self.pop_ready_profiles()
+        try:
+            while ready:
+                yield ready.pop(0)
+        finally:
+            for profile_name in ready:
+                profile = self.config_profiles[profile_name]
+                self.run_queue.push(profile_name, profile.priority, profile.queued_at or datetime.now())
+            if ready:
+                self.update_queue_positions()
+
+    def launch_failed(self, profile_name, error):
+        """Log a scheduled launch that failed; abort_scraper has already rescheduled the profile."""
+        Utils.get_logger().error(
+            "Failed to start profile %s: %s (retrying at %s)", profile_name, error, self.config_profiles[profile_name].next_run
+        )
+
+    def pop_ready_profiles(self):
+        """Queue every profile whose deadline has passed and return those that may launch now."""
         now = datetime.now()
-        for profile_name, profile in self.config_profiles.items():
-            if profile.running:
-                continue
+        for profile_name in self.scheduler.pop_due(now):
+            profile = self.config_profiles[profile_name]
+            if not profile.running:
+                self.run_queue.push(profile_name, profile.priority, now)
+                profile.queued_at = now
 
-            interval = profile.interval * 60  # convert interval to seconds
-            last_exec = profile.last_exec or datetime.min
+        running_by_base_path = {}
+        for scraper in self.scrapers.values():
+            running_by_base_path[scraper.base_path] = running_by_base_path.get(scraper.base_path, 0) + 1
+        ready = self.run_queue.pop_ready(
+            now,
+            len(self.scrapers),
+            running_by_base_path,
+            lambda profile_name: self.config_profiles[profile_name].base_path
+        )
+        self.update_queue_positions()
+        return ready
 
-            if (now - last_exec).total_seconds() >= interval:
-                self.start_scraper(profile_name)
+    def dequeue_profile(self, profile_name):
+        """Take a profile out of the run queue, recording how long it waited."""
+        profile = self.config_profiles[profile_name]
+        self.run_queue.remove(profile_name)
+        if profile.queued_at is not None:
+            profile.last_queue_wait = (datetime.now() - profile.queued_at).total_seconds()
+            profile.queued_at = None
+            if profile.queue_position is not None:
+                profile.queue_position = None
+
+    def update_queue_positions(self):
+        """Refresh the queue position of every waiting profile.
+
+        Only changed positions are assigned: every assignment bumps the profile's revision and rebuilds its status entry.
+        """
+        positions = self.run_queue.positions()
+        for profile_name, profile in self.config_profiles.items():
+            position = positions.get(profile_name)
+            if profile.queue_position != position:
+                profile.queue_position = position
 
     def update_profile_execution(self, profile_name, now, unique_id):
         """Update profile execution details after starting a scraper."""
@@ -77,35 +523,118 @@ class ScraperManager:
     def check_scrapers_status(self):
         """Check the status of running scrapers and update profiles when they finish."""
         for unique_id, scraper in list(self.scrapers.items()):
-            if scraper.process.poll() is not None:
-                now = datetime.now()
-                profile_name = scraper.profile_name
-                scraper.last_finished = now
-                profile = self.config_profiles[profile_name]
-                profile.running = False
-                profile.last_exec = now
+            if scraper.poll() is not None:
+                scraper.last_finished = datetime.now()
                 self.stop_scraper(unique_id)
 
-    def receive_monitoring_data(self):
-        """Receive and update monitoring data from scrapers."""
-        for unique_id in list(self.scrapers.keys()):
-            while True:
-                received = self.ipc.receive_published(unique_id)
-                if received:
-                    self.update_monitoring_data(unique_id, received)
-                else:
-                    break
+    def refill_pool(self):
+        """Top up the warm worker pool after launches took workers from it."""
+        if self.pool:
+            self.pool.refill()
+
+    def sample_resources(self):
+        """Sample the CPU, memory, fd and I/O usage of every scraper once per `resource_sample_interval`."""
+        if not self.resource_sample_interval or time.monotonic() < self.next_resource_sample:
+            return
+        self.next_resource_sample = time.monotonic() + self.resource_sample_interval
+        for unique_id, scraper in list(self.scrapers.items()):
+            usage = scraper.sample_resources()
+            if usage is not None:
+                self.telemetry_history[unique_id]["resources"].add(time.time(), usage)
 
-    def update_monitoring_data(self, unique_id, received):
-        """Update monitoring data for a scraper."""
+    def receive_monitoring_data(self, timeout=0):
+        """Receive and update monitoring data from scrapers, waiting up to `timeout` ms for the first message."""
+        self.apply_monitoring_data(self.ipc.receive_all(timeout, self.telemetry_coalesce))
+
+    def apply_monitoring_data(self, messages):
+        """Apply the messages returned by IPC.receive_all; with coalescing only the newest one per scraper is decoded."""
+        for message in messages:
+            if message[0] in self.scrapers:
+                self.update_monitoring_data(*message)
+
+    def ingest_records(self):
+        """Hand the records scrapers pushed on the data socket to the sink writer, as far as its queue has room.
+
+        While the queue is full the data socket is paused: messages pile up to
+        its high-water mark, then scrapers block in send until the writer catches up.
+        """
+        if self.records is None:
+            return
+        room = self.records.room()
+        if room > 0:
+            now = time.time()
+            for unique_id, payload in self.ipc.receive_records(room):
+                scraper = self.scrapers.get(unique_id)
+                self.records.put(now, unique_id, scraper.profile_name if scraper else None, payload)
+                self.records_received += 1
+        self.ipc.pause_records(self.records.room() <= 0)
+
+    def update_monitoring_data(self, unique_id, received, dropped=0):
+        """Update monitoring data for a scraper; `dropped` older messages were skipped without being decoded."""
         try:
-            monitoring_data = json.loads(received)
-            self.scrapers[unique_id].monitoring_data = monitoring_data
-            #with open(f"monitoring_data_{unique_id}.json", "w") as file:
-            #    json.dump(monitoring_data, file, indent=4)
-        except json.JSONDecodeError:
+            scraper = self.scrapers[unique_id]
+            if dropped:
+                scraper.telemetry_dropped += dropped
+                self.telemetry_dropped += dropped
+            monitoring_data = self.ipc.decode(received)
+            if scraper.startup_latency is None:
+                self.record_startup_latency(scraper)
+            scraper.monitoring_data = monitoring_data
+            scraper.telemetry_payload = received
+            scraper.telemetry_received += 1
+            self.telemetry_history[unique_id]["telemetry"].add(time.time(), monitoring_data)
+        except ValueError:
             print(f">> Failed to decode JSON for [{unique_id}]: {received[:30]}")
 
+    def record_startup_latency(self, scraper):
+        """Record the time from launch to first telemetry, aggregated per launch mode (cold or warm)."""
+        scraper.startup_latency = (datetime.now() - scraper.last_started).total_seconds()
+        totals = self.startup_latency.setdefault(scraper.launch_mode, [0, 0.0])
+        totals[0] += 1
+        totals[1] += scraper.startup_latency
+
+    def retire_telemetry_history(self, unique_id):
+        """Keep the history of a finished scraper queryable, up to `telemetry_retained` finished scrapers."""
+        history = self.telemetry_history.pop(unique_id, None)
+        if history is None:
+            return
+        self.telemetry_history[unique_id] = history
+        running = len(self.scrapers)
+        while len(self.telemetry_history) > running + self.telemetry_retained:
+            for key in self.telemetry_history:
+                if key not in self.scrapers:
+                    del self.telemetry_history[key]
+                    break
+
+    def query_telemetry(self, unique_id=None, profile_name=None, resolution="raw", fields=None, since=None, rate=False, series="telemetry"):
+        """Return the telemetry or resource history of a scraper, or of the latest scraper of a profile (see TimeSeries.query)."""
+        if series not in HISTORY_SERIES:
+            raise ValueError(f"Unknown series: {series}")
+        if unique_id is None:
+            profile = self.config_profiles.get(profile_name)
+            if profile is None:
+                raise ValueError(f"Unknown profile: {profile_name}")
+            unique_id = profile.unique_id
+        history = self.telemetry_history.get(unique_id)
+        if history is None:
+            raise ValueError(f"No telemetry history for scraper: {unique_id}")
+        return history[series].query(resolution, fields, since, rate)
+
+    def stats(self):
+        """Return manager-wide counters for the status publication."""
+        next_deadline = self.scheduler.next_deadline()
+        return {
+            "running": len(self.scrapers),
+            "scheduled": len(self.scheduler),
+            "queue_depth": len(self.run_queue),
+            "telemetry_dropped": self.telemetry_dropped,
+            "startup_latency": {mode: round(total / count, 3) for mode, (count, total) in self.startup_latency.items()},
+            "pool_idle": self.pool.available() if self.pool else None,
+            "services": self.services.stats() if self.services else None,
+            "records": dict(self.records.stats(), received=self.records_received, paused=self.ipc.records_paused) if self.records else None,
+            "next_deadline": next_deadline.isoformat() if next_deadline else None
+        }
+
     def run(self):
         """Start the main scheduling loop."""
         self.schedule_scrapers()
@@ -0,0 +1,155 @@
+import asyncio
+import inspect
+import time
+from remoteManager import RemoteManager, STATUS_UPDATE_INTERVAL
+from ScraperManager import RECORDS_RETRY_INTERVAL
+
+
+class AsyncRemoteManager(RemoteManager):
+    """RemoteManager that supervises scrapers, commands, status and telemetry from one asyncio event loop.
+
+    Scrapers are spawned with asyncio.create_subprocess_exec and every socket is
+    awaited through zmq.asyncio, so nothing blocks between a command arriving
+    and it being acted upon.
+    """
+
+    def start(self) -> None:
+        self.logger.info("Starting RemoteManager event loop")
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        self.wake_event = asyncio.Event()
+        self.exit_watchers = set()
+        watcher = self.manager.config_watcher
+        if watcher and watcher.fd is not None:
+            # Config changes wake the supervisor, which reads them, rather than the telemetry poll
+            self.manager.ipc.unwatch_fd(watcher.fd)
+            asyncio.get_running_loop().add_reader(watcher.fd, self.wake_event.set)
+        tasks = [
+            asyncio.create_task(self.supervise(), name="Supervisor"),
+            asyncio.create_task(self.ingest_telemetry(), name="Telemetry"),
+            asyncio.create_task(self.serve_commands(), name="Commands"),
+            asyncio.create_task(self.publish_status(), name="Status"),
+        ]
+        self.logger.info("All tasks started")
+        await asyncio.gather(*tasks)
+
+    async def supervise(self) -> None:
+        self.logger.info("Starting supervisor task")
+        while True:
+            try:
+                self.wake_event.clear()
+                self.manager.check_config()
+                self.manager.check_scrapers_status()
+                for profile_name in self.manager.ready_launches():
+                    try:
+                        await self.start_scraper(profile_name)
+                    except Exception as e:
+                        self.manager.launch_failed(profile_name, e)
+                self.manager.refill_pool()
+                self.manager.sample_resources()
+                timeout = self.manager.next_timeout(exit_polling=False)
+                try:
+                    await asyncio.wait_for(self.wake_event.wait(), None if timeout is None else timeout / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            except Exception as e:
+                self.logger.error(f"Error in supervisor task: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def start_scraper(self, profile_name: str) -> str:
+        scraper = await self.manager.start_scraper_async(profile_name)
+        watcher = asyncio.create_task(self.watch_exit(scraper))
+        self.exit_watchers.add(watcher)
+        watcher.add_done_callback(self.exit_watchers.discard)
+        # Interrupt the telemetry poll so it picks up the new subscriber
+        self.manager.wake()
+        return scraper.unique_id
+
+    async def watch_exit(self, scraper) -> None:
+        await scraper.wait_async()
+        self.logger.debug("Scraper '%s' exited", scraper.unique_id)
+        self.wake_event.set()
+
+    async def ingest_telemetry(self) -> None:
+        self.logger.info("Starting telemetry task")
+        while True:
+            try:
+                timeout = RECORDS_RETRY_INTERVAL * 1000 if self.manager.ipc.records_paused else None
+                messages = await self.manager.ipc.receive_all_async(timeout, self.manager.telemetry_coalesce)
+                self.manager.apply_monitoring_data(messages)
+                self.manager.ingest_records()
+            except Exception as e:
+                self.logger.error(f"Error in telemetry task: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def serve_commands(self) -> None:
+        self.logger.info("Starting command task")
+        for request, seq in self.pop_replays():
+            await self.execute_async(request, replay_of=seq)
+        while True:
+            try:
+                for envelope, payload in await self.ipc.receive_commands_async():
+                    self.ipc.send_reply(envelope, await self.handle_request_async(payload))
+            except Exception as e:
+                self.logger.error(f"Error in command task: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def handle_request_async(self, payload: bytes) -> bytes:
+        requests, batch = self.parse_request(payload)
+        replies = [await self.execute_async(request) for request in requests]
+        return self.ipc.codec.encode(replies if batch else replies[0])
+
+    async def execute_async(self, request, replay_of=None):
+        started = time.perf_counter()
+        seq = self.journal.received(request, replay_of)
+        command = request.get('command')
+        reply = {"id": request.get('id'), "command": command}
+        try:
+            handler = self.command_handlers.get(command)
+            if handler is None:
+                raise ValueError(f"Unknown command: {command}")
+            result = handler(request.get('data'))
+            reply["result"] = await result if inspect.isawaitable(result) else result
+            reply["ok"] = True
+        except Exception as e:
+            self.logger.error(f"Error processing command '{command}': {e}", exc_info=True)
+            reply["ok"] = False
+            reply["error"] = str(e)
+        return self.finish_command(reply, started, seq)
+
+    def call_manager(self, func, *args):
+        # Commands already run on the loop that owns the manager
+        return func(*args)
+
+    async def command_start_scraper(self, data):
+        profile_names = data if isinstance(data, list) else [data]
+        self.manager.check_startable(profile_names)
+        unique_ids = []
+        try:
+            for profile_name in profile_names:
+                unique_ids.append(await self.start_scraper(profile_name))
+        except Exception:
+            # As ScraperManager.start_profiles: all or nothing
+            for unique_id in unique_ids:
+                await self.manager.stop_scraper_async(unique_id)
+            raise
+        return unique_ids if isinstance(data, list) else unique_ids[0]
+
+    async def command_stop_scraper(self, data):
+        unique_ids = data if isinstance(data, list) else [data]
+        self.manager.check_running(unique_ids)
+        for unique_id in unique_ids:
+            await self.manager.stop_scraper_async(unique_id)
+        self.wake_event.set()
+        return data
+
+    async def publish_status(self) -> None:
+        self.logger.info("Starting status task")
+        while True:
+            try:
+                self.manager.refresh_snapshot()
+                self.send_status()
+            except Exception as e:
+                self.logger.error(f"Error in status task: {e}", exc_info=True)
+            await asyncio.sleep(STATUS_UPDATE_INTERVAL)
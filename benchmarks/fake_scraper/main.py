@@ -0,0 +1,88 @@
+"""
+Stand-in scraper for the benchmarks: publishes synthetic monitoring JSON at a fixed rate, then exits.
+
+Takes the arguments the manager passes to a real scraper (-c config, -i id,
+and -p address or --fan-in address); records go to $SCRAPER_DATA_ADDRESS.
+The config file is YAML or JSON with optional keys:
+
+    rate: 5              # telemetry messages per second
+    duration: 3          # seconds before exiting
+    duration_jitter: 0   # random extra seconds added to duration
+    fields: 5            # extra counters per message
+    records: 0           # result records pushed to $SCRAPER_DATA_ADDRESS with each telemetry message
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import yaml
+import zmq
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake scraper")
+    parser.add_argument("-c", dest="config", required=True)
+    parser.add_argument("-i", dest="unique_id", required=True)
+    parser.add_argument("-p", dest="publish")
+    parser.add_argument("--fan-in", dest="fan_in")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        settings = yaml.safe_load(f) or {}
+    rate = settings.get("rate", 5)
+    duration = settings.get("duration", 3) + random.uniform(0, settings.get("duration_jitter", 0))
+    fields = settings.get("fields", 5)
+    records = settings.get("records", 0)
+
+    context = zmq.Context()
+    if args.fan_in:
+        sock = context.socket(zmq.PUSH)
+        sock.connect(args.fan_in)
+        unique_id = args.unique_id.encode()
+
+        def send(payload):
+            # PUSH blocks once the manager's queue is full: drop telemetry instead, as PUB would
+            try:
+                sock.send_multipart([unique_id, payload], zmq.NOBLOCK)
+            except zmq.Again:
+                pass
+    else:
+        sock = context.socket(zmq.PUB)
+        sock.bind(args.publish)
+        send = sock.send
+    data_sock = None
+    data_address = os.environ.get("SCRAPER_DATA_ADDRESS")
+    if data_address and records:
+        data_sock = context.socket(zmq.PUSH)
+        data_sock.connect(data_address)
+
+    started = time.monotonic()
+    next_send = started
+    count = 0
+    while next_send < started + duration:
+        send(json.dumps({
+            "pages_scraped": count,
+            "items_found": count * 25,
+            "errors": 0,
+            "elapsed": time.monotonic() - started,
+            "counters": {f"counter_{i}": count * i for i in range(fields)}
+        }).encode())
+        if data_sock is not None:
+            data_sock.send_multipart([args.unique_id.encode(), json.dumps([
+                {"url": f"https://example.com/item/{count}/{i}", "title": f"Item {i}", "price": random.randint(1, 10000)}
+                for i in range(records)
+            ]).encode()])
+        count += 1
+        next_send += 1 / rate
+        time.sleep(max(next_send - time.monotonic(), 0))
+    sock.close(linger=100)
+    if data_sock is not None:
+        # Records must not be lost: wait for them to be handed over
+        data_sock.close(linger=-1)
+    context.term()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Load test of the real RemoteManager against fleets of fake scrapers.
+
+For each fleet size a fresh RemoteManager runs in a child process for
+--seconds, scheduling one profile per fake scraper (benchmarks/fake_scraper)
+that publishes --rate telemetry messages/s for --duration seconds and is
+relaunched --period seconds after it exits. A client measures command
+round trips meanwhile. Reported per fleet:
+
+    launches      scrapers launched during the run
+    jitter        delay between a profile's deadline and its launch (p50/p99 ms)
+    snapshot rtt  command answered by the communication thread (p50/p99 ms)
+    query rtt     command answered through the manager thread (p50/p99 ms)
+    status        mean StatusPublisher tick time (ms) and payload (KiB)
+    ingest        telemetry messages/s received, and decoded after coalescing
+    cpu, rss      manager process CPU (% of one core, client included) and RSS
+
+Runs offline on one Linux box. Each fake scraper is a Python process with
+pyzmq loaded (~20 MiB), and without --fan-in the manager holds one SUB
+socket per running scraper, so the largest fleets need RAM and a high
+enough `ulimit -n`.
+
+Usage: python benchmarks/load_test.py [--fleet 10,100,1000] [--seconds 30] [--rate 5]
+                                      [--duration 3] [--period 5] [--fan-in]
+                                      [--workdir DIR]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_SCRAPER_DIR = os.path.join(ROOT, "benchmarks", "fake_scraper")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def instrument(remote, metrics):
+    """Wrap the manager and status publisher methods whose timings the report needs."""
+    manager = remote.manager
+    create_scraper = manager.create_scraper
+    update_monitoring_data = manager.update_monitoring_data
+    tick = remote.status.tick
+
+    def timed_create_scraper(profile_name):
+        due = manager.config_profiles[profile_name].next_run
+        now = datetime.now()
+        # Profiles that never ran are due at datetime.min, which is not jitter
+        if due is not None and due.year > 1 and due <= now:
+            metrics["jitter"].append((now - due).total_seconds() * 1000)
+        metrics["launches"] += 1
+        return create_scraper(profile_name)
+
+    def counted_update_monitoring_data(unique_id, received, dropped=0):
+        metrics["received"] += 1 + dropped
+        metrics["decoded"] += 1
+        return update_monitoring_data(unique_id, received, dropped)
+
+    def timed_tick(channels):
+        started = time.perf_counter()
+        published = tick(channels)
+        metrics["ticks"].append(((time.perf_counter() - started) * 1000, published))
+        return published
+
+    manager.create_scraper = timed_create_scraper
+    manager.update_monitoring_data = counted_update_monitoring_data
+    remote.status.tick = timed_tick
+
+
+def measure_commands(address, profile_names, deadline, metrics):
+    import zmq
+    sock = zmq.Context.instance().socket(zmq.REQ)
+    sock.setsockopt(zmq.RCVTIMEO, 10000)
+    sock.connect(address)
+    index = 0
+    while time.monotonic() < deadline:
+        index += 1
+        if index % 2:
+            command, data, key = "snapshot", None, "snapshot_rtt"
+        else:
+            profile_name = profile_names[index % len(profile_names)]
+            command, data, key = "query_telemetry", {"profile": profile_name, "resolution": "1m", "fields": ["pages_scraped"]}, "query_rtt"
+        started = time.perf_counter()
+        sock.send(json.dumps({"id": index, "command": command, "data": data}).encode())
+        try:
+            sock.recv()
+        except zmq.Again:
+            break
+        metrics[key].append((time.perf_counter() - started) * 1000)
+        time.sleep(0.05)
+    sock.close(linger=0)
+
+
+def run_fleet(size, args, workdir):
+    """Run one manager against `size` fake scrapers in `workdir` and return its metrics."""
+    import remoteManager
+    from configICD import Config, ProfileConfig
+    from resources import read_process
+    from utils import Utils
+
+    settings_path = os.path.join(workdir, "fake.yaml")
+    with open(settings_path, "w") as f:
+        json.dump({"rate": args.rate, "duration": args.duration, "duration_jitter": args.duration / 2}, f)
+    config = Config(
+        profiles={f"fake_{i}": ProfileConfig(settings_path, args.period / 60) for i in range(size)},
+        base_path=FAKE_SCRAPER_DIR,
+        venv_python=sys.executable,
+        publish_host="127.0.0.1",
+        publish_port=free_port(),
+        response_port=free_port(),
+        request_port=free_port(),
+        log_console=False,
+        log_file=False,
+        state_path=os.path.join(workdir, "state.db"),
+        journal_path=os.path.join(workdir, "commands.jsonl"),
+        runtime_dir=os.path.join(workdir, "run"),
+        telemetry_fan_in=args.fan_in
+    )
+    Utils.setup_logging(log_level="WARNING", console_logging=True, file_logging=False)
+
+    remote = remoteManager.RemoteManager(config)
+    metrics = {"launches": 0, "jitter": [], "received": 0, "decoded": 0, "ticks": [], "snapshot_rtt": [], "query_rtt": []}
+    instrument(remote, metrics)
+    usage_before = read_process(os.getpid())
+    started = time.monotonic()
+    for target in (remote.manager.run, remote.run_communication):
+        threading.Thread(target=target, daemon=True).start()
+    measure_commands(f"tcp://127.0.0.1:{config.response_port}", list(config.profiles), started + args.seconds, metrics)
+    elapsed = time.monotonic() - started
+    usage_after = read_process(os.getpid())
+
+    ticks = metrics["ticks"] or [(0, 0)]
+    return {
+        "fleet": size,
+        "launches": metrics["launches"],
+        "jitter_p50": percentile(metrics["jitter"], 0.5),
+        "jitter_p99": percentile(metrics["jitter"], 0.99),
+        "snapshot_p50": percentile(metrics["snapshot_rtt"], 0.5),
+        "snapshot_p99": percentile(metrics["snapshot_rtt"], 0.99),
+        "query_p50": percentile(metrics["query_rtt"], 0.5),
+        "query_p99": percentile(metrics["query_rtt"], 0.99),
+        "tick_ms": sum(tick[0] for tick in ticks) / len(ticks),
+        "tick_kib": sum(tick[1] for tick in ticks) / len(ticks) / 1024,
+        "received_per_s": metrics["received"] / elapsed,
+        "decoded_per_s": metrics["decoded"] / elapsed,
+        "cpu_percent": (usage_after["cpu_time"] - usage_before["cpu_time"]) / elapsed * 100,
+        "rss_mib": usage_after["rss_bytes"] / 2 ** 20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fleet", default="10,100,1000", help="Comma separated fleet sizes")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--rate", type=float, default=5, help="Telemetry messages per second per scraper")
+    parser.add_argument("--duration", type=float, default=3, help="Seconds each fake scraper runs")
+    parser.add_argument("--period", type=float, default=5, help="Seconds between a scraper's exit and its next launch")
+    parser.add_argument("--fan-in", action="store_true", help="Use the fan-in telemetry socket")
+    parser.add_argument("--workdir", help="Directory to hold the run's scratch files (default: system temp dir)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_fleet(args.child, args, args.workdir)), flush=True)
+        os._exit(0)
+
+    print(f"{'fleet':>6} {'launches':>8} | {'jitter ms':>15} | {'snapshot rtt ms':>15} | {'query rtt ms':>15} |"
+          f" {'status ms/KiB':>15} | {'ingest msg/s':>17} | {'cpu %':>6} {'rss MiB':>8}")
+    # Removed once every child has exited; holds state.db, the journal, sink files and the ipc runtime dir
+    with tempfile.TemporaryDirectory(prefix="load-test-", dir=args.workdir, ignore_cleanup_errors=True) as scratch:
+        for size in [int(size) for size in args.fleet.split(",")]:
+            workdir = os.path.join(scratch, f"fleet-{size}")
+            os.mkdir(workdir)
+            # A fresh process per fleet: the manager threads and sockets cannot be shut down in-process
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(size)] + sys.argv[1:] + ["--workdir", workdir],
+                stdout=subprocess.PIPE, text=True
+            )
+            lines = child.stdout.strip().splitlines()
+            if child.returncode or not lines:
+                print(f"{size:>6} failed with exit code {child.returncode}")
+                continue
+            r = json.loads(lines[-1])
+            print(f"{r['fleet']:>6} {r['launches']:>8} | {r['jitter_p50']:>7.1f}/{r['jitter_p99']:<7.1f} |"
+                  f" {r['snapshot_p50']:>7.2f}/{r['snapshot_p99']:<7.2f} | {r['query_p50']:>7.2f}/{r['query_p99']:<7.2f} |"
+                  f" {r['tick_ms']:>7.2f}/{r['tick_kib']:<7.1f} | {r['received_per_s']:>8.0f}/{r['decoded_per_s']:<8.0f} |"
+                  f" {r['cpu_percent']:>6.1f} {r['rss_mib']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Per-tick cost of status publishing at 10/100/1000 scrapers.
+
+Compares the old send_status (to_json -> json.loads -> json.dumps of the whole
+snapshot every tick) with StatusPublisher on a keyframe tick and on delta
+ticks where 10% of the scrapers received new monitoring data.
+
+Usage: python benchmarks/status_publish.py [--ticks N] [--wire-format json|msgpack]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import get_codec
+from profileICD import Profile
+from scraper import Scraper
+from statusPublisher import StatusPublisher
+
+DELIMITER = "::"
+
+
+class NullIPC:
+    """Counts what would be published; Scraper only needs an endpoint from it."""
+    def __init__(self, wire_format):
+        self.codec = get_codec(wire_format)
+        self.collector_address = None
+        self.bytes = 0
+
+    def new_endpoint(self, name):
+        return f"ipc:///tmp/{name}.sock"
+
+    def publish(self, message, topic=None):
+        self.bytes += len(message)
+
+
+def monitoring_data(i, tick):
+    return {
+        "pages_scraped": tick * 10 + i,
+        "items_found": tick * 250 + i,
+        "errors": tick % 3,
+        "current_url": f"https://www.avito.ma/fr/maroc/appartements?o={tick}",
+        "http": {"2xx": tick * 10, "4xx": 0, "5xx": tick % 2},
+    }
+
+
+def build_fleet(count, ipc):
+    scrapers, profiles = {}, {}
+    for i in range(count):
+        unique_id = str(uuid.uuid4())
+        scraper = Scraper(f"config_{i}.yaml", unique_id, f"profile_{i}", "/tmp", "python", ipc)
+        scraper.last_started = datetime.now()
+        scraper.monitoring_data = monitoring_data(i, 0)
+        scrapers[unique_id] = scraper
+        profile = Profile(f"config_{i}.yaml", 240, datetime.now(), unique_id, scraper.address, True)
+        profiles[f"profile_{i}"] = profile
+    return scrapers, profiles
+
+
+def legacy_tick(ipc, scrapers, profiles):
+    scrapers_status = {key: json.loads(scraper.to_json()) for key, scraper in scrapers.items()}
+    profiles_status = {key: json.loads(profile.to_json()) for key, profile in profiles.items()}
+    ipc.publish('scraper_status' + DELIMITER + json.dumps(scrapers_status))
+    ipc.publish('profiles_status' + DELIMITER + json.dumps(profiles_status))
+
+
+def measure(func, ticks):
+    start = time.perf_counter()
+    for tick in range(ticks):
+        func(tick)
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def run(count, ticks, wire_format):
+    ipc = NullIPC(wire_format)
+    scrapers, profiles = build_fleet(count, ipc)
+    channels = lambda: {'status.scraper': scrapers, 'status.profile': profiles}
+    changing = list(scrapers.values())[:max(count // 10, 1)]
+
+    def mutate(tick):
+        for i, scraper in enumerate(changing):
+            scraper.monitoring_data = monitoring_data(i, tick + 1)
+
+    ipc.bytes = 0
+    legacy_ms = measure(lambda tick: (mutate(tick), legacy_tick(ipc, scrapers, profiles)), ticks)
+    legacy_bytes = ipc.bytes / ticks
+
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    publisher.tick(channels())
+    ipc.bytes = 0
+    delta_ms = measure(lambda tick: (mutate(tick), publisher.tick(channels())), ticks)
+    delta_bytes = ipc.bytes / ticks
+
+    ipc.bytes = 0
+
+    def keyframe(tick):
+        mutate(tick)
+        publisher.request_keyframe()
+        publisher.tick(channels())
+
+    keyframe_ms = measure(keyframe, ticks)
+    keyframe_bytes = ipc.bytes / ticks
+
+    print(f"{count:>6} | {legacy_ms:>9.2f} ms {legacy_bytes / 1024:>9.1f} KiB"
+          f" | {keyframe_ms:>9.2f} ms {keyframe_bytes / 1024:>9.1f} KiB"
+          f" | {delta_ms:>9.2f} ms {delta_bytes / 1024:>9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--wire-format", default="json")
+    args = parser.parse_args()
+    print(f"{'fleet':>6} | {'legacy':>26} | {'keyframe':>26} | {'delta (10% changed)':>26}")
+    for count in (10, 100, 1000):
+        run(count, args.ticks, args.wire_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Stress the boundary between the manager and communication threads.
+
+Runs a real RemoteManager (manager thread + communication thread) over
+short-lived fake scrapers (benchmarks/fake_scraper), with the status published every 10 ms, while
+client threads hammer start_scraper/stop_scraper over the command socket.
+Fails (exit code 1) on an error logged by either thread, an unexpected
+command error, or a profile that ran twice at the same time.
+
+Usage: python benchmarks/stress_commands.py [--seconds N] [--clients N] [--profiles N]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zmq
+
+import remoteManager
+from configICD import Config, ProfileConfig
+from remoteManager import RemoteManager
+from utils import Utils
+
+FAKE_SCRAPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_scraper")
+EXPECTED_ERRORS = ("Profile already running", "Unknown scraper")
+
+
+class ErrorCounter(logging.Handler):
+    """Collects logged errors, except the rejections the clients provoke on purpose."""
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.records = []
+
+    def emit(self, record):
+        if not any(expected in record.getMessage() for expected in EXPECTED_ERRORS):
+            self.records.append(record)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_config(workdir, profiles):
+    settings_path = os.path.join(workdir, "fake.yaml")
+    with open(settings_path, "w") as f:
+        json.dump({"rate": 50, "duration": 0.02, "duration_jitter": 0.4}, f)
+    return Config(
+        profiles={f"profile_{i}": ProfileConfig(settings_path, 24 * 60) for i in range(profiles)},
+        base_path=FAKE_SCRAPER_DIR,
+        venv_python=sys.executable,
+        publish_host="127.0.0.1",
+        publish_port=free_port(),
+        response_port=free_port(),
+        request_port=free_port(),
+        log_console=False,
+        log_file=False,
+        state_path=os.path.join(workdir, "state.db"),
+        journal_path=os.path.join(workdir, "commands.jsonl"),
+        runtime_dir=os.path.join(workdir, "run"),
+        resource_sample_interval=0.05
+    )
+
+
+def client(address, profile_names, started_ids, results, deadline):
+    context = zmq.Context.instance()
+    sock = context.socket(zmq.REQ)
+    sock.setsockopt(zmq.RCVTIMEO, 30000)
+    sock.connect(address)
+    request_id = 0
+    while time.monotonic() < deadline:
+        request_id += 1
+        if started_ids and random.random() < 0.4:
+            request = {"id": request_id, "command": "stop_scraper", "data": random.choice(started_ids)}
+        else:
+            request = {"id": request_id, "command": "start_scraper", "data": random.choice(profile_names)}
+        sock.send(json.dumps(request).encode())
+        try:
+            reply = json.loads(sock.recv())
+        except zmq.Again:
+            results["unexpected"].append(f"no reply to {request}")
+            break
+        if reply["ok"]:
+            results["ok"] += 1
+            if request["command"] == "start_scraper":
+                started_ids.append(reply["result"])
+        elif reply["error"].startswith(EXPECTED_ERRORS):
+            results["rejected"] += 1
+        else:
+            results["unexpected"].append(reply["error"])
+    sock.close(linger=0)
+
+
+def overlapping_runs(state):
+    with state.lock:
+        rows = state.conn.execute("SELECT profile, started, finished FROM runs ORDER BY profile, started").fetchall()
+    overlaps = []
+    for (profile, _, finished), (next_profile, next_started, _) in zip(rows, rows[1:]):
+        if profile == next_profile and (finished is None or finished > next_started):
+            overlaps.append(profile)
+    return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--profiles", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stress-commands-")
+    try:
+        config = build_config(workdir, args.profiles)
+        errors = ErrorCounter()
+        Utils.setup_logging(log_level="WARNING", console_logging=False, file_logging=False).addHandler(errors)
+        remoteManager.STATUS_UPDATE_INTERVAL = 0.01
+
+        remote = RemoteManager(config)
+        for target in (remote.manager.run, remote.run_communication):
+            threading.Thread(target=target, daemon=True).start()
+
+        deadline = time.monotonic() + args.seconds
+        started_ids, results = [], {"ok": 0, "rejected": 0, "unexpected": []}
+        address = f"tcp://127.0.0.1:{config.response_port}"
+        clients = [
+            threading.Thread(target=client, args=(address, list(config.profiles), started_ids, results, deadline))
+            for _ in range(args.clients)
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        time.sleep(1)
+
+        overlaps = overlapping_runs(remote.manager.state)
+        print(f"commands ok: {results['ok']}, rejected as expected: {results['rejected']}, "
+              f"unexpected: {len(results['unexpected'])}, runs: {len(started_ids)}, "
+              f"overlapping runs: {len(overlaps)}, logged errors: {len(errors.records)}")
+        for message in results["unexpected"][:10]:
+            print(f"  unexpected command error: {message}")
+        for record in errors.records[:10]:
+            print(f"  logged error: {record.getMessage()}")
+        if results["unexpected"] or overlaps or errors.records:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for wire_format: msgpack
+    msgpack = None
+
+
+class JsonCodec:
+    """UTF-8 JSON payloads."""
+    name = 'json'
+
+    def encode(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def decode(self, data):
+        return json.loads(data)
+
+    def encode_entry(self, key, value):
+        """Encode one map entry from its key and already encoded value."""
+        return self.encode(key) + b': ' + value
+
+    def join_map(self, entries):
+        """Build a map from entries returned by encode_entry."""
+        return b'{' + b', '.join(entries) + b'}'
+
+
+class MsgpackCodec:
+    """Binary msgpack payloads."""
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError("wire_format 'msgpack' requires the msgpack package.")
+
+    def encode(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+    def encode_entry(self, key, value):
+        """Encode one map entry from its key and already encoded value."""
+        return self.encode(key) + value
+
+    def join_map(self, entries):
+        """Build a map from entries returned by encode_entry."""
+        entries = list(entries)
+        size = len(entries)
+        if size < 16:
+            header = bytes([0x80 | size])
+        elif size < 0x10000:
+            header = b'\xde' + struct.pack('>H', size)
+        else:
+            header = b'\xdf' + struct.pack('>I', size)
+        return header + b''.join(entries)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, MsgpackCodec)}
+
+
+def get_codec(name):
+    """
+    Return a codec instance by wire format name.
+    :param name: 'json' or 'msgpack'.
+    """
+    if name not in CODECS:
+        raise ValueError(f"Unknown wire format: {name}")
+    return CODECS[name]()
@@ -0,0 +1,304 @@
+import atexit
+import bisect
+import collections
+import glob
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import time
+from utils import Utils
+
+_CLOSE = object()
+
+
+class CommandJournal:
+    """Append-only JSONL journal of the commands received over the command socket.
+
+    Each command is journaled when received and again when completed, both
+    records sharing its `seq`. Callers only enqueue records; a writer thread
+    appends them in batches and flushes + fsyncs once per batch, at most every
+    `flush_interval` seconds. A batch that fails to write is logged and
+    dropped; the writer carries on with the next one. The journal is split
+    into segments named <stem>.<n><ext>: a new one starts past `max_bytes`
+    and only the newest `backup_count` + 1 are kept.
+
+    Every retained record is indexed in memory by time and by the scraper ids
+    and profile names it mentions once it is on disk, so lookup() reads just
+    the matching lines; records still queued for the writer are answered from
+    memory, so lookup() never waits for a write. `lock` guards the segment
+    list, the index and the queued records.
+    Commands received but never completed by the previous run are available
+    from incomplete() for replay.
+    """
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, flush_interval=0.5):
+        self.stem, self.ext = os.path.splitext(os.path.abspath(path))
+        os.makedirs(os.path.dirname(self.stem), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.by_time = []  # (ts, segment, offset) in write order
+        self.by_key = {}  # scraper id or profile name -> [(ts, segment, offset)]
+        self.pending = {}  # seq -> received record without a completion, from previous runs
+        self.unwritten = collections.deque()  # records queued for the writer, in queue order
+        pattern = re.compile(re.escape(os.path.basename(self.stem)) + r"\.(\d+)" + re.escape(self.ext) + "$")
+        self.segments = sorted(
+            int(match.group(1))
+            for match in (pattern.match(os.path.basename(name)) for name in glob.glob(f"{self.stem}.*{self.ext}"))
+            if match
+        )
+        last_seq = 0
+        for segment in self.segments:
+            last_seq = max(last_seq, self._load_segment(segment))
+        self.sequence = itertools.count(last_seq + 1)
+        if not self.segments:
+            self.segments.append(1)
+        self._open()
+        self.last_sync = time.monotonic()
+        self.queue = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self._run, name="CommandJournal", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def segment_path(self, segment):
+        return f"{self.stem}.{segment:06d}{self.ext}"
+
+    def _open(self):
+        self.file = open(self.segment_path(self.segments[-1]), "ab")
+        self.size = self.file.tell()
+        if self.size and not self._ends_with_newline():
+            # Terminate a line cut short by a crash or a failed write so the next record starts cleanly
+            self.file.write(b"\n")
+            self.size += 1
+
+    def _reopen(self):
+        """Start over on the newest segment after a failed write left the file in an unknown state."""
+        try:
+            self.file.close()
+        except Exception:
+            pass  # the buffered lines are lost, the file is closed regardless
+        try:
+            self._open()
+        except Exception as e:
+            Utils.get_logger().error("Failed to reopen the command journal: %s", e)
+
+    def _ends_with_newline(self):
+        with open(self.segment_path(self.segments[-1]), "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load_segment(self, segment):
+        """Index an existing segment and collect its unfinished commands; returns the highest seq seen."""
+        last_seq = 0
+        offset = 0
+        with open(self.segment_path(segment), "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    offset += len(line)
+                    continue
+                self._index(record, segment, offset)
+                offset += len(line)
+                last_seq = max(last_seq, record.get("seq", 0))
+                if record.get("phase") == "received":
+                    self.pending[record["seq"]] = record
+                else:
+                    self.pending.pop(record.get("seq"), None)
+                if record.get("replay_of") is not None:
+                    self.pending.pop(record["replay_of"], None)
+        return last_seq
+
+    def received(self, request, replay_of=None):
+        """Journal a command as it arrives and return its sequence number."""
+        seq = next(self.sequence)
+        record = {
+            "seq": seq,
+            "ts": time.time(),
+            "phase": "received",
+            "id": request.get("id"),
+            "command": request.get("command"),
+            "data": request.get("data")
+        }
+        if replay_of is not None:
+            record["replay_of"] = replay_of
+        self._enqueue(record)
+        return seq
+
+    def completed(self, seq, reply):
+        """Journal the outcome of a command; results are kept only when they are ids."""
+        record = {
+            "seq": seq,
+            "ts": time.time(),
+            "phase": "completed",
+            "command": reply.get("command"),
+            "ok": reply.get("ok"),
+            "error": reply.get("error"),
+            "latency_ms": reply.get("latency_ms")
+        }
+        result = reply.get("result")
+        if isinstance(result, str) or (isinstance(result, list) and all(isinstance(item, str) for item in result)):
+            record["result"] = result
+        self._enqueue(record)
+
+    def abandon(self, seq):
+        """Journal that an unfinished command from a previous run will not be replayed."""
+        self._enqueue({"seq": seq, "ts": time.time(), "phase": "abandoned"})
+
+    def _enqueue(self, record):
+        with self.lock:
+            self.unwritten.append(record)
+            self.queue.put(record)
+
+    def incomplete(self):
+        """Return the commands the previous run received but never completed, oldest first."""
+        return [self.pending[seq] for seq in sorted(self.pending)]
+
+    def lookup(self, key=None, since=None, until=None, limit=100):
+        """Return up to `limit` of the newest records mentioning `key` and/or within [since, until]."""
+        with self.lock:
+            if key is not None:
+                positions = list(self.by_key.get(key, ()))
+            else:
+                low = 0 if since is None else bisect.bisect_left(self.by_time, (since,))
+                high = len(self.by_time) if until is None else bisect.bisect_right(self.by_time, (until, float("inf")))
+                positions = self.by_time[low:high]
+            queued = [record for record in self.unwritten if key is None or key in self.keys(record)]
+        if since is not None:
+            positions = [position for position in positions if position[0] >= since]
+            queued = [record for record in queued if record["ts"] >= since]
+        if until is not None:
+            positions = [position for position in positions if position[0] <= until]
+            queued = [record for record in queued if record["ts"] <= until]
+        if limit:
+            queued = queued[-limit:]
+            positions = positions[-(limit - len(queued)):] if limit > len(queued) else []
+        return self._read(positions) + queued
+
+    def _read(self, positions):
+        records = []
+        files = {}
+        try:
+            for _, segment, offset in positions:
+                f = files.get(segment)
+                if f is None:
+                    try:
+                        f = files[segment] = open(self.segment_path(segment), "rb")
+                    except FileNotFoundError:
+                        continue
+                f.seek(offset)
+                records.append(json.loads(f.readline()))
+        finally:
+            for f in files.values():
+                f.close()
+        return records
+
+    def flush(self, timeout=5):
+        """Wait until every record queued so far is written and synced."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Write the remaining records and stop the writer thread."""
+        if self.writer.is_alive():
+            self.queue.put(_CLOSE)
+            self.writer.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Keep collecting until a flush is due, so a burst costs one fsync
+            while batch[-1] is not _CLOSE and not isinstance(batch[-1], threading.Event):
+                remaining = self.last_sync + self.flush_interval - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in batch if isinstance(item, dict)]
+            try:
+                written = [(record,) + self._write(record) for record in records]
+                self.file.flush()
+            except Exception as e:
+                # Never let the thread die: unwritten would grow without bound and flush() would wait in vain
+                Utils.get_logger().error("Failed to journal %d records: %s", len(records), e, exc_info=True)
+                written = []
+                self._reopen()
+            # Indexed only once flushed, so lookup() can read them back through its own file handle
+            with self.lock:
+                for record, segment, offset in written:
+                    if segment in self.segments:
+                        self._index(record, segment, offset)
+                for _ in records:
+                    self.unwritten.popleft()
+            try:
+                os.fsync(self.file.fileno())
+            except Exception as e:
+                Utils.get_logger().error("Failed to sync the command journal: %s", e)
+            self.last_sync = time.monotonic()
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if batch[-1] is _CLOSE:
+                try:
+                    self.file.close()
+                except Exception as e:
+                    Utils.get_logger().error("Failed to close the command journal: %s", e)
+                return
+
+    def _write(self, record):
+        line = json.dumps(record, default=str, separators=(",", ":")).encode() + b"\n"
+        if self.size and self.size + len(line) > self.max_bytes:
+            self._rotate()
+        segment, offset = self.segments[-1], self.size
+        self.file.write(line)
+        self.size += len(line)
+        return segment, offset
+
+    def _rotate(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        with self.lock:
+            self.segments.append(self.segments[-1] + 1)
+            expired = set(self.segments[:-(self.backup_count + 1)])
+            del self.segments[:len(expired)]
+        self.file = open(self.segment_path(self.segments[-1]), "ab")
+        self.size = 0
+        if not expired:
+            return
+        for segment in expired:
+            try:
+                os.unlink(self.segment_path(segment))
+            except FileNotFoundError:
+                pass
+        with self.lock:
+            self.by_time = [position for position in self.by_time if position[1] not in expired]
+            for key in list(self.by_key):
+                positions = [position for position in self.by_key[key] if position[1] not in expired]
+                if positions:
+                    self.by_key[key] = positions
+                else:
+                    del self.by_key[key]
+
+    def _index(self, record, segment, offset):
+        position = (record.get("ts", 0), segment, offset)
+        self.by_time.append(position)
+        for key in self.keys(record):
+            self.by_key.setdefault(key, []).append(position)
+
+    @staticmethod
+    def keys(record):
+        """Return the scraper ids and profile names a record mentions."""
+        keys = set()
+        for field in ("data", "result"):
+            value = record.get(field)
+            if isinstance(value, dict):
+                value = [value.get("scraper"), value.get("profile")]
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, str) and item:
+                    keys.add(item)
+        return keys
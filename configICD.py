@@ -1,10 +1,56 @@
-from typing import Dict, Any
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, asdict, field
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+def parse_log_level(value: Any) -> str:
+    """Return a log level name in upper case; WARN is accepted for WARNING."""
+    level = str(value).strip().upper()
+    level = 'WARNING' if level == 'WARN' else level
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Invalid log_level {value!r}, expected one of {', '.join(LOG_LEVELS)}")
+    return level
+
+@dataclass
+class ResourceLimits:
+    memory_mb: int = 0  # RLIMIT_AS, 0 for unlimited
+    cpu_seconds: int = 0  # RLIMIT_CPU, 0 for unlimited
+    nice: int = 0
+    ionice_class: Optional[int] = None  # 1 realtime, 2 best-effort, 3 idle
+    ionice_level: Optional[int] = None  # 0-7 for classes 1 and 2
+    cgroup: Optional[str] = None  # cgroup v2 directory the scraper is moved into
+
+    @classmethod
+    def parse(cls, data: Optional[Dict[str, Any]]) -> Optional['ResourceLimits']:
+        if not data:
+            return None
+        return cls(**data)
+
+@dataclass
+class RateLimit:
+    rate: float  # requests per second
+    burst: int = 1  # requests that may go out back to back after an idle period
+
+    def __post_init__(self):
+        if self.rate <= 0:
+            raise ValueError(f"Invalid rate {self.rate!r}, expected requests per second above 0")
+        if self.burst < 1:
+            raise ValueError(f"Invalid burst {self.burst!r}, expected at least 1")
+        # Granted permits are counted in whole requests
+        self.burst = int(self.burst)
+
+    @classmethod
+    def parse(cls, data: Optional[Dict[str, Any]]) -> Dict[str, 'RateLimit']:
+        """Return the limits by domain, lower-cased like the hosts they are matched against."""
+        return {domain.strip('.').lower(): cls(**limit) for domain, limit in (data or {}).items()}
 
 @dataclass
 class ProfileConfig:
     config_file: str
     interval: int
+    priority: int = 0
+    base_path: Optional[str] = None
+    limits: Optional[ResourceLimits] = None
 
 @dataclass
 class Config:
@@ -14,17 +60,75 @@ class Config:
     publish_port: int
     response_port: int
     request_port: int
+    venv_python: Optional[str] = None  # interpreter for every scraper, defaults to <base_path>/venv/bin/python
     log_path: str = 'app.log'
     log_level: str = 'INFO'
     log_console: bool = True
     log_file: bool = False 
+    log_async: bool = False  # format and write log records on a background thread
+    log_max_bytes: int = 0  # rotate the log file at this size, 0 to disable
+    log_backup_count: int = 5  # rotated log files kept
+    log_rotate_when: Optional[str] = None  # rotate on time instead, e.g. 'midnight'
+    log_sample_every: int = 1  # keep one in N per-cycle log records
+    max_concurrent: int = 0  # 0 means unlimited
+    max_concurrent_per_base_path: int = 0
+    launch_stagger: float = 0  # seconds between two scheduled launches
+    launch_jitter: float = 0  # random extra seconds added to the stagger
+    engine: str = 'threads'  # 'threads' or 'asyncio'
+    status_keyframe_interval: int = 30  # status ticks between two full snapshots
+    wire_format: str = 'json'  # 'json' or 'msgpack'
+    state_path: str = 'state.db'  # SQLite file keeping run history across restarts
+    state_history: int = 100  # runs kept per profile
+    telemetry_capacity: int = 300  # raw telemetry samples kept per scraper
+    telemetry_max_fields: int = 32  # numeric telemetry fields tracked per scraper
+    telemetry_retained: int = 50  # finished scrapers whose history stays queryable
+    telemetry_coalesce: bool = True  # decode only the newest telemetry message per scraper per cycle
+    telemetry_hwm: int = 100  # messages queued per scraper subscription or fan-in connection, 0 for the zmq default
+    resource_sample_interval: float = 5  # seconds between two /proc samples of each scraper, 0 to disable
+    telemetry_transport: str = 'ipc'  # 'ipc' (Unix domain sockets) or 'tcp' (loopback ports)
+    runtime_dir: Optional[str] = None  # each manager binds its ipc:// sockets in its own manager-* subdirectory, defaults to $XDG_RUNTIME_DIR/scraper-manager
+    telemetry_fan_in: bool = False  # scrapers push to one manager-bound socket (needs --fan-in support in the scraper)
+    journal_path: str = 'commands.jsonl'  # command journal, written as commands.000001.jsonl, ...
+    journal_max_bytes: int = 10 * 1024 * 1024  # size at which a new journal segment starts
+    journal_backup_count: int = 5  # older journal segments kept
+    journal_flush_interval: float = 0.5  # seconds between two journal fsyncs
+    journal_replay: bool = False  # re-run start_scraper commands a crash left unfinished
+    config_reload: bool = True  # apply profile changes in the configuration file without restarting
+    data_sink: Optional[str] = None  # 'sqlite' or 'jsonl' to collect scraper records on the data socket, None to disable
+    data_path: str = 'data/records.db'  # SQLite database, or the jsonl sink's <data_path>.<n>.jsonl.gz (a .jsonl/.gz suffix is dropped)
+    data_max_bytes: int = 64 * 1024 * 1024  # size at which the jsonl sink starts a new file
+    data_batch_size: int = 500  # records written per insert or compressed chunk at most
+    data_flush_interval: float = 1.0  # seconds a record may wait for its batch to fill
+    data_queue_size: int = 10000  # messages queued for the sink writer before the data socket is paused
+    data_hwm: int = 1000  # messages buffered on the data socket before scrapers block in send
+    seen_index: bool = False  # serve the "seen" item index to scrapers (address in $SCRAPER_SERVICES_ADDRESS)
+    seen_path: str = 'data/seen.db'  # the Bloom filter is saved next to it as seen.db.bloom
+    seen_capacity: int = 1000000  # items the Bloom filter is sized for
+    seen_error_rate: float = 0.01  # Bloom filter false positive rate at capacity
+    seen_ttl_days: float = 0  # items not seen again for this long count as unseen, 0 to keep them forever
+    response_cache: bool = False  # serve the shared HTTP response "cache" to scrapers (address in $SCRAPER_SERVICES_ADDRESS)
+    cache_path: str = 'data/cache.db'  # disk tier
+    cache_memory_mb: float = 64  # bodies kept in the in-memory LRU tier
+    cache_disk_mb: float = 1024  # bodies kept in the disk tier
+    cache_ttl: float = 300  # seconds a response without Cache-Control max-age or Expires stays fresh
+    rate_limits: Dict[str, RateLimit] = field(default_factory=dict)  # per domain, shared by all scrapers (the "rate" service)
+    pool_size: int = 0  # pre-warmed interpreters kept per base_path, 0 to always cold start
+    pool_preload: List[str] = field(default_factory=list)  # modules pool workers import while idle
+
+    def __post_init__(self):
+        # A Queue of size 0 is unbounded: the sink writer would never report room and the data socket would stay paused
+        if self.data_queue_size < 1:
+            raise ValueError(f"Invalid data_queue_size {self.data_queue_size!r}, expected at least 1")
 
     @classmethod
     def parse(cls, data: Dict[str, Any]) -> 'Config':
         profiles = {
             name: ProfileConfig(
                 config_file=profile['config_file'],
-                interval=profile['interval']
+                interval=profile['interval'],
+                priority=profile.get('priority', 0),
+                base_path=profile.get('base_path'),
+                limits=ResourceLimits.parse(profile.get('limits'))
             )
             for name, profile in data['profiles'].items()
         }
@@ -36,9 +140,60 @@ class Config:
             publish_port=data['publish_port'],
             response_port=data['response_port'],
             request_port=data['request_port'],
+            venv_python=data.get('venv_python'),
             log_path=data["log_path"],
+            log_level=parse_log_level(data.get('log_level', 'INFO')),
             log_console=data["log_console"],
-            log_file=data["log_file"]
+            log_file=data["log_file"],
+            log_async=data.get('log_async', False),
+            log_max_bytes=data.get('log_max_bytes', 0),
+            log_backup_count=data.get('log_backup_count', 5),
+            log_rotate_when=data.get('log_rotate_when'),
+            log_sample_every=data.get('log_sample_every', 1),
+            max_concurrent=data.get('max_concurrent', 0),
+            max_concurrent_per_base_path=data.get('max_concurrent_per_base_path', 0),
+            launch_stagger=data.get('launch_stagger', 0),
+            launch_jitter=data.get('launch_jitter', 0),
+            engine=data.get('engine', 'threads'),
+            status_keyframe_interval=data.get('status_keyframe_interval', 30),
+            wire_format=data.get('wire_format', 'json'),
+            state_path=data.get('state_path', 'state.db'),
+            state_history=data.get('state_history', 100),
+            telemetry_capacity=data.get('telemetry_capacity', 300),
+            telemetry_max_fields=data.get('telemetry_max_fields', 32),
+            telemetry_retained=data.get('telemetry_retained', 50),
+            telemetry_coalesce=data.get('telemetry_coalesce', True),
+            telemetry_hwm=data.get('telemetry_hwm', 100),
+            resource_sample_interval=data.get('resource_sample_interval', 5),
+            telemetry_transport=data.get('telemetry_transport', 'ipc'),
+            runtime_dir=data.get('runtime_dir'),
+            telemetry_fan_in=data.get('telemetry_fan_in', False),
+            journal_path=data.get('journal_path', 'commands.jsonl'),
+            journal_max_bytes=data.get('journal_max_bytes', 10 * 1024 * 1024),
+            journal_backup_count=data.get('journal_backup_count', 5),
+            journal_flush_interval=data.get('journal_flush_interval', 0.5),
+            journal_replay=data.get('journal_replay', False),
+            config_reload=data.get('config_reload', True),
+            data_sink=data.get('data_sink'),
+            data_path=data.get('data_path', 'data/records.db'),
+            data_max_bytes=data.get('data_max_bytes', 64 * 1024 * 1024),
+            data_batch_size=data.get('data_batch_size', 500),
+            data_flush_interval=data.get('data_flush_interval', 1.0),
+            data_queue_size=data.get('data_queue_size', 10000),
+            data_hwm=data.get('data_hwm', 1000),
+            seen_index=data.get('seen_index', False),
+            seen_path=data.get('seen_path', 'data/seen.db'),
+            seen_capacity=data.get('seen_capacity', 1000000),
+            seen_error_rate=data.get('seen_error_rate', 0.01),
+            seen_ttl_days=data.get('seen_ttl_days', 0),
+            response_cache=data.get('response_cache', False),
+            cache_path=data.get('cache_path', 'data/cache.db'),
+            cache_memory_mb=data.get('cache_memory_mb', 64),
+            cache_disk_mb=data.get('cache_disk_mb', 1024),
+            cache_ttl=data.get('cache_ttl', 300),
+            rate_limits=RateLimit.parse(data.get('rate_limits')),
+            pool_size=data.get('pool_size', 0),
+            pool_preload=data.get('pool_preload') or []
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -46,7 +201,10 @@ class Config:
             'profiles': {
                 name: {
                     'config_file': profile.config_file,
-                    'interval': profile.interval
+                    'interval': profile.interval,
+                    'priority': profile.priority,
+                    'base_path': profile.base_path,
+                    'limits': asdict(profile.limits) if profile.limits else None
                 }
                 for name, profile in self.profiles.items()
             },
@@ -55,8 +213,59 @@ class Config:
             'publish_port': self.publish_port,
             'request_port': self.request_port,
             'response_port': self.response_port,
+            'venv_python': self.venv_python,
             'log_path': self.log_path,
+            'log_level': self.log_level,
             'log_console': self.log_console,
-            'log_file': self.log_file
-            
+            'log_file': self.log_file,
+            'log_async': self.log_async,
+            'log_max_bytes': self.log_max_bytes,
+            'log_backup_count': self.log_backup_count,
+            'log_rotate_when': self.log_rotate_when,
+            'log_sample_every': self.log_sample_every,
+            'max_concurrent': self.max_concurrent,
+            'max_concurrent_per_base_path': self.max_concurrent_per_base_path,
+            'launch_stagger': self.launch_stagger,
+            'launch_jitter': self.launch_jitter,
+            'engine': self.engine,
+            'status_keyframe_interval': self.status_keyframe_interval,
+            'wire_format': self.wire_format,
+            'state_path': self.state_path,
+            'state_history': self.state_history,
+            'telemetry_capacity': self.telemetry_capacity,
+            'telemetry_max_fields': self.telemetry_max_fields,
+            'telemetry_retained': self.telemetry_retained,
+            'telemetry_coalesce': self.telemetry_coalesce,
+            'telemetry_hwm': self.telemetry_hwm,
+            'resource_sample_interval': self.resource_sample_interval,
+            'telemetry_transport': self.telemetry_transport,
+            'runtime_dir': self.runtime_dir,
+            'telemetry_fan_in': self.telemetry_fan_in,
+            'journal_path': self.journal_path,
+            'journal_max_bytes': self.journal_max_bytes,
+            'journal_backup_count': self.journal_backup_count,
+            'journal_flush_interval': self.journal_flush_interval,
+            'journal_replay': self.journal_replay,
+            'config_reload': self.config_reload,
+            'data_sink': self.data_sink,
+            'data_path': self.data_path,
+            'data_max_bytes': self.data_max_bytes,
+            'data_batch_size': self.data_batch_size,
+            'data_flush_interval': self.data_flush_interval,
+            'data_queue_size': self.data_queue_size,
+            'data_hwm': self.data_hwm,
+            'seen_index': self.seen_index,
+            'seen_path': self.seen_path,
+            'seen_capacity': self.seen_capacity,
+            'seen_error_rate': self.seen_error_rate,
+            'seen_ttl_days': self.seen_ttl_days,
+            'response_cache': self.response_cache,
+            'cache_path': self.cache_path,
+            'cache_memory_mb': self.cache_memory_mb,
+            'cache_disk_mb': self.cache_disk_mb,
+            'cache_ttl': self.cache_ttl,
+            'rate_limits': {domain: asdict(limit) for domain, limit in self.rate_limits.items()},
+            'pool_size': self.pool_size,
+            'pool_preload': self.pool_preload
+
         }
\ No newline at end of file
@@ -0,0 +1,120 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import struct
+import time
+import yaml
+from configICD import Config
+from utils import Utils
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+POLL_INTERVAL = 5  # seconds between two mtime checks without inotify
+
+
+def _inotify_init(directory):
+    """Return a non-blocking inotify fd watching `directory`, or None if inotify is unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # Watch the directory: editors and deploy tools often replace the file by renaming over it
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class ConfigWatcher:
+    """Detects changes to the configuration file and re-parses it.
+
+    Changes are noticed through inotify when available; `fd` is then the
+    inotify descriptor, meant to be registered in the caller's poller. Without
+    inotify the file's mtime is checked every POLL_INTERVAL seconds. Parsing
+    is skipped while the file's (mtime, size) is unchanged, or when its content
+    hashes to the last parsed version.
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.name = os.fsencode(os.path.basename(self.path))
+        self.fd = _inotify_init(os.path.dirname(self.path))
+        self.next_poll = None if self.fd is not None else time.monotonic() + POLL_INTERVAL
+        self.stamp = self._stamp()
+        self.digest = self._digest()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _digest(self):
+        try:
+            with open(self.path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def _file_touched(self):
+        """Drain pending inotify events and tell whether one concerned the configuration file."""
+        touched = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b"\0") == self.name:
+                    touched = True
+                offset += length
+
+    def timeout(self):
+        """Return how many seconds until the next mtime check, or None with inotify."""
+        if self.next_poll is None:
+            return None
+        return max(self.next_poll - time.monotonic(), 0)
+
+    def check(self):
+        """Return the new Config if the file changed since the last successful parse, else None.
+
+        A file that fails to parse is logged and ignored; the next change is picked up.
+        """
+        if self.fd is not None:
+            if not self._file_touched():
+                return None
+        else:
+            if time.monotonic() < self.next_poll:
+                return None
+            self.next_poll = time.monotonic() + POLL_INTERVAL
+        stamp = self._stamp()
+        if stamp is None or stamp == self.stamp:
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest == self.digest:
+                self.stamp = stamp
+                return None
+            config = Config.parse(yaml.safe_load(content))
+        except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+            Utils.get_logger().error("Ignoring invalid configuration %s: %s", self.path, e)
+            self.stamp = stamp
+            return None
+        self.stamp, self.digest = stamp, digest
+        return config
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,214 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from utils import Utils
+
+_CLOSE = object()
+WRITE_RETRIES = 3  # attempts after a failed batch write before the batch is spilled
+RETRY_DELAY = 0.5  # seconds before the first retry, doubled for each following one
+
+
+class SqliteSink:
+    """Appends records to a SQLite table, one transaction per batch."""
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id INTEGER PRIMARY KEY,"
+            " received REAL NOT NULL,"
+            " scraper TEXT NOT NULL,"
+            " profile TEXT,"
+            " record TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_profile ON records (profile, received)")
+
+    def write(self, rows):
+        """Insert (received, scraper, profile, record) rows."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO records (received, scraper, profile, record) VALUES (?, ?, ?, ?)",
+                [(received, scraper, profile, json.dumps(record, default=str)) for received, scraper, profile, record in rows]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class JsonlSink:
+    """Appends records to gzip-compressed JSONL files named <stem>.<n>.jsonl.gz.
+
+    Each batch is compressed as its own gzip member, so a file stays readable
+    up to the last complete batch after a crash. A new file is started once
+    the current one exceeds `max_bytes`; old files are never deleted.
+    """
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.stem = os.path.abspath(re.sub(r"(\.jsonl)?(\.gz)?$", "", path))
+        os.makedirs(os.path.dirname(self.stem), exist_ok=True)
+        self.max_bytes = max_bytes
+        pattern = re.compile(re.escape(os.path.basename(self.stem)) + r"\.(\d+)\.jsonl\.gz$")
+        numbers = [
+            int(match.group(1))
+            for match in (pattern.match(os.path.basename(name)) for name in glob.glob(f"{self.stem}.*.jsonl.gz"))
+            if match
+        ]
+        self.number = max(numbers, default=1)
+        self.file = open(self.file_path(), "ab")
+
+    def file_path(self):
+        return f"{self.stem}.{self.number:06d}.jsonl.gz"
+
+    def write(self, rows):
+        """Append (received, scraper, profile, record) rows as one gzip member."""
+        lines = [_row_line(row) for row in rows]
+        self.file.write(gzip.compress(("\n".join(lines) + "\n").encode()))
+        self.file.flush()
+        if self.file.tell() >= self.max_bytes:
+            self.file.close()
+            self.number += 1
+            self.file = open(self.file_path(), "ab")
+
+    def close(self):
+        self.file.close()
+
+
+def _row_line(row):
+    received, scraper, profile, record = row
+    return json.dumps({"received": received, "scraper": scraper, "profile": profile, "record": record}, default=str)
+
+
+def open_sink(kind, path, max_bytes=64 * 1024 * 1024):
+    """
+    Return a sink by kind name.
+    :param kind: 'sqlite' or 'jsonl'.
+    :param path: The database file, or the path the JSONL file names derive from.
+    :param max_bytes: Size at which a JSONL sink starts a new file.
+    """
+    if kind == 'sqlite':
+        return SqliteSink(path)
+    if kind == 'jsonl':
+        return JsonlSink(path, max_bytes)
+    raise ValueError(f"Unknown data sink: {kind}")
+
+
+class SinkWriter:
+    """Writes the records scrapers push on the data socket to a sink, in batches, on its own thread.
+
+    The manager thread only enqueues raw (received, scraper, profile, payload)
+    messages; decoding and writing happen here, at most `batch_size` records
+    or `flush_interval` seconds per batch, so one insert or compressed write
+    covers every concurrent scraper. The queue holds at most `queue_size`
+    messages: room() tells the manager how many it may still read.
+
+    A batch the sink fails to write is retried with backoff, then appended as
+    plain JSONL to `spill_path` so that it can be loaded by hand later; only
+    records that cannot be decoded, or that the spill file also refuses, are
+    counted failed and lost.
+    """
+    def __init__(self, sink, decode, batch_size=500, flush_interval=1.0, queue_size=10000, spill_path=None):
+        self.sink = sink
+        self.spill_path = spill_path
+        self.decode = decode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(queue_size)
+        self.written = 0
+        self.failed = 0
+        self.spilled = 0
+        self.batches = 0
+        self.writer = threading.Thread(target=self._run, name="SinkWriter", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def room(self):
+        """Return how many more messages can be queued without blocking."""
+        return self.queue.maxsize - self.queue.qsize()
+
+    def put(self, received, scraper, profile, payload):
+        """Queue one message; the caller checks room() first."""
+        self.queue.put((received, scraper, profile, payload))
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "written": self.written, "failed": self.failed, "spilled": self.spilled, "batches": self.batches}
+
+    def close(self):
+        """Write the queued records and stop the writer thread."""
+        if self.writer.is_alive():
+            self.queue.put(_CLOSE)
+            self.writer.join()
+
+    def _run(self):
+        message = None
+        while message is not _CLOSE:
+            try:
+                message = self.queue.get()
+                rows = []
+                deadline = time.monotonic() + self.flush_interval
+                while message is not _CLOSE:
+                    self._decode(message, rows)
+                    if len(rows) >= self.batch_size:
+                        break
+                    try:
+                        message = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                if rows:
+                    self._write(rows)
+            except Exception as e:
+                # Never let the thread die: the data socket would stay paused and scrapers block in send
+                Utils.get_logger().error("Record writer error: %s", e, exc_info=True)
+        try:
+            self.sink.close()
+        except Exception as e:
+            Utils.get_logger().error("Failed to close the data sink: %s", e)
+
+    def _write(self, rows):
+        """Write one batch, retrying with backoff, and spill it if the sink keeps failing."""
+        delay = RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                self.sink.write(rows)
+                self.written += len(rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                error = e
+            if attempt < WRITE_RETRIES:
+                time.sleep(delay)
+                delay *= 2
+        Utils.get_logger().error("Failed to write %d records after %d attempts: %s", len(rows), WRITE_RETRIES + 1, error)
+        self._spill(rows)
+
+    def _spill(self, rows):
+        if self.spill_path:
+            try:
+                with open(self.spill_path, "a") as f:
+                    f.write("".join(_row_line(row) + "\n" for row in rows))
+                self.spilled += len(rows)
+                Utils.get_logger().warning("Spilled %d records to %s", len(rows), self.spill_path)
+                return
+            except Exception as e:
+                Utils.get_logger().error("Failed to spill %d records to %s: %s", len(rows), self.spill_path, e)
+        self.failed += len(rows)
+
+    def _decode(self, message, rows):
+        """Expand a message, which holds one record or a list of records, into rows."""
+        received, scraper, profile, payload = message
+        try:
+            decoded = self.decode(payload)
+        except Exception:
+            self.failed += 1
+            return
+        for record in decoded if isinstance(decoded, list) else [decoded]:
+            rows.append((received, scraper, profile, record))
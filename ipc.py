@@ -1,9 +1,101 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
 import zmq
+import zmq.asyncio
+from codec import get_codec
+
+IPC_PATH_MAX = 107  # sun_path is 108 bytes including the terminating NUL
+
+
+def default_runtime_dir():
+    """Return the directory for ipc:// socket files: $XDG_RUNTIME_DIR/scraper-manager, else a per-user temp dir."""
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    if base:
+        return os.path.join(base, 'scraper-manager')
+    return os.path.join(tempfile.gettempdir(), f"scraper-manager-{os.getuid() if hasattr(os, 'getuid') else 0}")
+
 
 class IPC:
-    def __init__(self):
+    def __init__(self, wire_format='json', subscriber_hwm=None, runtime_dir=None):
         self.context = zmq.Context()
+        self.codec = get_codec(wire_format)
+        self.subscriber_hwm = subscriber_hwm
+        self.runtime_lock = None
+        self.runtime_dir = self._claim_runtime_dir(runtime_dir) if runtime_dir and zmq.has('ipc') else None
         self.sockets = {}
+        self.poller = zmq.Poller()
+        self.async_loop = None  # event loop watching the poller's items for receive_all_async, once bound
+        self.async_readers = {}  # socket or fd -> fd watched with loop.add_reader
+        self.async_ready = None
+        self.subscribers = {}
+        self.retired = []
+        self.wake_address = None
+        self.collector_address = None
+        self.data_address = None
+        self.records_paused = False
+        self.services_address = None
+
+    def _claim_runtime_dir(self, base):
+        """
+        Create this manager's own socket directory under `base`, locked for as long as the
+        process lives, and remove the directories of managers whose lock is no longer held.
+        Sockets of another running manager, or of scrapers it still runs, are never touched.
+        :param base: The shared runtime directory.
+        :return: The directory this manager binds its ipc:// endpoints in.
+        """
+        os.makedirs(base, mode=0o700, exist_ok=True)
+        # Socket files an earlier version left directly in base
+        self._remove_dead_sockets(base)
+        fd, lock_path = tempfile.mkstemp(prefix='manager-', suffix='.lock', dir=base)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        self.runtime_lock = fd
+        for stale_lock in glob.glob(os.path.join(base, 'manager-*.lock')):
+            if stale_lock == lock_path:
+                continue
+            try:
+                stale_fd = os.open(stale_lock, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(stale_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # its manager is still running
+            finally:
+                os.close(stale_fd)
+            stale_dir = stale_lock[:-len('.lock')]
+            # Scrapers of a manager that died may still be bound in its directory: keep their sockets
+            self._remove_dead_sockets(stale_dir)
+            try:
+                os.rmdir(stale_dir)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            os.unlink(stale_lock)
+        directory = lock_path[:-len('.lock')]
+        os.mkdir(directory, 0o700)
+        return directory
+
+    @staticmethod
+    def _remove_dead_sockets(directory):
+        """Unlink the socket files in `directory` that refuse connections, i.e. that no process listens on."""
+        for path in glob.glob(os.path.join(directory, '*.sock')):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+            except OSError:
+                pass
+            finally:
+                probe.close()
 
     def init_publisher(self, address):
         """
@@ -22,9 +114,174 @@ class IPC:
         :param topic: The topic to subscribe to (default is all topics).
         """
         sub_socket = self.context.socket(zmq.SUB)
+        if self.subscriber_hwm is not None:
+            # Messages past the high-water mark are dropped by libzmq instead of queued in memory
+            sub_socket.setsockopt(zmq.RCVHWM, self.subscriber_hwm)
         sub_socket.connect(address)
         sub_socket.setsockopt_string(zmq.SUBSCRIBE, topic)
         self.sockets[name] = sub_socket
+        self.subscribers[sub_socket] = name
+        self._watch(sub_socket)
+
+    def remove_subscriber(self, name):
+        """
+        Unregister a subscriber. The socket is closed after the poll in progress, if any, returns.
+        :param name: The name/ID of the subscriber.
+        """
+        sub_socket = self.sockets.pop(name, None)
+        if sub_socket is None:
+            return
+        self.subscribers.pop(sub_socket, None)
+        self._unwatch(sub_socket)
+        self.retired.append(sub_socket)
+
+    def init_collector(self):
+        """
+        Initialize the fan-in telemetry socket: one manager-bound PULL socket that every
+        scraper connects to and pushes [unique_id, payload] (or [unique_id, topic, payload])
+        to, so receive_all polls a single socket whatever the number of scrapers.
+        It is bound to runtime_dir/telemetry.sock, or to a random loopback port chosen
+        by the bind itself.
+        The high-water mark applies per connected scraper, but unlike a SUB socket libzmq
+        never drops PUSH messages: a full queue blocks the scraper's send, or makes it
+        raise zmq.Again with NOBLOCK. Scrapers should send telemetry with NOBLOCK and
+        drop the message on zmq.Again, so a slow manager never stalls them.
+        :return: The address scrapers connect to.
+        """
+        pull_socket, address = self._bind(zmq.PULL, 'telemetry', self.subscriber_hwm)
+        self.sockets['collector'] = pull_socket
+        self.collector_address = address
+        self._watch(pull_socket)
+        return address
+
+    def init_data_collector(self, hwm=None):
+        """
+        Initialize the data socket: a manager-bound PULL socket scrapers push result
+        records to as [unique_id, payload], the payload holding one record or a list.
+        Unlike telemetry nothing is dropped: once `hwm` messages are queued scrapers
+        block in send until the manager reads again (see pause_records).
+        It is bound to runtime_dir/data.sock, or to a random loopback port.
+        :param hwm: The receive high-water mark, in messages.
+        :return: The address scrapers connect to.
+        """
+        pull_socket, address = self._bind(zmq.PULL, 'data', hwm)
+        self.sockets['data'] = pull_socket
+        self.data_address = address
+        self._watch(pull_socket)
+        return address
+
+    def init_service_router(self):
+        """
+        Create the ROUTER socket scrapers send service requests to (see services.py),
+        bound to runtime_dir/services.sock or to a random loopback port. The socket is
+        not registered in the poller nor closed by close(): it belongs to the thread
+        that serves it.
+        :return: The socket and the address scrapers connect to.
+        """
+        router_socket, address = self._bind(zmq.ROUTER, 'services')
+        self.services_address = address
+        return router_socket, address
+
+    def _bind(self, socket_type, name, hwm=None):
+        """Bind a socket to runtime_dir/<name>.sock, else to a random loopback port."""
+        sock = self.context.socket(socket_type)
+        if hwm is not None:
+            sock.setsockopt(zmq.RCVHWM, hwm)
+        address = self.new_endpoint(name) if self.runtime_dir else None
+        if address and address.startswith('ipc://'):
+            sock.bind(address)
+        else:
+            address = f"tcp://localhost:{sock.bind_to_random_port('tcp://127.0.0.1')}"
+        return sock, address
+
+    def receive_records(self, limit):
+        """
+        Read up to `limit` pending messages from the data socket without blocking.
+        :param limit: The maximum number of messages to read.
+        :return: A list of (name, payload) tuples.
+        """
+        data_socket = self.sockets.get('data')
+        if not data_socket:
+            raise ValueError("Data socket is not initialized.")
+
+        messages = []
+        while len(messages) < limit:
+            try:
+                frames = data_socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            if len(frames) >= 2:
+                messages.append((frames[0].decode('utf-8', errors='replace'), frames[-1]))
+        return messages
+
+    def pause_records(self, paused):
+        """
+        Stop or resume polling the data socket. While paused, pending records make
+        neither receive_all nor receive_all_async return.
+        :param paused: True to pause, False to resume.
+        """
+        data_socket = self.sockets.get('data')
+        if not data_socket or paused == self.records_paused:
+            return
+        if paused:
+            self._unwatch(data_socket)
+        else:
+            self._watch(data_socket)
+        self.records_paused = paused
+
+    def init_waker(self):
+        """
+        Initialize the wakeup socket, so other threads can interrupt a blocking receive_all.
+        """
+        self.wake_address = f"inproc://wakeup-{id(self)}"
+        wake_socket = self.context.socket(zmq.PULL)
+        wake_socket.bind(self.wake_address)
+        self.sockets['wakeup'] = wake_socket
+        self._watch(wake_socket)
+
+    def wake(self):
+        """
+        Interrupt a blocking receive_all. Safe to call from any thread.
+        """
+        if not self.wake_address:
+            raise ValueError("Wakeup socket is not initialized.")
+
+        push_socket = self.context.socket(zmq.PUSH)
+        push_socket.connect(self.wake_address)
+        push_socket.send(b'')
+        push_socket.close()
+
+    def watch_fd(self, fd):
+        """
+        Make receive_all return when a raw file descriptor becomes readable.
+        :param fd: The file descriptor to watch.
+        """
+        self._watch(fd)
+
+    def unwatch_fd(self, fd):
+        """
+        Stop watching a raw file descriptor.
+        :param fd: The file descriptor to stop watching.
+        """
+        self._unwatch(fd)
+
+    def _watch(self, item):
+        """Add a socket or fd to the poller, and to the event loop's readers once receive_all_async bound one."""
+        self.poller.register(item, zmq.POLLIN)
+        if self.async_loop is not None:
+            self._add_reader(item)
+
+    def _unwatch(self, item):
+        """Remove a socket or fd from the poller and the event loop's readers."""
+        self.poller.unregister(item)
+        fd = self.async_readers.pop(item, None)
+        if fd is not None:
+            self.async_loop.remove_reader(fd)
+
+    def _add_reader(self, item):
+        fd = item.getsockopt(zmq.FD) if isinstance(item, zmq.Socket) else item
+        self.async_readers[item] = fd
+        self.async_loop.add_reader(fd, self.async_ready.set)
 
     def init_requester(self, address):
         """
@@ -45,20 +302,49 @@ class IPC:
         rep_socket.bind(address)
         self.sockets['rep'] = rep_socket
 
+    def init_router(self, address):
+        """
+        Initialize the command router. Unlike a REP socket it serves any number of
+        REQ/DEALER clients and accepts pipelined requests, replying in any order.
+        :param address: The address to bind to.
+        """
+        router_socket = self.context.socket(zmq.ROUTER)
+        router_socket.bind(address)
+        self.sockets['router'] = router_socket
+
     def publish(self, message, topic=None):
         """
-        Send a message.
-        :param message: The message to send.
+        Send a message. With a topic it is sent as two frames, [topic, payload], so
+        subscribers filter on the topic frame inside libzmq.
+        :param message: The payload: bytes are sent as-is, str is UTF-8 encoded and anything else goes through the codec.
         :param topic: The topic for PUB mode (optional).
         """
         pub_socket = self.sockets.get('pub')
         if not pub_socket:
             raise ValueError("Publisher socket is not initialized.")
-        
+
+        if isinstance(message, str):
+            payload = message.encode('utf-8')
+        elif isinstance(message, bytes):
+            payload = message
+        else:
+            payload = self.codec.encode(message)
+
         if topic:
-            pub_socket.send_string(f"{topic} {message}")
+            pub_socket.send_multipart([topic.encode('utf-8'), payload])
         else:
-            pub_socket.send_string(message)
+            pub_socket.send(payload)
+
+    def decode(self, payload):
+        """
+        Decode a received payload. JSON text is always accepted, so scrapers that
+        publish plain JSON keep working whatever the configured wire format.
+        :param payload: The payload frame.
+        :return: The decoded object.
+        """
+        if payload.lstrip()[:1] in (b'{', b'['):
+            return json.loads(payload)
+        return self.codec.decode(payload)
 
     def receive_published(self, name, timeout=500):
         """
@@ -79,6 +365,117 @@ class IPC:
             return sub_socket.recv_string()
         return None
 
+    def receive_all(self, timeout=0, latest=False):
+        """
+        Drain every subscriber that has messages pending, in a single poll.
+        :param timeout: Timeout in milliseconds to wait for the first message or wakeup
+                        (0 returns immediately, None waits indefinitely).
+        :param latest: Coalesce: keep only the newest message of each subscriber.
+        :return: A list of (name, payload) tuples in the order they were read; the payload
+                 is the last frame of the message, so both [payload] and [topic, payload] work.
+                 With latest, a list of (name, payload, dropped) tuples, where dropped counts
+                 the older messages that were discarded unread.
+        """
+        if not self.poller.sockets:
+            if timeout:
+                time.sleep(timeout / 1000)
+            return []
+        return self._drain(dict(self.poller.poll(timeout)), latest)
+
+    async def receive_all_async(self, timeout=None, latest=False):
+        """
+        Awaitable receive_all, for use from an asyncio event loop.
+        :param timeout: Timeout in milliseconds to wait for the first message or wakeup (None waits indefinitely).
+        :param latest: Coalesce: keep only the newest message of each subscriber.
+        :return: The same tuples as receive_all.
+        """
+        if self.async_loop is None:
+            # Registered once: the readers follow the poller from here on, as subscribers come and go
+            self.async_loop = asyncio.get_running_loop()
+            self.async_ready = asyncio.Event()
+            for item, _ in self.poller.sockets:
+                self._add_reader(item)
+        deadline = None if timeout is None else time.monotonic() + timeout / 1000
+        while True:
+            # A zmq socket's fd only signals changes, so the sockets are checked after every wakeup
+            self.async_ready.clear()
+            socks = dict(self.poller.poll(0))
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if socks or (remaining is not None and remaining <= 0):
+                return self._drain(socks, latest)
+            try:
+                await asyncio.wait_for(self.async_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_async(self, items, timeout):
+        """Poll (socket or fd, flags) pairs through a zmq.asyncio poller without blocking the event loop."""
+        if not items:
+            await asyncio.sleep(timeout / 1000 if timeout is not None else 3600)
+            return {}
+        poller = zmq.asyncio.Poller()
+        for item, flags in items:
+            poller.register(item, flags)
+        return dict(await poller.poll(timeout))
+
+    def _drain(self, socks, latest=False):
+        """Read every pending message from the ready subscribers, discarding wakeups."""
+        while self.retired:
+            self.retired.pop().close(linger=0)
+        messages = []
+        wake_socket = self.sockets.get('wakeup')
+        if wake_socket is not None and socks.get(wake_socket, 0) & zmq.POLLIN:
+            while True:
+                try:
+                    wake_socket.recv(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+        collector = self.sockets.get('collector')
+        if collector is not None and socks.get(collector, 0) & zmq.POLLIN:
+            messages.extend(self._drain_collector(collector, latest))
+        for sub_socket, name in self.subscribers.items():
+            if not socks.get(sub_socket, 0) & zmq.POLLIN:
+                continue
+            if latest:
+                payload, received = None, 0
+                while True:
+                    try:
+                        payload = sub_socket.recv_multipart(zmq.NOBLOCK, copy=False)[-1]
+                    except zmq.Again:
+                        break
+                    received += 1
+                if received:
+                    messages.append((name, payload.bytes, received - 1))
+                continue
+            while True:
+                try:
+                    messages.append((name, sub_socket.recv_multipart(zmq.NOBLOCK)[-1]))
+                except zmq.Again:
+                    break
+        return messages
+
+    def _drain_collector(self, collector, latest):
+        """Read every pending fan-in message; the first frame names the scraper that sent it."""
+        messages = []
+        pending = {}
+        while True:
+            try:
+                frames = collector.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            if len(frames) < 2:
+                continue
+            name = frames[0].decode('utf-8', errors='replace')
+            if not latest:
+                messages.append((name, frames[-1]))
+            elif name in pending:
+                pending[name][0] = frames[-1]
+                pending[name][1] += 1
+            else:
+                pending[name] = [frames[-1], 0]
+        messages.extend((name, payload, dropped) for name, (payload, dropped) in pending.items())
+        return messages
+
     def send_request(self, name, message, timeout=5000):
         """
         Send a request and wait for a response.
@@ -119,6 +516,56 @@ class IPC:
             return rep_socket.recv_string()
         return None
 
+    def receive_commands(self, timeout=0):
+        """
+        Drain every request waiting on the router.
+        :param timeout: Timeout in milliseconds to wait for the first request (None waits indefinitely).
+        :return: A list of (envelope, payload) tuples; pass the envelope back to send_reply.
+        """
+        router_socket = self.sockets.get('router')
+        if not router_socket:
+            raise ValueError("Router socket is not initialized.")
+
+        if not router_socket.poll(timeout if timeout is not None else -1, zmq.POLLIN):
+            return []
+        return self._drain_commands(router_socket)
+
+    async def receive_commands_async(self, timeout=None):
+        """
+        Awaitable receive_commands, for use from an asyncio event loop.
+        :param timeout: Timeout in milliseconds to wait for the first request (None waits indefinitely).
+        :return: A list of (envelope, payload) tuples; pass the envelope back to send_reply.
+        """
+        router_socket = self.sockets.get('router')
+        if not router_socket:
+            raise ValueError("Router socket is not initialized.")
+
+        await self._poll_async([(router_socket, zmq.POLLIN)], timeout)
+        return self._drain_commands(router_socket)
+
+    def _drain_commands(self, router_socket):
+        """Read every pending request; the envelope is the routing id plus the empty delimiter REQ clients add."""
+        requests = []
+        while True:
+            try:
+                frames = router_socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            requests.append((frames[:-1], frames[-1]))
+        return requests
+
+    def send_reply(self, envelope, message):
+        """
+        Send a reply to a request read with receive_commands.
+        :param envelope: The envelope returned with the request.
+        :param message: The encoded reply.
+        """
+        router_socket = self.sockets.get('router')
+        if not router_socket:
+            raise ValueError("Router socket is not initialized.")
+
+        router_socket.send_multipart(envelope + [message])
+
     def send_response(self, message):
         """
         Send a response.
@@ -134,10 +581,48 @@ class IPC:
         """
         Close all sockets and terminate the context.
         """
-        for socket in self.sockets.values():
-            socket.close()
+        if self.async_loop is not None and not self.async_loop.is_closed():
+            for fd in self.async_readers.values():
+                self.async_loop.remove_reader(fd)
+        self.async_readers.clear()
+        for sock in self.sockets.values():
+            sock.close()
+        # Subscribers removed since the last receive: term() would wait for them forever
+        while self.retired:
+            self.retired.pop().close(linger=0)
         self.context.term()
+        if self.runtime_lock is not None:
+            shutil.rmtree(self.runtime_dir, ignore_errors=True)
+            os.unlink(self.runtime_dir + '.lock')
+            os.close(self.runtime_lock)
+            self.runtime_lock = None
         
+    def new_endpoint(self, name):
+        """
+        Return an address for a scraper to bind its telemetry publisher to.
+        With a runtime dir this is a Unix domain socket named after the scraper, which
+        no other process can take between allocation and bind; otherwise, or if the
+        path does not fit in sun_path, a free loopback TCP port.
+        :param name: The name/ID of the scraper, unique among running scrapers.
+        :return: The endpoint address.
+        """
+        if self.runtime_dir:
+            path = os.path.join(self.runtime_dir, f"{name}.sock")
+            if len(path.encode()) <= IPC_PATH_MAX:
+                return f"ipc://{path}"
+        return f"tcp://localhost:{self.get_free_port()}"
+
+    def release_endpoint(self, address):
+        """
+        Remove the socket file of an ipc:// endpoint once its scraper is gone.
+        :param address: An address returned by new_endpoint.
+        """
+        if address.startswith('ipc://'):
+            try:
+                os.unlink(address[len('ipc://'):])
+            except FileNotFoundError:
+                pass
+
     def get_free_port(self):
         """
         Get a free port.
@@ -2,19 +2,32 @@ from utils import Utils
 from configICD import Config
 
 from remoteManager import RemoteManager
+from asyncRemoteManager import AsyncRemoteManager
+
+CONFIG_PATH = "config.yaml"
 
 class MainApp:
     @staticmethod
     def start():
-        config_data = Utils.read_yaml("config.yaml")
+        config_data = Utils.read_yaml(CONFIG_PATH)
         if not config_data:
             print("Error reading config file")
             exit(1)
         
         config = Config.parse(config_data)
-        logger = Utils.setup_logging(config.log_path,config.log_level,config.log_console,config.log_file)
+        logger = Utils.setup_logging(
+            config.log_path, config.log_level, config.log_console, config.log_file,
+            async_logging=config.log_async,
+            max_bytes=config.log_max_bytes,
+            backup_count=config.log_backup_count,
+            rotate_when=config.log_rotate_when,
+            sample_every=config.log_sample_every
+        )
         logger.info("Starting Remote Manager")
-        remote_manager = RemoteManager(config)
+        if config.engine == 'asyncio':
+            remote_manager = AsyncRemoteManager(config, CONFIG_PATH)
+        else:
+            remote_manager = RemoteManager(config, CONFIG_PATH)
         remote_manager.start()
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""
+Pre-warmed scraper interpreter for the manager's worker pool.
+
+Started in a scraper's base_path with the same python as a cold launch. It
+imports the modules named by --preload, then waits for a single job on stdin,
+{"script": "main.py", "args": [...], "env": {...}}, and runs the script in-process exactly
+as `python main.py <args>` would. The worker exits without running anything
+if stdin is closed first, which happens when the manager shuts down. With
+--jobs-dir the job is first recorded as <jobs-dir>/<pid>.json, so that a
+restarted manager can tell the profile is running (see workerPool.find_jobs).
+"""
+import argparse
+import atexit
+import importlib
+import json
+import os
+import runpy
+import sys
+
+
+def record_job(jobs_dir, job):
+    path = os.path.join(jobs_dir, f"{os.getpid()}.json")
+    try:
+        with open(path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"poolWorker: failed to record the job in {jobs_dir}: {e}", file=sys.stderr)
+        return
+    atexit.register(forget_job, path)
+
+
+def forget_job(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warmed scraper interpreter")
+    parser.add_argument("--preload", default="", help="Comma separated modules to import while idle")
+    parser.add_argument("--jobs-dir", help="Directory to record the job in while it runs")
+    args = parser.parse_args()
+
+    # sys.path[0] is the manager's directory: its modules (utils, ipc, ...) must not shadow the scraper's
+    sys.path[0] = os.getcwd()
+    for name in filter(None, args.preload.split(",")):
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"poolWorker: failed to preload {name}: {e}", file=sys.stderr)
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    job = json.loads(line)
+    if args.jobs_dir:
+        record_job(args.jobs_dir, job)
+    sys.stdin = open(os.devnull)
+    os.environ.update(job.get("env", {}))
+    sys.argv = [job["script"]] + job["args"]
+    sys.path[0] = os.path.dirname(os.path.abspath(job["script"]))
+    runpy.run_path(job["script"], run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,32 @@
+from dataclasses import asdict
 from datetime import datetime
 import json
 
 class Profile:
     """Class representing a profile."""
-    def __init__(self, config_file, interval, last_exec, unique_id, publish_address, running):
+    def __init__(self, config_file, interval, last_exec, unique_id, publish_address, running, next_run=None,
+                 priority=0, base_path=None, limits=None):
         self.config_file = config_file
         self.interval = interval
         self.last_exec = last_exec
         self.unique_id = unique_id
         self.publish_address = publish_address
         self.running = running
+        self.next_run = next_run
+        self.priority = priority
+        self.base_path = base_path
+        self.limits = limits
+        self.queued_at = None
+        self.queue_position = None
+        self.last_queue_wait = None
+        self.last_outcome = None
+        self.last_duration = None
+        self.spawn_failures = 0
+
+    def __setattr__(self, name, value):
+        # Any attribute change invalidates the status fragment cached for this profile
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, 'revision', getattr(self, 'revision', 0) + 1)
 
     def to_dict(self):
         """Return a dictionary representation of the profile."""
@@ -19,7 +36,17 @@ class Profile:
             "last_exec": self.last_exec.isoformat() if self.last_exec else None,
             "unique_id": self.unique_id,
             "publish_address": self.publish_address,
-            "running": self.running
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "priority": self.priority,
+            "base_path": self.base_path,
+            "limits": asdict(self.limits) if self.limits else None,
+            "queued_at": self.queued_at.isoformat() if self.queued_at else None,
+            "queue_position": self.queue_position,
+            "last_queue_wait": self.last_queue_wait,
+            "last_outcome": self.last_outcome,
+            "last_duration": self.last_duration,
+            "spawn_failures": self.spawn_failures
         }
 
     def to_json(self):
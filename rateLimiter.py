@@ -0,0 +1,116 @@
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`.
+
+    Permits are reserved rather than waited for: a reservation may take the
+    bucket below zero, and the caller waits until the debt is repaid, so
+    every acquire is answered at once and requests stay spaced at `rate`.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.granted = 0
+        self.requests = 0
+        self.delayed = 0
+        self.denied = 0
+        self.total_delay = 0.0
+
+    def reserve(self, permits, max_delay=None):
+        """Reserve up to `burst` permits; return (granted, delay in seconds before using them).
+
+        When the delay would exceed `max_delay` nothing is granted and the
+        delay returned is when the first permit will be available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.requests += 1
+        permits = min(permits, self.burst)
+        delay = max(permits - self.tokens, 0) / self.rate
+        if max_delay is not None and delay > max_delay:
+            self.denied += 1
+            return 0, max(1 - self.tokens, 0) / self.rate
+        self.tokens -= permits
+        self.granted += permits
+        if delay:
+            self.delayed += 1
+            self.total_delay += delay
+        return permits, delay
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate), 2),
+            "granted": self.granted,
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "denied": self.denied,
+            "total_delay": round(self.total_delay, 3)
+        }
+
+
+class RateLimiter:
+    """Host-wide request rate limits per domain, shared by every scraper.
+
+    Each configured domain (and its subdomains) gets a token bucket; requests
+    to other domains are not limited. Served as the "rate" service (see
+    services.py): acquire takes {"domain" or "url", "permits": n, "max_delay"?}
+    and returns {"granted": k, "delay": seconds}. The scraper sleeps `delay`,
+    then sends its `granted` requests, asking for a batch at a time so that one
+    round trip covers several requests.
+    """
+    def __init__(self, limits):
+        self.buckets = {}
+        self.configure(limits)
+
+    def configure(self, limits):
+        """Apply {domain: RateLimit}, keeping the tokens of buckets whose limit did not change."""
+        buckets = {}
+        for domain, limit in limits.items():
+            domain = domain.lower()
+            bucket = self.buckets.get(domain)
+            if bucket is None or (bucket.rate, bucket.burst) != (limit.rate, limit.burst):
+                bucket = TokenBucket(limit.rate, limit.burst)
+            buckets[domain] = bucket
+        # Swapped in whole: requests are served from another thread
+        self.buckets = buckets
+
+    def handlers(self):
+        return {'acquire': self.acquire}
+
+    def domain(self, host):
+        """Return the configured domain `host` falls under, or None."""
+        buckets = self.buckets
+        if not buckets:
+            return None
+        parts = host.lower().rstrip('.').split('.')
+        for i in range(len(parts)):
+            candidate = '.'.join(parts[i:])
+            if candidate in buckets:
+                return candidate
+        return None
+
+    def acquire(self, data):
+        host = data.get('domain') or urlsplit(data.get('url') or '').hostname
+        if not host:
+            raise ValueError("A domain or url is required")
+        permits = int(data.get('permits', 1))
+        if permits < 1:
+            raise ValueError(f"Invalid permits {permits!r}, expected at least 1")
+        bucket = self.buckets.get(self.domain(host))
+        if bucket is None:
+            return {"granted": permits, "delay": 0}
+        granted, delay = bucket.reserve(permits, data.get('max_delay'))
+        return {"granted": granted, "delay": round(delay, 4)}
+
+    def stats(self):
+        return {domain: bucket.stats() for domain, bucket in self.buckets.items()}
+
+    def close(self):
+        pass
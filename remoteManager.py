@@ -1,24 +1,29 @@
 import threading
 import time
-import json
+from datetime import datetime
 from typing import Dict, Any
+from commandJournal import CommandJournal
 from configICD import Config
 from ScraperManager import ScraperManager
 from ipc import IPC
+from resources import find_processes
+from statusPublisher import StatusPublisher
 from utils import Utils
+from workerPool import find_jobs
 
 DELIMITER = "::"
 STATUS_UPDATE_INTERVAL = 1
+REPLAYABLE_COMMANDS = ('start_scraper',)  # stop_scraper ids do not survive a restart
 
 class RemoteManager:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, config_path: str = None):
         self.logger = Utils.get_logger()
         self.logger.info("Initializing RemoteManager")
         self.config = config
-        self.logger.debug(f"Configuration loaded: {config}")
-        self.manager = ScraperManager(config.base_path, config.profiles)
+        self.logger.debug("Configuration loaded: %s", config)
+        self.manager = ScraperManager(config, config_path)
         self.logger.debug("ScraperManager initialized")
-        self.ipc = IPC()
+        self.ipc = IPC(config.wire_format)
         
         try:
             publisher_address = f"tcp://{config.publish_host}:{config.publish_port}"
@@ -29,8 +34,36 @@ class RemoteManager:
             self.logger.info(f"Initializing IPC subscriber at {subscriber_address}")
             self.ipc.init_requester(subscriber_address)
             self.logger.info("IPC publisher and subscriber initialized successfully")
-            self.ipc.init_replier(response_address)
-            self.logger.info(f"Initializing IPC replier at {response_address}")
+            self.ipc.init_router(response_address)
+            self.logger.info(f"Initializing IPC command router at {response_address}")
+            self.status = StatusPublisher(self.ipc, config.status_keyframe_interval)
+            self.forwarded_telemetry = {}
+            self.command_handlers = {
+                'start_scraper': self.command_start_scraper,
+                'stop_scraper': self.command_stop_scraper,
+                'snapshot': self.command_snapshot,
+                'query_telemetry': self.command_query_telemetry,
+                'journal': self.command_journal
+            }
+            self.command_stats = {}
+            self.journal = CommandJournal(
+                config.journal_path,
+                config.journal_max_bytes,
+                config.journal_backup_count,
+                config.journal_flush_interval
+            )
+            self.replays = []
+            for record in self.journal.incomplete():
+                if not config.journal_replay or record.get('command') not in REPLAYABLE_COMMANDS:
+                    self.journal.abandon(record['seq'])
+                elif self.launched_before_crash(record):
+                    self.logger.warning(
+                        "Not replaying command %s #%d: %s may have been launched before the crash",
+                        record.get('command'), record['seq'], record.get('data')
+                    )
+                    self.journal.abandon(record['seq'])
+                else:
+                    self.replays.append(record)
         except Exception as e:
             self.logger.error(f"Failed to initialize IPC: {e}", exc_info=True)
             raise
@@ -39,74 +72,189 @@ class RemoteManager:
 
     def run_communication(self) -> None:
         self.logger.info("Starting communication thread")
+        for request, seq in self.pop_replays():
+            self.execute(request, replay_of=seq)
+        next_status = time.monotonic()
         while True:
             try:
-                start_time = time.time()
-                self.logger.debug("Executing send_status")
-                self.send_status()
-                self.logger.debug("Completed send_status")
-                
-                self.logger.debug("Executing poll_commands")
-                self.poll_commands()
-                self.logger.debug("Completed poll_commands")
-                
-                elapsed = time.time() - start_time
-                sleep_time = max(STATUS_UPDATE_INTERVAL , 0)
-                self.logger.info(f"Communication cycle completed in {elapsed:.2f} seconds, sleeping for {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
+                start_time = time.monotonic()
+                if start_time >= next_status:
+                    self.logger.debug("Executing send_status", extra={'per_cycle': True})
+                    self.send_status()
+                    self.logger.debug("Completed send_status", extra={'per_cycle': True})
+                    next_status = max(next_status + STATUS_UPDATE_INTERVAL, start_time)
+                    elapsed = time.monotonic() - start_time
+                    self.logger.info("Communication cycle completed in %.2f seconds, next in %.2f seconds",
+                                     elapsed, next_status - time.monotonic(), extra={'per_cycle': True})
+
+                # Commands are answered as soon as they arrive while waiting for the next status tick
+                self.poll_commands(max(int((next_status - time.monotonic()) * 1000), 0))
             except Exception as e:
                 self.logger.error(f"Error in communication thread: {e}", exc_info=True)
                 self.logger.debug("Sleeping for 1 second before retrying communication tasks")
                 time.sleep(1)
 
     def send_status(self) -> None:
-        scrapers_status = {scraper_id: json.loads(scraper.to_json()) for scraper_id, scraper in self.manager.scrapers.items()}
-        profiles_status = {profile_name: json.loads(profile.to_json()) for profile_name, profile in self.manager.config_profiles.items()}
-
         try:
-            scraper_status_message = 'scraper_status' + DELIMITER + json.dumps(scrapers_status)
-            self.logger.debug(f"Publishing scraper status message: {scraper_status_message}")
-            self.ipc.publish(scraper_status_message)
-            profiles_status_message = 'profiles_status' + DELIMITER + json.dumps(profiles_status)
-            
-            self.logger.debug(f"Publishing profiles status message: {profiles_status_message}")
-            self.ipc.publish(profiles_status_message)
-            
-            self.logger.info("Status messages published successfully")
+            # The snapshot is replaced, never mutated, by the manager thread
+            snapshot = self.manager.snapshot
+            published = self.status.tick({
+                'status.scraper': snapshot['scrapers'],
+                'status.profile': snapshot['profiles'],
+                'status': {'manager': snapshot['manager'], 'commands': {name: dict(stats) for name, stats in self.command_stats.items()}}
+            })
+            published += self.forward_telemetry(snapshot['telemetry'])
+            self.logger.info("Status messages published successfully (%d bytes)", published, extra={'per_cycle': True})
         except Exception as e:
             self.logger.error(f"Failed to publish status messages: {e}", exc_info=True)
 
-    def poll_commands(self) -> None:
-        self.logger.debug("Polling for incoming commands")
-        message = self.ipc.receive_request(timeout=500)
-        if message:
-            self.logger.debug(f"Received message: {message}")
-            try:
-                command, data = message.split(DELIMITER, 1)
-                self.logger.info(f"Received command: {command} with data: {data}")
-                with open("command.txt", "w") as f:
-                    f.writelines([command, data])
-                self.process_command(command, data)
-            except ValueError:
-                self.logger.error("Received malformed message", exc_info=True)
-        else:
-            self.logger.debug("No message received during polling")
-
-    def process_command(self, command: str, data: str) -> None:
-        self.logger.info(f"Processing command: {command} with data: {data}")
+    def forward_telemetry(self, telemetry) -> int:
+        """Republish the newest raw telemetry of each scraper on telemetry.<unique_id>.
+
+        telemetry maps each running scraper to (messages received, last payload).
+        """
+        published = 0
+        for unique_id, (received, payload) in telemetry.items():
+            if received and self.forwarded_telemetry.get(unique_id) != received:
+                self.forwarded_telemetry[unique_id] = received
+                self.ipc.publish(payload, topic=f"telemetry.{unique_id}")
+                published += len(payload)
+        for unique_id in [key for key in self.forwarded_telemetry if key not in telemetry]:
+            del self.forwarded_telemetry[unique_id]
+        return published
+
+    def poll_commands(self, timeout: int = 500) -> None:
+        self.logger.debug("Polling for incoming commands", extra={'per_cycle': True})
+        requests = self.ipc.receive_commands(timeout)
+        if not requests:
+            self.logger.debug("No message received during polling", extra={'per_cycle': True})
+        for envelope, payload in requests:
+            self.ipc.send_reply(envelope, self.handle_request(payload))
+
+    def handle_request(self, payload: bytes) -> bytes:
+        """Execute one request message and return the encoded reply.
+
+        A request is {"id": any, "command": str, "data": any} in the wire format,
+        a list of those (answered with a list, in order), or the legacy
+        "command::data" text. Each reply is {"id", "command", "ok", "result" or
+        "error", "latency_ms"}.
+        """
+        requests, batch = self.parse_request(payload)
+        replies = [self.execute(request) for request in requests]
+        return self.ipc.codec.encode(replies if batch else replies[0])
+
+    def parse_request(self, payload: bytes):
+        self.logger.debug("Received message: %r", payload[:200])
         try:
-            if command == 'start_scraper':
-                self.logger.debug(f"Starting scraper with data: {data}")
-                self.manager.start_scraper(data)
-                self.logger.info(f"Scraper '{data}' started successfully")
-            elif command == 'stop_scraper':
-                self.logger.debug(f"Stopping scraper with data: {data}")
-                self.manager.stop_scraper(data)
-                self.logger.info(f"Scraper '{data}' stopped successfully")
-            else:
-                self.logger.warning(f"Unknown command received: {command}")
+            decoded = self.ipc.decode(payload)
+        except ValueError:
+            command, _, data = payload.decode('utf-8', errors='replace').partition(DELIMITER)
+            decoded = {"command": command, "data": data}
+        batch = isinstance(decoded, list)
+        requests = decoded if batch else [decoded]
+        requests = [request if isinstance(request, dict) else {"command": None} for request in requests] or [{"command": None}]
+        for request in requests:
+            self.logger.info("Received command: %s with data: %s", request.get('command'), request.get('data'))
+        return requests, batch
+
+    def launched_before_crash(self, record: Dict[str, Any]) -> bool:
+        """Tell whether an unfinished start_scraper may have launched its profiles: a run was
+        recorded after the command arrived, or a process or pool worker of the profile is still running."""
+        data = record.get('data')
+        since = datetime.fromtimestamp(record.get('ts', 0))
+        for profile_name in data if isinstance(data, list) else [data]:
+            profile = self.manager.config_profiles.get(profile_name)
+            if profile is None:
+                continue
+            if self.manager.state.started_since(profile_name, since):
+                return True
+            if find_processes(profile.config_file) or find_jobs(self.manager.pool_jobs_dir, profile.config_file):
+                return True
+        return False
+
+    def pop_replays(self) -> list:
+        """Return the commands a crash left unfinished, as (request, seq) pairs to execute again."""
+        replays, self.replays = self.replays, []
+        for record in replays:
+            self.logger.warning("Replaying command %s #%d from the journal", record.get('command'), record['seq'])
+        return [({"id": record.get('id'), "command": record.get('command'), "data": record.get('data')}, record['seq']) for record in replays]
+
+    def execute(self, request: Dict[str, Any], replay_of: int = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        seq = self.journal.received(request, replay_of)
+        command = request.get('command')
+        reply = {"id": request.get('id'), "command": command}
+        try:
+            handler = self.command_handlers.get(command)
+            if handler is None:
+                raise ValueError(f"Unknown command: {command}")
+            reply["result"] = handler(request.get('data'))
+            reply["ok"] = True
         except Exception as e:
             self.logger.error(f"Error processing command '{command}': {e}", exc_info=True)
+            reply["ok"] = False
+            reply["error"] = str(e)
+        return self.finish_command(reply, started, seq)
+
+    def finish_command(self, reply: Dict[str, Any], started: float, seq: int) -> Dict[str, Any]:
+        latency = (time.perf_counter() - started) * 1000
+        reply["latency_ms"] = round(latency, 3)
+        self.journal.completed(seq, reply)
+        stats = self.command_stats.setdefault(str(reply["command"]), {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["errors"] += not reply["ok"]
+        stats["total_ms"] = round(stats["total_ms"] + latency, 3)
+        stats["max_ms"] = round(max(stats["max_ms"], latency), 3)
+        return reply
+
+    def call_manager(self, func, *args):
+        """Run a ScraperManager method on the manager thread, which owns scrapers and profiles."""
+        return self.manager.call(func, *args)
+
+    def command_start_scraper(self, data):
+        """Start one profile (or a list of profiles); returns the new scraper id(s)."""
+        unique_ids = self.call_manager(self.manager.start_profiles, data if isinstance(data, list) else [data])
+        return unique_ids if isinstance(data, list) else unique_ids[0]
+
+    def command_stop_scraper(self, data):
+        """Stop one scraper (or a list of scrapers) by id; returns the stopped id(s)."""
+        self.call_manager(self.manager.stop_scrapers, data if isinstance(data, list) else [data])
+        return data
+
+    def command_snapshot(self, data):
+        """Publish a keyframe of every status topic on the next tick."""
+        self.status.request_keyframe()
+        return True
+
+    def command_query_telemetry(self, data):
+        """Return the telemetry history of a scraper.
+
+        data is {"scraper": unique_id} or {"profile": name} (its latest scraper), plus
+        optional "resolution" ("raw", "1s", "1m" or "1h"), "fields", "since" (epoch
+        seconds), "rate" (add per-second rates, e.g. pages/sec) and "series"
+        ("telemetry", the default, or "resources" for the /proc samples).
+        """
+        if not isinstance(data, dict):
+            raise ValueError("query_telemetry expects an object")
+        return self.call_manager(
+            self.manager.query_telemetry,
+            data.get('scraper'),
+            data.get('profile'),
+            data.get('resolution', 'raw'),
+            data.get('fields'),
+            data.get('since'),
+            data.get('rate', False),
+            data.get('series', 'telemetry')
+        )
+
+    def command_journal(self, data):
+        """Return journaled command records, newest last.
+
+        data may hold "scraper" (a scraper id or profile name), "since" and
+        "until" (epoch seconds) and "limit" (default 100).
+        """
+        data = data if isinstance(data, dict) else {}
+        return self.journal.lookup(data.get('scraper'), data.get('since'), data.get('until'), data.get('limit', 100))
 
     def start(self) -> None:
         self.logger.info("Starting RemoteManager threads")
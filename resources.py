@@ -0,0 +1,126 @@
+import os
+import shutil
+import time
+from utils import Utils
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def read_process(pid):
+    """Return the resource usage of a process from /proc, or None if it is gone or /proc is unavailable.
+
+    cpu_time is user + system seconds; io counters are missing when /proc/<pid>/io
+    is not readable by the manager.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # The command name may contain spaces, the fields after it do not
+            fields = f.read().rsplit(b")", 1)[1].split()
+        usage = {
+            "cpu_time": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+            "threads": int(fields[17]),
+            "vms_bytes": int(fields[20]),
+            "rss_bytes": int(fields[21]) * PAGE_SIZE,
+            "fds": len(os.listdir(f"/proc/{pid}/fd"))
+        }
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    usage["rss_peak_bytes"] = int(line.split()[1]) * 1024
+                    break
+    except (OSError, IndexError, ValueError):
+        return None
+    try:
+        with open(f"/proc/{pid}/io", "rb") as f:
+            for line in f:
+                key, _, value = line.partition(b":")
+                if key in (b"read_bytes", b"write_bytes"):
+                    usage[key.decode()] = int(value)
+    except OSError:
+        pass
+    return usage
+
+
+def find_processes(argument):
+    """Return the pids whose command line has `argument` as one of its arguments (empty without /proc)."""
+    needle = os.fsencode(argument)
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                if needle in f.read().split(b"\0"):
+                    pids.append(int(entry))
+        except OSError:
+            continue
+    return pids
+
+
+class ResourceSampler:
+    """Samples one process and derives its CPU usage, in percent of one core, between samples."""
+    def __init__(self, pid):
+        self.pid = pid
+        self.last_cpu = None
+
+    def sample(self):
+        usage = read_process(self.pid)
+        if usage is None:
+            return None
+        now = time.monotonic()
+        if self.last_cpu is not None and now > self.last_cpu[0]:
+            usage["cpu_percent"] = round((usage["cpu_time"] - self.last_cpu[1]) / (now - self.last_cpu[0]) * 100, 1)
+        self.last_cpu = (now, usage["cpu_time"])
+        return usage
+
+
+def wrap_command(command, limits):
+    """Prefix a command with ionice when the limits ask for an I/O class and the tool is installed."""
+    if limits is None or limits.ionice_class is None:
+        return command
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        Utils.get_logger().warning("ionice is not installed, I/O priority limits are ignored")
+        return command
+    prefix = [ionice, "-c", str(limits.ionice_class)]
+    if limits.ionice_level is not None:
+        prefix += ["-n", str(limits.ionice_level)]
+    return prefix + command
+
+
+def apply_limits(pid, limits):
+    """Apply rlimits, niceness and cgroup placement to a freshly spawned process.
+
+    Limits are set from the manager right after the spawn rather than in a
+    preexec_fn, which is unsafe in a threaded parent. Failures are logged and
+    the scraper keeps running unconstrained by the failing limit.
+    """
+    if limits is None:
+        return
+    try:
+        if limits.memory_mb and resource is not None:
+            size = limits.memory_mb * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (size, size))
+        if limits.cpu_seconds and resource is not None:
+            # SIGXCPU at the soft limit, SIGKILL one second later
+            resource.prlimit(pid, resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 1))
+        if limits.nice:
+            os.setpriority(os.PRIO_PROCESS, pid, limits.nice)
+    except (OSError, ValueError) as e:
+        Utils.get_logger().warning("Failed to apply resource limits to pid %d: %s", pid, e)
+    if limits.cgroup:
+        try:
+            with open(os.path.join(limits.cgroup, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+        except OSError as e:
+            Utils.get_logger().warning("Failed to move pid %d to cgroup %s: %s", pid, limits.cgroup, e)
@@ -0,0 +1,270 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+EVICT_CHUNK = 100  # disk entries deleted per eviction query
+TOUCH_BATCH = 100  # memory hits whose disk access time is written in one update
+MAX_AGE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+DIRECTIVE = re.compile(r"(?:^|,)\s*([a-z-]+)", re.IGNORECASE)
+
+
+def _header(headers, name):
+    """Return a header value by case-insensitive name, or None."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _http_date(value):
+    """Return an HTTP date as a timestamp, or None if it is missing or invalid."""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class ResponseCache:
+    """HTTP response cache shared by every scraper, with a memory tier over a disk tier.
+
+    Entries are keyed by URL (or an explicit "key" when responses vary by
+    more than the URL). The memory tier is an LRU bounded by `memory_bytes`
+    of bodies; every stored entry is also written to a SQLite disk tier
+    bounded by `disk_bytes`, evicted by last access (memory hits included),
+    whose hits are promoted back to memory. Responses marked no-store or
+    private are not stored. An entry is fresh for the Cache-Control max-age
+    of its response, none with no-cache, else until its Expires date, else
+    `default_ttl` seconds. A stale entry carrying an ETag or Last-Modified
+    is still returned, marked not fresh, so the scraper can revalidate it
+    with a conditional request and report a 304 with revalidate.
+
+    Served as the "cache" service (see services.py). Bodies are bytes with
+    the msgpack wire format, or text when a scraper speaks JSON.
+    """
+    def __init__(self, path, memory_bytes=64 * 1024 * 1024, disk_bytes=1024 * 1024 * 1024, default_ttl=300):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self.default_ttl = default_ttl
+        self.memory = OrderedDict()  # key -> entry, least recently used first
+        self.memory_bytes = 0
+        self.touched = {}  # key -> time of its last memory hit, not yet written to the disk tier
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " entry TEXT NOT NULL,"
+            " body BLOB,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.disk_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.counters = dict.fromkeys(
+            ("memory_hits", "disk_hits", "misses", "stale", "revalidated", "stored", "memory_evictions", "disk_evictions"), 0
+        )
+
+    def handlers(self):
+        return {'get': self.get, 'put': self.put, 'revalidate': self.revalidate, 'delete': self.delete}
+
+    @staticmethod
+    def _key(data):
+        key = data.get('key') or data.get('url')
+        if not key:
+            raise ValueError("A url or key is required")
+        return key
+
+    def get(self, data):
+        """Return the cached response for {"url" or "key"} with a "fresh" flag, or None on a miss."""
+        key = self._key(data)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self._touch(key)
+            tier = "memory_hits"
+        else:
+            entry = self._load(key)
+            tier = "disk_hits"
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        fresh = entry["expires"] > time.time()
+        if not fresh and not (entry["etag"] or entry["last_modified"]):
+            self.counters["misses"] += 1
+            self.delete({"key": key})
+            return None
+        self.counters[tier if fresh else "stale"] += 1
+        if tier == "disk_hits":
+            self._remember(key, entry)
+        return dict(entry, fresh=fresh)
+
+    def put(self, data):
+        """Store {"url", "key"?, "status", "headers", "body", "ttl"?}; returns False when the response forbids storing."""
+        key = self._key(data)
+        headers = data.get('headers') or {}
+        cache_control = _header(headers, "cache-control") or ""
+        directives = {directive.lower() for directive in DIRECTIVE.findall(cache_control)}
+        if "no-store" in directives or "private" in directives:
+            return False
+        now = time.time()
+        ttl = data.get('ttl')
+        if ttl is None:
+            ttl = self._ttl(headers, cache_control, directives, now)
+        entry = {
+            "url": data.get('url'),
+            "status": data.get('status', 200),
+            "headers": headers,
+            "body": data.get('body'),
+            "etag": _header(headers, "etag"),
+            "last_modified": _header(headers, "last-modified"),
+            "stored": now,
+            "expires": now + ttl
+        }
+        self.delete({"key": key})
+        self._remember(key, entry)
+        self._save(key, entry, now)
+        self.counters["stored"] += 1
+        return True
+
+    def _ttl(self, headers, cache_control, directives, now):
+        """Return how long a response stays fresh: 0 with no-cache, else its max-age, else until Expires, else the default."""
+        if "no-cache" in directives:
+            return 0
+        # s-maxage applies to shared caches like this one, and overrides max-age
+        ages = {name.lower(): int(seconds) for name, seconds in MAX_AGE.findall(cache_control)}
+        if ages:
+            return ages.get("s-maxage", ages.get("max-age"))
+        expires = _header(headers, "expires")
+        if expires is not None:
+            # An invalid date, such as "0", means already expired
+            expires_at = _http_date(expires)
+            date = _http_date(_header(headers, "date")) or now
+            return max(expires_at - date, 0) if expires_at is not None else 0
+        return self.default_ttl
+
+    def revalidate(self, data):
+        """Mark {"url" or "key", "ttl"?} fresh again after the origin answered 304; returns False if it is not cached."""
+        key = self._key(data)
+        entry = self.memory.get(key) or self._load(key)
+        if entry is None:
+            return False
+        now = time.time()
+        entry["expires"] = now + (data.get('ttl') if data.get('ttl') is not None else self.default_ttl)
+        self._remember(key, entry)
+        self.conn.execute(
+            "UPDATE responses SET entry = ?, accessed = ? WHERE key = ?",
+            (json.dumps(self._metadata(entry)), now, key)
+        )
+        self.counters["revalidated"] += 1
+        return True
+
+    def delete(self, data):
+        """Drop {"url" or "key"} from both tiers."""
+        key = self._key(data)
+        entry = self.memory.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= self._size(entry)
+        self.touched.pop(key, None)
+        row = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.disk_bytes -= row[0]
+        return entry is not None or row is not None
+
+    @staticmethod
+    def _size(entry):
+        body = entry["body"]
+        return len(body) if isinstance(body, (bytes, str)) else 0
+
+    @staticmethod
+    def _metadata(entry):
+        """Return the disk tier's JSON column for an entry: everything but the body, which is stored as bytes."""
+        metadata = {name: value for name, value in entry.items() if name != "body"}
+        if isinstance(entry["body"], str):
+            metadata["text"] = True
+        return metadata
+
+    def _remember(self, key, entry):
+        """Put an entry in the memory tier, evicting the least recently used ones past the limit."""
+        size = self._size(entry)
+        if size > self.memory_limit:
+            return
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= self._size(previous)
+        self.memory[key] = entry
+        self.memory_bytes += size
+        while self.memory_bytes > self.memory_limit:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= self._size(evicted)
+            self.counters["memory_evictions"] += 1
+
+    def _touch(self, key):
+        """Record a memory hit, so that the disk tier does not evict the entries only memory serves."""
+        self.touched[key] = time.time()
+        if len(self.touched) >= TOUCH_BATCH:
+            self._write_touched()
+
+    def _write_touched(self):
+        if self.touched:
+            self.conn.executemany("UPDATE responses SET accessed = ? WHERE key = ?", [(t, key) for key, t in self.touched.items()])
+            self.touched = {}
+
+    def _load(self, key):
+        row = self.conn.execute("SELECT entry, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        entry = json.loads(row[0])
+        entry["body"] = row[1].decode() if entry.pop("text", False) else row[1]
+        return entry
+
+    def _save(self, key, entry, now):
+        body = entry["body"]
+        metadata = self._metadata(entry)
+        if isinstance(body, str):
+            body = body.encode()
+        size = len(body) if body is not None else 0
+        if size > self.disk_limit:
+            return
+        self.conn.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, json.dumps(metadata), body, size, now)
+        )
+        self.disk_bytes += size
+        if self.disk_bytes > self.disk_limit:
+            self._write_touched()
+        while self.disk_bytes > self.disk_limit:
+            rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT ?", (EVICT_CHUNK,)).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for evicted_key, evicted_size in rows:
+                if self.disk_bytes <= self.disk_limit:
+                    break
+                evicted.append((evicted_key,))
+                self.disk_bytes -= evicted_size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            self.counters["disk_evictions"] += len(evicted)
+
+    def stats(self):
+        requests = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["stale"] + self.counters["misses"]
+        return dict(
+            self.counters,
+            memory_entries=len(self.memory),
+            memory_bytes=self.memory_bytes,
+            disk_bytes=self.disk_bytes,
+            hit_ratio=round((self.counters["memory_hits"] + self.counters["disk_hits"]) / requests, 3) if requests else None
+        )
+
+    def close(self):
+        self._write_touched()
+        self.conn.close()
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import random
+from datetime import timedelta
+
+
+class Scheduler:
+    """Min-heap of profile deadlines.
+
+    Rescheduling a profile pushes a new entry and leaves the old one in the
+    heap; stale entries are skipped when they reach the top and the heap is
+    rebuilt once they outnumber the live ones. A profile's next run time is
+    kept on Profile.next_run, not read back from here.
+    """
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def schedule(self, profile_name, due):
+        """Set (or move) the next run of a profile."""
+        entry = (due, next(self._counter), profile_name)
+        self._entries[profile_name] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + 32:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def unschedule(self, profile_name):
+        """Remove a profile from the schedule."""
+        self._entries.pop(profile_name, None)
+
+    def pop_due(self, now):
+        """Remove and return the names of all profiles due at `now`, earliest first."""
+        due = []
+        while self._peek() is not None and self._heap[0][0] <= now:
+            _, _, profile_name = heapq.heappop(self._heap)
+            del self._entries[profile_name]
+            due.append(profile_name)
+        return due
+
+    def next_deadline(self):
+        """Return the earliest deadline, or None if nothing is scheduled."""
+        entry = self._peek()
+        return entry[0] if entry else None
+
+    def _peek(self):
+        while self._heap:
+            entry = self._heap[0]
+            if self._entries.get(entry[2]) is entry:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, profile_name):
+        return profile_name in self._entries
+
+
+class RunQueue:
+    """Priority queue of due profiles waiting for a launch slot.
+
+    Higher priorities launch first, ties go to the profile that has waited
+    longest. A profile appears at most once, so the queue is bounded by the
+    number of configured profiles.
+    """
+    def __init__(self, max_concurrent=0, max_per_base_path=0, stagger=0, jitter=0):
+        self.max_concurrent = max_concurrent
+        self.max_per_base_path = max_per_base_path
+        self.stagger = stagger
+        self.jitter = jitter
+        self.next_launch = None
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def push(self, profile_name, priority, now):
+        """Queue a profile unless it is already waiting."""
+        if profile_name in self._entries:
+            return
+        entry = (-priority, now, next(self._counter), profile_name)
+        self._entries[profile_name] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, profile_name):
+        """Drop a profile from the queue."""
+        entry = self._entries.pop(profile_name, None)
+        if entry is not None:
+            self._heap.remove(entry)
+            heapq.heapify(self._heap)
+
+    def queued_at(self, profile_name):
+        """Return when a profile was queued, or None if it is not waiting."""
+        entry = self._entries.get(profile_name)
+        return entry[1] if entry else None
+
+    def positions(self):
+        """Return a dict of profile name to 1-based launch position."""
+        return {entry[3]: position for position, entry in enumerate(sorted(self._heap), 1)}
+
+    def pop_ready(self, now, running, running_by_base_path, base_path_of):
+        """Remove and return the profiles that may launch now.
+
+        `running` is the total number of running scrapers, `running_by_base_path`
+        the count per base path and `base_path_of` maps a profile name to its
+        base path. A profile blocked by its base path limit does not hold back
+        the profiles behind it.
+        """
+        if self.next_launch is not None and now < self.next_launch:
+            return []
+
+        ready, blocked = [], []
+        running_by_base_path = dict(running_by_base_path)
+        while self._heap:
+            if self.max_concurrent and running >= self.max_concurrent:
+                break
+            entry = heapq.heappop(self._heap)
+            base_path = base_path_of(entry[3])
+            if self.max_per_base_path and running_by_base_path.get(base_path, 0) >= self.max_per_base_path:
+                blocked.append(entry)
+                continue
+            del self._entries[entry[3]]
+            ready.append(entry[3])
+            running += 1
+            running_by_base_path[base_path] = running_by_base_path.get(base_path, 0) + 1
+            if self.stagger or self.jitter:
+                self.next_launch = now + timedelta(seconds=self.stagger + random.uniform(0, self.jitter))
+                break
+
+        for entry in blocked:
+            heapq.heappush(self._heap, entry)
+        return ready
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, profile_name):
+        return profile_name in self._entries
@@ -1,55 +1,182 @@
 from datetime import datetime
+import asyncio
 import subprocess
 import json
+import os
+from resources import ResourceSampler, apply_limits, wrap_command
+
+STOP_TIMEOUT = 5  # seconds a scraper gets to exit after SIGTERM before it is killed
+DATA_ADDRESS_ENV = "SCRAPER_DATA_ADDRESS"  # where scrapers push result records, when the data sink is enabled
+SERVICES_ADDRESS_ENV = "SCRAPER_SERVICES_ADDRESS"  # where scrapers send service requests, when a service is enabled
 
 class Scraper:
     """Class representing a single scraper."""
-    def __init__(self, config_file, unique_id, profile_name, base_path, venv_python, ipc):
+    def __init__(self, config_file, unique_id, profile_name, base_path, venv_python, ipc, limits=None):
         self.config_file = config_file
         self.unique_id = unique_id
         self.profile_name = profile_name
         self.base_path = base_path
         self.venv_python = venv_python
         self.ipc = ipc
-        self.address = f"tcp://localhost:{self.ipc.get_free_port()}"
+        self.limits = limits
+        # With a fan-in collector the scraper connects to the manager instead of binding its own endpoint
+        self.fan_in = ipc.collector_address is not None
+        self.address = ipc.collector_address if self.fan_in else ipc.new_endpoint(unique_id)
         self.process = None
+        self.exit_fd = None
         self.last_started = None
+        self.last_finished = None
+        self.stopped = False
         self.monitoring_data = {}
+        self.telemetry_payload = None
+        self.telemetry_received = 0
+        self.telemetry_dropped = 0
+        self.resources = {}
+        self.sampler = None
+        self.launch_mode = None
+        self.startup_latency = None
+
+    def __setattr__(self, name, value):
+        # Any attribute change invalidates the status fragment cached for this scraper
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, 'revision', getattr(self, 'revision', 0) + 1)
 
-    def start(self):
-        """Start the scraper process."""
-        cmd = [
+    def command(self):
+        """Return the command line that runs the scraper."""
+        return [
             self.venv_python, "main.py",
             "-c", self.config_file,
             "-i", self.unique_id,
-            "-p", self.address
+            "--fan-in" if self.fan_in else "-p", self.address
         ]
-        self.process = subprocess.Popen(cmd, cwd=self.base_path)
-        self.last_started = datetime.now()
-        self.ipc.init_subscriber(self.unique_id, self.address)
+
+    def environment(self):
+        """Return the variables added to the scraper's environment: the addresses of the optional channels.
+
+        They are not passed as arguments, so scrapers that do not use them keep a valid command line.
+        """
+        env = {}
+        if self.ipc.data_address:
+            env[DATA_ADDRESS_ENV] = self.ipc.data_address
+        if self.ipc.services_address:
+            env[SERVICES_ADDRESS_ENV] = self.ipc.services_address
+        return env
+
+    def start(self, pool=None):
+        """Start the scraper process, on a warm worker from `pool` when one is ready."""
+        env = self.environment()
+        self.process = pool.run(self.base_path, self.command(), env) if pool else None
+        self.launch_mode = "cold" if self.process is None else "warm"
+        if self.process is None:
+            self.process = subprocess.Popen(
+                wrap_command(self.command(), self.limits), cwd=self.base_path, env=dict(os.environ, **env) if env else None
+            )
+        self.on_spawn()
+        if not self.fan_in:
+            self.ipc.init_subscriber(self.unique_id, self.address)
+        self.exit_fd = self._open_exit_fd(self.process.pid)
+        if self.exit_fd is not None:
+            self.ipc.watch_fd(self.exit_fd)
+        return self.process
+
+    async def start_async(self, pool=None):
+        """Start the scraper process from an asyncio event loop; exits are observed with wait_async."""
+        env = self.environment()
+        self.process = pool.run(self.base_path, self.command(), env) if pool else None
+        self.launch_mode = "cold" if self.process is None else "warm"
+        if self.process is None:
+            self.process = await asyncio.create_subprocess_exec(
+                *wrap_command(self.command(), self.limits), cwd=self.base_path, env=dict(os.environ, **env) if env else None
+            )
+        self.on_spawn()
+        if not self.fan_in:
+            self.ipc.init_subscriber(self.unique_id, self.address)
         return self.process
 
+    def on_spawn(self):
+        """Apply the resource limits to the new process and start accounting for it."""
+        self.last_started = datetime.now()
+        apply_limits(self.process.pid, self.limits)
+        self.sampler = ResourceSampler(self.process.pid)
+
+    def sample_resources(self):
+        """Refresh `resources` from /proc and return the new sample, or None if the process is gone."""
+        if self.sampler is None or self.poll() is not None:
+            return None
+        usage = self.sampler.sample()
+        if usage is not None:
+            self.resources = usage
+        return usage
+
+    def poll(self):
+        """Return the exit code of the process, or None while it is running."""
+        if isinstance(self.process, subprocess.Popen):
+            return self.process.poll()
+        return self.process.returncode
+
+    async def wait_async(self):
+        """Wait for the process started by start_async to exit and return its exit code."""
+        if isinstance(self.process, subprocess.Popen):
+            # Warm pool workers are plain Popen objects
+            return await asyncio.get_running_loop().run_in_executor(None, self.process.wait)
+        return await self.process.wait()
+
     def stop(self):
-        """Terminate the scraper process."""
-        if self.process:
+        """Terminate the scraper process, killing it if it ignores SIGTERM for STOP_TIMEOUT seconds."""
+        if self.process and self.poll() is None:
+            self.stopped = True
             self.process.terminate()
-            self.process.wait()
+            try:
+                self.process.wait(STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.release()
+
+    async def stop_async(self):
+        """Terminate a process started by start_async without blocking the event loop."""
+        if self.process and self.poll() is None:
+            self.stopped = True
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.wait_async(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.wait_async()
+        self.release()
+
+    def release(self):
+        """Release the resources held for an exited process."""
+        if self.exit_fd is not None:
+            self.ipc.unwatch_fd(self.exit_fd)
+            os.close(self.exit_fd)
+            self.exit_fd = None
+        if not self.fan_in:
+            self.ipc.release_endpoint(self.address)
+
+    @staticmethod
+    def _open_exit_fd(pid):
+        """Return a pidfd that becomes readable when the process exits, or None if unsupported."""
+        try:
+            return os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            return None
 
     def to_dict(self):
         """Return a dictionary representation of the scraper."""
         return {
             "unique_id": self.unique_id,
             "profile_name": self.profile_name,
-            "last_started": self.last_started,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
             "address": self.address,
-            "monitoring_data": self.monitoring_data
+            "monitoring_data": self.monitoring_data,
+            "resources": self.resources,
+            "telemetry_received": self.telemetry_received,
+            "telemetry_dropped": self.telemetry_dropped,
+            "launch_mode": self.launch_mode,
+            "startup_latency": self.startup_latency
         }
 
     def to_json(self):
         """Return a JSON representation of the scraper."""
-        def default(o):
-            if isinstance(o, datetime):
-                return o.isoformat()
-            raise TypeError(f'Object of type {o.__class__.__name__} is not JSON serializable')
-        
-        return json.dumps(self.to_dict(), default=default)
+        return json.dumps(self.to_dict())
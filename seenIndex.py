@@ -0,0 +1,197 @@
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import time
+
+LOOKUP_CHUNK = 500  # hashes per SELECT, under SQLite's bound parameter limit
+SAVE_EVERY = 10000  # new items between two saves of the Bloom filter
+
+
+def key_hash(key, namespace=None):
+    """Return the signed 64-bit hash an item key is stored under."""
+    data = str(key) if namespace is None else f"{namespace}\0{key}"
+    return int.from_bytes(hashlib.blake2b(data.encode(), digest_size=8).digest(), 'little', signed=True)
+
+
+class BloomFilter:
+    """Bit array telling whether a 64-bit hash was definitely never added, or maybe was."""
+    HEADER = struct.Struct("<QIQ")  # bits, hashes, items
+
+    def __init__(self, capacity, error_rate):
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.items = 0
+
+    def _positions(self, h):
+        # Double hashing over the two halves of the 64-bit hash
+        h &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, h):
+        for position in self._positions(h):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, h):
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self._positions(h))
+
+    def save(self, path):
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.HEADER.pack(self.bits, self.hashes, self.items))
+            f.write(self.array)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path, capacity, error_rate):
+        """Return the filter saved at `path`, or None if it is missing or was sized differently."""
+        bloom = cls(capacity, error_rate)
+        try:
+            with open(path, "rb") as f:
+                bits, hashes, items = cls.HEADER.unpack(f.read(cls.HEADER.size))
+                array = f.read()
+        except (OSError, struct.error):
+            return None
+        if (bits, hashes) != (bloom.bits, bloom.hashes) or len(array) != len(bloom.array):
+            return None
+        bloom.array = bytearray(array)
+        bloom.items = items
+        return bloom
+
+
+class SeenIndex:
+    """Index of the items scrapers already saw, shared across runs and profiles.
+
+    Items are keyed by a listing id or URL, optionally within a namespace,
+    and stored as 64-bit hashes in a SQLite table. A Bloom filter kept in
+    memory (and saved next to the database) answers most lookups of new
+    items without reading the disk; only its positives are confirmed in
+    SQLite. With `ttl_days`, items not seen again for that long count as
+    unseen, and are deleted at startup.
+
+    Served as the "seen" service (see services.py). Every method takes
+    {"keys": [...], "namespace": optional str}, or just the list of keys.
+    """
+    def __init__(self, path, capacity=1000000, error_rate=0.01, ttl_days=0):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.bloom_path = path + ".bloom"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl_days * 86400
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " hash INTEGER PRIMARY KEY,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+        expired = 0
+        if self.ttl:
+            expired = self.conn.execute("DELETE FROM seen WHERE last_seen < ?", (time.time() - self.ttl,)).rowcount
+        self.items = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self.bloom = None if expired else BloomFilter.load(self.bloom_path, capacity, error_rate)
+        if self.bloom is None or self.bloom.items != self.items:
+            self.rebuild()
+        self.unsaved = 0
+        self.checked = 0
+        self.bloom_rejected = 0
+        self.db_lookups = 0
+        self.hits = 0
+        self.added = 0
+
+    def rebuild(self):
+        """Recreate the Bloom filter from the table, after a crash lost its latest additions or items expired."""
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        for (h,) in self.conn.execute("SELECT hash FROM seen"):
+            self.bloom.add(h)
+        self.bloom.save(self.bloom_path)
+
+    def handlers(self):
+        return {'check': self.check, 'add': self.add, 'check_add': self.check_add}
+
+    @staticmethod
+    def _hashes(data):
+        if isinstance(data, dict):
+            keys, namespace = data.get('keys') or [], data.get('namespace')
+        else:
+            keys, namespace = data or [], None
+        return [key_hash(key, namespace) for key in keys]
+
+    def check(self, data):
+        """Return, for each key, whether it was already seen."""
+        return self._seen(self._hashes(data))
+
+    def add(self, data):
+        """Mark the keys as seen and return how many were new to the index."""
+        return self._add(self._hashes(data))
+
+    def check_add(self, data):
+        """Return, for each key, whether it was seen before this call, then mark them all as seen.
+
+        A key repeated within the call counts as seen from its second occurrence on.
+        """
+        hashes = self._hashes(data)
+        unique = list(dict.fromkeys(hashes))
+        seen = dict(zip(unique, self._seen(unique)))
+        self._add(unique)
+        result = []
+        for h in hashes:
+            result.append(seen[h])
+            seen[h] = True
+        return result
+
+    def _seen(self, hashes):
+        self.checked += len(hashes)
+        candidates = [h for h in hashes if h in self.bloom]
+        self.bloom_rejected += len(hashes) - len(candidates)
+        found = set()
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        for start in range(0, len(candidates), LOOKUP_CHUNK):
+            chunk = candidates[start:start + LOOKUP_CHUNK]
+            self.db_lookups += 1
+            found.update(h for (h,) in self.conn.execute(
+                f"SELECT hash FROM seen WHERE hash IN ({','.join('?' * len(chunk))}) AND last_seen >= ?",
+                chunk + [cutoff]
+            ))
+        self.hits += len(found)
+        return [h in found for h in hashes]
+
+    def _add(self, hashes):
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            new = self.conn.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?)", [(h, now, now) for h in hashes]).rowcount
+            if self.ttl and new < len(hashes):
+                self.conn.executemany("UPDATE seen SET last_seen = ? WHERE hash = ?", [(now, h) for h in hashes])
+        if new:
+            for h in hashes:
+                self.bloom.add(h)
+            self.items += new
+            self.added += new
+            self.unsaved += new
+            self.bloom.items = self.items
+            if self.unsaved >= SAVE_EVERY:
+                self.bloom.save(self.bloom_path)
+                self.unsaved = 0
+        return new
+
+    def stats(self):
+        return {
+            "items": self.items,
+            "checked": self.checked,
+            "bloom_rejected": self.bloom_rejected,
+            "db_lookups": self.db_lookups,
+            "hits": self.hits,
+            "added": self.added
+        }
+
+    def close(self):
+        self.bloom.save(self.bloom_path)
+        self.conn.close()
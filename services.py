@@ -0,0 +1,94 @@
+import atexit
+import threading
+import zmq
+from utils import Utils
+
+POLL_INTERVAL = 500  # milliseconds between two checks of the stop flag
+
+
+class ServiceHost:
+    """Serves the shared services scrapers query during a run, on its own thread.
+
+    Scrapers get the address in $SCRAPER_SERVICES_ADDRESS and send requests on a
+    REQ or DEALER socket: {"id": any, "service": str, "method": str, "data": any}
+    in the wire format (JSON is always accepted), or a list of those, answered
+    with a list in order. Each reply is {"id", "ok", "result" or "error"}.
+    Requests never touch the manager thread, so a slow lookup does not delay
+    scheduling and a busy manager loop does not delay scrapers.
+    """
+    def __init__(self, ipc):
+        self.ipc = ipc
+        self.services = {}  # name -> service object
+        self.handlers = {}  # (service, method) -> callable
+        self.requests = 0
+        self.errors = 0
+        self.stopping = False
+        self.thread = None
+        self.router, self.address = ipc.init_service_router()
+
+    def register(self, name, service):
+        """Expose `service`: its handlers() map method names to callables taking the request data."""
+        self.services[name] = service
+        for method, handler in service.handlers().items():
+            self.handlers[(name, method)] = handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="ServiceHost", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self.stopping:
+            if not self.router.poll(POLL_INTERVAL, zmq.POLLIN):
+                continue
+            while True:
+                try:
+                    frames = self.router.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                self.router.send_multipart(frames[:-1] + [self.handle(frames[-1])])
+        self.router.close(linger=0)
+
+    def handle(self, payload):
+        """Execute one request message and return the encoded reply."""
+        try:
+            request = self.ipc.decode(payload)
+        except ValueError as e:
+            self.errors += 1
+            return self.ipc.codec.encode({"id": None, "ok": False, "error": f"Invalid request: {e}"})
+        if isinstance(request, list):
+            return self.ipc.codec.encode([self.execute(item) for item in request])
+        return self.ipc.codec.encode(self.execute(request))
+
+    def execute(self, request):
+        self.requests += 1
+        request = request if isinstance(request, dict) else {}
+        reply = {"id": request.get('id')}
+        try:
+            handler = self.handlers.get((request.get('service'), request.get('method')))
+            if handler is None:
+                raise ValueError(f"Unknown service method: {request.get('service')}.{request.get('method')}")
+            reply["result"] = handler(request.get('data'))
+            reply["ok"] = True
+        except Exception as e:
+            self.errors += 1
+            Utils.get_logger().warning("Service request %s.%s failed: %s", request.get('service'), request.get('method'), e)
+            reply["ok"] = False
+            reply["error"] = str(e)
+        return reply
+
+    def stats(self):
+        """Return the request counters and every service's own stats()."""
+        stats = {"requests": self.requests, "errors": self.errors}
+        for name, service in self.services.items():
+            stats[name] = service.stats()
+        return stats
+
+    def close(self):
+        """Stop serving, then let every service persist its state."""
+        if self.thread is not None and self.thread.is_alive():
+            self.stopping = True
+            self.thread.join()
+        for service in self.services.values():
+            service.close()
+        self.services = {}
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+COMPACT_EVERY = 50  # finished runs between two compactions
+
+
+class StateStore:
+    """SQLite store of scraper runs, so schedules and run history survive restarts.
+
+    The database runs in WAL mode and every state transition is its own small
+    transaction, so a crash loses at most the transition being written. Only
+    the newest `history` runs of each profile are kept.
+    """
+    def __init__(self, path, history=100):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.history = history
+        self.finished_since_compaction = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " unique_id TEXT PRIMARY KEY,"
+            " profile TEXT NOT NULL,"
+            " started TEXT NOT NULL,"
+            " finished TEXT,"
+            " returncode INTEGER,"
+            " outcome TEXT,"
+            " duration REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS runs_profile ON runs (profile, started)")
+
+    def load(self):
+        """Return the latest run of each profile as {profile: {last_exec, last_outcome, last_duration}}.
+
+        Runs that were still going when the manager stopped are marked as interrupted.
+        """
+        with self.lock:
+            self.conn.execute("UPDATE runs SET outcome = 'interrupted' WHERE finished IS NULL AND outcome IS NULL")
+            rows = self.conn.execute(
+                "SELECT profile, started, finished, outcome, duration FROM runs AS r"
+                " WHERE started = (SELECT MAX(started) FROM runs WHERE profile = r.profile)"
+            ).fetchall()
+        return {row[0]: self._summary(row) for row in rows}
+
+    def last_run(self, profile_name):
+        """Return the latest run of one profile like load() does, or an empty dict if it never ran."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT profile, started, finished, outcome, duration FROM runs"
+                " WHERE profile = ? ORDER BY started DESC LIMIT 1",
+                (profile_name,)
+            ).fetchone()
+        return self._summary(row) if row else {}
+
+    def started_since(self, profile_name, since):
+        """Tell whether a run of the profile started at or after the datetime `since`."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM runs WHERE profile = ? AND started >= ? LIMIT 1",
+                (profile_name, since.isoformat())
+            ).fetchone()
+        return row is not None
+
+    @staticmethod
+    def _summary(row):
+        _, started, finished, outcome, duration = row
+        return {
+            "last_exec": datetime.fromisoformat(finished or started),
+            "last_outcome": outcome,
+            "last_duration": duration
+        }
+
+    def record_start(self, unique_id, profile_name, started):
+        """Record that a scraper started."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs (unique_id, profile, started) VALUES (?, ?, ?)",
+                (unique_id, profile_name, started.isoformat())
+            )
+
+    def record_finish(self, unique_id, finished, returncode, outcome, duration):
+        """Record how and when a scraper finished."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE runs SET finished = ?, returncode = ?, outcome = ?, duration = ? WHERE unique_id = ?",
+                (finished.isoformat(), returncode, outcome, duration, unique_id)
+            )
+            self.finished_since_compaction += 1
+            if self.finished_since_compaction >= COMPACT_EVERY:
+                self._compact()
+
+    def compact(self):
+        """Drop all but the newest `history` runs of each profile and truncate the WAL."""
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        self.finished_since_compaction = 0
+        self.conn.execute(
+            "DELETE FROM runs WHERE unique_id IN ("
+            " SELECT unique_id FROM ("
+            "  SELECT unique_id, ROW_NUMBER() OVER (PARTITION BY profile ORDER BY started DESC) AS rank FROM runs"
+            " ) WHERE rank > ?)",
+            (self.history,)
+        )
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Close the database."""
+        with self.lock:
+            self.conn.close()
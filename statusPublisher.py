@@ -0,0 +1,120 @@
+from collections import namedtuple
+
+_MISSING = object()
+
+
+class StatusEntry(namedtuple('StatusEntry', 'revision fields')):
+    """Status of one object captured at a given revision; never mutated once built."""
+    __slots__ = ()
+
+    def to_dict(self):
+        return self.fields
+
+
+class StatusPublisher:
+    """Publishes status as per-object topics carrying field-level deltas and periodic keyframes.
+
+    `tick` takes channels mapping a topic prefix to a dict of object id to an
+    object exposing `revision` and `to_dict()` (Scraper, Profile) or to a plain
+    dict of fields. Each object is published on its own topic,
+    `<prefix>.<object id>` (e.g. status.scraper.<unique_id>,
+    status.profile.<name>), as two frames: the topic and a payload in the IPC
+    wire format:
+
+        {"seq": n, "keyframe": true, "data": {field: value}}
+        {"seq": n, "keyframe": false, "changed": {field: value}}
+        {"seq": n, "removed": true}
+
+    Sequence numbers are per topic, so a subscriber filtering on a single
+    object can still detect gaps; it applies deltas while the sequence is
+    contiguous and otherwise waits for the next keyframe, which is sent every
+    `keyframe_interval` ticks or right after request_keyframe(). Subscribing
+    to a prefix such as "status." receives everything; since zmq matches
+    prefixes, a subscriber to status.profile.foo also receives
+    status.profile.foobar and should check the topic frame.
+
+    The last published fields and their encoding are cached per object and
+    only rebuilt when its revision changes, so a tick costs one to_dict and at
+    most one encode per changed object. Unchanged objects publish nothing and
+    new objects start with a keyframe.
+    """
+    def __init__(self, ipc, keyframe_interval=30):
+        self.ipc = ipc
+        self.keyframe_interval = keyframe_interval
+        self.cache = {}
+        self.sequence = {}
+        self.ticks = 0
+        self.keyframe_requested = True
+        self.keyframe_entry = ipc.codec.encode_entry("keyframe", ipc.codec.encode(True))
+
+    def request_keyframe(self):
+        """Send a full snapshot of every object on the next tick."""
+        self.keyframe_requested = True
+
+    def tick(self, channels):
+        """Publish one update for each channel and return the number of payload bytes published."""
+        keyframe = self.keyframe_requested or (self.keyframe_interval and self.ticks % self.keyframe_interval == 0)
+        self.keyframe_requested = False
+        self.ticks += 1
+        codec = self.ipc.codec
+        published = 0
+        for prefix, objects in channels.items():
+            cache = self.cache.setdefault(prefix, {})
+            changed, added, removed = self.refresh(cache, objects)
+            messages = []
+            for object_id in (cache if keyframe else added):
+                topic = f"{prefix}.{object_id}"
+                messages.append((topic, self.encode_keyframe(topic, cache[object_id])))
+            if not keyframe:
+                for object_id, delta in changed.items():
+                    topic = f"{prefix}.{object_id}"
+                    payload = {"seq": self.next_sequence(topic), "keyframe": False, "changed": delta}
+                    messages.append((topic, codec.encode(payload)))
+            for object_id in removed:
+                topic = f"{prefix}.{object_id}"
+                messages.append((topic, codec.encode({"seq": self.next_sequence(topic), "removed": True})))
+                del self.sequence[topic]
+            for topic, payload in messages:
+                self.ipc.publish(payload, topic=topic)
+                published += len(payload)
+        return published
+
+    @staticmethod
+    def refresh(cache, objects):
+        """Bring the cache up to date and return the changed fields per id, the added ids and the removed ids."""
+        changed, added = {}, set()
+        for object_id, obj in objects.items():
+            entry = cache.get(object_id)
+            revision = getattr(obj, 'revision', None)
+            if entry is not None and revision is not None and entry[0] == revision:
+                continue
+            fields = obj if isinstance(obj, dict) else obj.to_dict()
+            if entry is None:
+                added.add(object_id)
+            else:
+                before = entry[1]
+                delta = {key: value for key, value in fields.items() if before.get(key, _MISSING) != value}
+                if not delta:
+                    entry[0] = revision
+                    continue
+                changed[object_id] = delta
+            cache[object_id] = [revision, fields, None]
+        removed = [object_id for object_id in cache if object_id not in objects]
+        for object_id in removed:
+            del cache[object_id]
+        return changed, added, removed
+
+    def encode_keyframe(self, topic, entry):
+        """Build a keyframe payload around the cached encoding of an object's fields."""
+        codec = self.ipc.codec
+        if entry[2] is None:
+            entry[2] = codec.encode_entry("data", codec.encode(entry[1]))
+        return codec.join_map([
+            codec.encode_entry("seq", codec.encode(self.next_sequence(topic))),
+            self.keyframe_entry,
+            entry[2]
+        ])
+
+    def next_sequence(self, topic):
+        self.sequence[topic] = self.sequence.get(topic, 0) + 1
+        return self.sequence[topic]
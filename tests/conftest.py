@@ -0,0 +1,59 @@
+import json
+import os
+import socket
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to main.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from configICD import Config, ProfileConfig
+from utils import Utils
+
+FAKE_SCRAPER_DIR = os.path.join(ROOT, "benchmarks", "fake_scraper")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def logger():
+    # Log to the console only: the default setup writes under data/logs in the working directory
+    Utils.setup_logging(log_level="WARNING", console_logging=True, file_logging=False)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Return a factory of manager configurations running the benchmark fake scraper, with every path under tmp_path.
+
+    `profiles` are names, `scraper` the fake scraper's settings (see benchmarks/fake_scraper/main.py).
+    """
+    def make(profiles=("profile_0",), scraper=None, interval=24 * 60, **overrides):
+        settings_path = str(tmp_path / "fake.yaml")
+        with open(settings_path, "w") as f:
+            json.dump(scraper or {"rate": 50, "duration": 0.1}, f)
+        settings = dict(
+            profiles={name: ProfileConfig(settings_path, interval) for name in profiles},
+            base_path=FAKE_SCRAPER_DIR,
+            venv_python=sys.executable,
+            publish_host="127.0.0.1",
+            publish_port=free_port(),
+            response_port=free_port(),
+            request_port=free_port(),
+            log_console=False,
+            log_file=False,
+            state_path=str(tmp_path / "state.db"),
+            journal_path=str(tmp_path / "commands.jsonl"),
+            runtime_dir=str(tmp_path / "run"),
+            data_path=str(tmp_path / "data" / "records.db"),
+            seen_path=str(tmp_path / "data" / "seen.db"),
+            cache_path=str(tmp_path / "data" / "cache.db")
+        )
+        settings.update(overrides)
+        return Config(**settings)
+    return make
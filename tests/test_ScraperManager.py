@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import yaml
+
+from configICD import ProfileConfig
+from ScraperManager import SPAWN_RETRY_DELAY, ScraperManager
+
+
+@pytest.fixture
+def make_manager(make_config):
+    managers = []
+
+    def make(*args, **kwargs):
+        manager = ScraperManager(make_config(*args, **kwargs))
+        managers.append(manager)
+        return manager
+    yield make
+    for manager in managers:
+        for unique_id in list(manager.scrapers):
+            manager.stop_scraper(unique_id)
+        manager.state.close()
+        manager.ipc.close()
+
+
+def test_queue_positions_only_touch_profiles_whose_position_changed(make_manager):
+    manager = make_manager(["a", "b"], max_concurrent=1)
+    manager.run_queue.max_concurrent = 0
+    manager.run_queue.push("a", 0, manager.config_profiles["a"].next_run)
+    revisions = {name: profile.revision for name, profile in manager.config_profiles.items()}
+    manager.update_queue_positions()
+    assert manager.config_profiles["a"].queue_position == 1
+    assert manager.config_profiles["a"].revision == revisions["a"] + 1
+    assert manager.config_profiles["b"].revision == revisions["b"]
+    manager.update_queue_positions()
+    assert manager.config_profiles["a"].revision == revisions["a"] + 1
+
+
+def test_snapshot_reuses_the_entries_of_unchanged_objects(make_manager):
+    manager = make_manager(["a", "b"])
+    before = manager.snapshot["profiles"]
+    manager.config_profiles["b"].priority = 3
+    manager.refresh_snapshot()
+    after = manager.snapshot["profiles"]
+    assert after["a"] is before["a"]
+    assert after["b"] is not before["b"] and after["b"].fields["priority"] == 3
+
+
+def test_coalesced_telemetry_counts_the_skipped_messages(make_manager):
+    manager = make_manager(["a"])
+    scraper = manager.create_scraper("a")
+    scraper.last_started = datetime.now()
+    manager.register_scraper(scraper)
+    manager.update_monitoring_data(scraper.unique_id, b'{"pages": 10}', dropped=3)
+    manager.update_monitoring_data(scraper.unique_id, b'{"pages": 12}')
+    assert (scraper.telemetry_received, scraper.telemetry_dropped, manager.telemetry_dropped) == (2, 3, 3)
+    assert scraper.monitoring_data == {"pages": 12}
+    assert manager.query_telemetry(scraper.unique_id)["fields"]["pages"]["value"] == [10.0, 12.0]
+    manager.scrapers.pop(scraper.unique_id).release()
+
+
+def test_fan_in_telemetry_reaches_the_manager(make_manager):
+    manager = make_manager(["a"], telemetry_fan_in=True, scraper={"rate": 50, "duration": 2})
+    [unique_id] = manager.start_profiles(["a"])
+    scraper = manager.scrapers[unique_id]
+    assert scraper.fan_in
+    deadline = time.monotonic() + 10
+    while scraper.telemetry_received < 2 and time.monotonic() < deadline:
+        manager.receive_monitoring_data(100)
+    assert scraper.telemetry_received >= 2
+    assert "pages_scraped" in scraper.monitoring_data
+
+
+def serve_calls(manager, thread):
+    """Play the manager thread: wait for wakeups and run queued calls until `thread` is done."""
+    deadline = time.monotonic() + 10
+    while thread.is_alive() and time.monotonic() < deadline:
+        manager.receive_monitoring_data(1000)
+        manager.run_calls()
+    thread.join()
+
+
+def test_calls_from_other_threads_run_on_the_manager_thread(make_manager):
+    manager = make_manager(["a"])
+    results = {}
+
+    def client():
+        started = time.monotonic()
+        results["thread"] = manager.call(lambda: threading.current_thread())
+        try:
+            manager.call(manager.start_profiles, ["missing"])
+        except ValueError as e:
+            results["error"] = str(e)
+        results["elapsed"] = time.monotonic() - started
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    serve_calls(manager, thread)
+    assert results.pop("thread") is threading.current_thread()
+    assert results.pop("error") == "Unknown profile: missing"
+    # Each call woke the manager out of its 1 s receive
+    assert results.pop("elapsed") < 0.9
+
+
+def test_start_and_stop_requests_are_checked_as_a_whole(make_manager):
+    manager = make_manager(["a", "b"])
+    with pytest.raises(ValueError, match="Duplicate profiles"):
+        manager.start_profiles(["a", "a"])
+    with pytest.raises(ValueError, match="Unknown profile"):
+        manager.start_profiles(["a", "missing"])
+    assert manager.scrapers == {}
+    [unique_id] = manager.start_profiles(["a"])
+    with pytest.raises(ValueError, match="Profile already running"):
+        manager.start_profiles(["b", "a"])
+    assert list(manager.scrapers) == [unique_id]
+    with pytest.raises(ValueError, match="Unknown scraper"):
+        manager.stop_scrapers([unique_id, "missing"])
+    assert manager.stop_scrapers([unique_id]) == [unique_id]
+    assert manager.scrapers == {}
+
+
+def test_apply_profiles_adds_updates_and_removes(make_manager):
+    manager = make_manager(["a", "b", "c"])
+    settings = manager.config_profiles["a"].config_file
+    manager.config_profiles["b"].last_exec = datetime(2026, 1, 1)
+    added, removed, updated = manager.apply_profiles({
+        "b": ProfileConfig(settings, 60, priority=5),
+        "c": ProfileConfig(settings, 24 * 60),
+        "d": ProfileConfig(settings, 30)
+    })
+    assert (added, removed, updated) == (["d"], ["a"], ["b"])
+    assert set(manager.config_profiles) == {"b", "c", "d"}
+    assert manager.config_profiles["b"].priority == 5
+    assert manager.config_profiles["b"].next_run == datetime(2026, 1, 1, 1, 0)
+    assert "a" not in manager.scheduler and "d" in manager.scheduler
+
+
+def test_running_profiles_are_removed_once_their_scraper_finishes(make_manager):
+    manager = make_manager(["a", "b"])
+    settings = manager.config_profiles["a"].config_file
+    [unique_id] = manager.start_profiles(["a"])
+    assert manager.apply_profiles({"b": ProfileConfig(settings, 24 * 60)}) == ([], ["a"], [])
+    assert "a" in manager.config_profiles
+    # Removed only once: a second reload does not report it again
+    assert manager.apply_profiles({"b": ProfileConfig(settings, 24 * 60)}) == ([], [], [])
+    manager.stop_scraper(unique_id)
+    assert "a" not in manager.config_profiles and manager.removed_profiles == set()
+
+
+def test_a_profile_added_back_while_running_is_kept(make_manager):
+    manager = make_manager(["a"])
+    settings = manager.config_profiles["a"].config_file
+    [unique_id] = manager.start_profiles(["a"])
+    manager.apply_profiles({})
+    manager.apply_profiles({"a": ProfileConfig(settings, 24 * 60)})
+    manager.stop_scraper(unique_id)
+    assert "a" in manager.config_profiles
+    assert manager.config_profiles["a"].next_run is not None
+
+
+def test_a_failed_spawn_does_not_drop_the_other_ready_profiles(make_manager, tmp_path):
+    manager = make_manager(["a", "b"])
+    a = manager.config_profiles["a"]
+    a.base_path = str(tmp_path / "missing")
+    a.priority = 1  # launched first
+    manager.check_and_start_scrapers()
+    assert [scraper.profile_name for scraper in manager.scrapers.values()] == ["b"]
+    assert not a.running and a.queued_at is None and "a" not in manager.run_queue
+    assert a.spawn_failures == 1 and "a" in manager.scheduler
+    first_delay = (a.next_run - datetime.now()).total_seconds()
+    assert 0 < first_delay <= SPAWN_RETRY_DELAY
+    # Each failure doubles the delay before the next attempt
+    manager.scheduler.schedule("a", datetime.now())
+    manager.check_and_start_scrapers()
+    assert a.spawn_failures == 2
+    assert (a.next_run - datetime.now()).total_seconds() > SPAWN_RETRY_DELAY
+    a.base_path = manager.config_profiles["b"].base_path
+    manager.scheduler.schedule("a", datetime.now())
+    manager.check_and_start_scrapers()
+    assert a.running and a.spawn_failures == 0
+
+
+def test_profiles_left_unlaunched_go_back_to_the_run_queue(make_manager):
+    manager = make_manager(["a", "b"])
+    launches = manager.ready_launches()
+    assert next(launches) == "a"
+    launches.close()
+    assert "b" in manager.run_queue and manager.config_profiles["b"].queue_position == 1
+    assert manager.pop_ready_profiles() == ["b"]
+
+
+def test_a_reloaded_profile_that_fails_to_spawn_is_retried_later(make_config, tmp_path):
+    config = make_config(["a"])
+    config_path = str(tmp_path / "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config.to_dict(), f)
+    manager = ScraperManager(config, config_path)
+    try:
+        manager.config_profiles["a"].last_exec = datetime.now()
+        manager.schedule_profile("a")
+        config.profiles["b"] = ProfileConfig(config.profiles["a"].config_file, 60, base_path=str(tmp_path / "missing"))
+        with open(config_path + ".tmp", "w") as f:
+            yaml.safe_dump(config.to_dict(), f)
+        os.replace(config_path + ".tmp", config_path)
+        manager.check_config()
+        assert "b" in manager.config_profiles
+        manager.check_and_start_scrapers()
+        b = manager.config_profiles["b"]
+        assert manager.scrapers == {} and not b.running
+        assert b.spawn_failures == 1 and b.next_run > datetime.now() and "b" in manager.scheduler
+        assert "a" in manager.scheduler
+    finally:
+        manager.config_watcher.close()
+        manager.state.close()
+        manager.ipc.close()
+
+
+def test_a_start_request_is_undone_when_a_later_spawn_fails(make_manager, tmp_path):
+    manager = make_manager(["a", "b"])
+    manager.config_profiles["b"].base_path = str(tmp_path / "missing")
+    with pytest.raises(OSError):
+        manager.start_profiles(["a", "b"])
+    assert manager.scrapers == {}
+    assert not manager.config_profiles["a"].running and manager.config_profiles["a"].last_outcome == "stopped"
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import zmq
+import zmq.asyncio
+
+from asyncRemoteManager import AsyncRemoteManager
+
+
+async def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def close(remote):
+    remote.journal.close()
+    remote.manager.state.close()
+    remote.ipc.close()
+    remote.manager.ipc.close()
+
+
+def test_supervises_scrapers_and_serves_commands_from_one_loop(make_config):
+    remote = AsyncRemoteManager(make_config(["due"], scraper={"rate": 50, "duration": 0.3}))
+
+    async def scenario():
+        run = asyncio.create_task(remote.run())
+        context = zmq.asyncio.Context()
+        client = context.socket(zmq.DEALER)
+        client.connect(f"tcp://127.0.0.1:{remote.config.response_port}")
+        try:
+            due = remote.manager.config_profiles["due"]
+            await wait_for(lambda: due.last_outcome == "success")
+            assert remote.manager.scrapers == {}
+            assert due.next_run > due.last_exec
+
+            await client.send_multipart([b"", json.dumps([
+                {"id": 1, "command": "stop_scraper", "data": "unknown"},
+                {"id": 2, "command": "snapshot"}
+            ]).encode()])
+            replies = json.loads((await asyncio.wait_for(client.recv_multipart(), 5))[-1])
+            assert [(reply["id"], reply["ok"]) for reply in replies] == [(1, False), (2, True)]
+            assert "Unknown scraper" in replies[0]["error"]
+        finally:
+            run.cancel()
+            client.close(linger=0)
+            context.term()
+
+    asyncio.run(scenario())
+    close(remote)
+
+
+def test_a_failed_spawn_leaves_the_supervisor_and_status_running(make_config, tmp_path):
+    remote = AsyncRemoteManager(make_config(["broken", "ok"], scraper={"rate": 50, "duration": 0.3}))
+    broken, ok = remote.manager.config_profiles["broken"], remote.manager.config_profiles["ok"]
+    broken.base_path = str(tmp_path / "missing")
+    broken.priority = 1  # launched first
+    refresh = remote.manager.refresh_snapshot
+    failures = []
+
+    def failing_once():
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("snapshot failed")
+        refresh()
+
+    remote.manager.refresh_snapshot = failing_once
+
+    async def scenario():
+        run = asyncio.create_task(remote.run())
+        try:
+            await wait_for(lambda: ok.last_outcome == "success")
+            assert broken.spawn_failures == 1 and not broken.running
+            assert broken.next_run > datetime.now()
+            # The status task outlived its failed tick
+            await wait_for(lambda: remote.manager.snapshot["profiles"]["ok"].revision == ok.revision)
+        finally:
+            run.cancel()
+
+    asyncio.run(scenario())
+    close(remote)
+
+
+def test_a_start_command_is_undone_when_a_later_spawn_fails(make_config, tmp_path):
+    remote = AsyncRemoteManager(make_config(["a", "b"], scraper={"rate": 50, "duration": 5}))
+    remote.manager.config_profiles["b"].base_path = str(tmp_path / "missing")
+
+    async def scenario():
+        remote.wake_event = asyncio.Event()
+        remote.exit_watchers = set()
+        reply = await remote.execute_async({"id": 1, "command": "start_scraper", "data": ["a", "b"]})
+        assert not reply["ok"]
+        assert remote.manager.scrapers == {}
+        assert remote.manager.config_profiles["a"].last_outcome == "stopped"
+
+    asyncio.run(scenario())
+    close(remote)
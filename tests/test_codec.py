@@ -0,0 +1,47 @@
+import pytest
+
+import codec
+from codec import JsonCodec, get_codec
+
+SAMPLE = {"seq": 3, "keyframe": False, "changed": {"running": True, "pages": [1, 2.5, None], "name": "café"}}
+
+
+@pytest.fixture(params=["json", "msgpack"])
+def wire_codec(request):
+    if request.param == "msgpack":
+        pytest.importorskip("msgpack")
+    return get_codec(request.param)
+
+
+def encode_map(wire_codec, data):
+    """Build a map the way StatusPublisher does, from separately encoded values."""
+    return wire_codec.join_map([wire_codec.encode_entry(key, wire_codec.encode(value)) for key, value in data.items()])
+
+
+def test_round_trip(wire_codec):
+    assert wire_codec.decode(wire_codec.encode(SAMPLE)) == SAMPLE
+
+
+def test_joined_entries_match_encoding_the_dict(wire_codec):
+    assert wire_codec.decode(encode_map(wire_codec, SAMPLE)) == SAMPLE
+    assert wire_codec.decode(wire_codec.join_map([])) == {}
+
+
+def test_large_maps_get_the_right_header(wire_codec):
+    data = {f"k{i}": i for i in range(70000)}
+    assert wire_codec.decode(encode_map(wire_codec, data)) == data
+
+
+def test_json_entries_are_plain_json():
+    assert encode_map(JsonCodec(), {"a": 1, "b": "x"}) == b'{"a": 1, "b": "x"}'
+
+
+def test_unknown_wire_format():
+    with pytest.raises(ValueError):
+        get_codec("xml")
+
+
+def test_msgpack_without_the_package(monkeypatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+    with pytest.raises(ValueError, match="requires the msgpack package"):
+        get_codec("msgpack")
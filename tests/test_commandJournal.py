@@ -0,0 +1,107 @@
+import json
+import time
+
+import pytest
+
+from commandJournal import CommandJournal
+
+
+@pytest.fixture
+def open_journal(tmp_path):
+    journals = []
+
+    def make(**kwargs):
+        kwargs.setdefault("flush_interval", 0)
+        journal = CommandJournal(str(tmp_path / "commands.jsonl"), **kwargs)
+        journals.append(journal)
+        return journal
+    yield make
+    for journal in journals:
+        journal.close()
+
+
+def run(journal, command, data, result=None, ok=True):
+    seq = journal.received({"id": None, "command": command, "data": data})
+    journal.completed(seq, {"command": command, "ok": ok, "result": result, "latency_ms": 1.0})
+    return seq
+
+
+def test_lookup_by_scraper_profile_and_time(open_journal):
+    journal = open_journal()
+    run(journal, "start_scraper", "a", result="id-1")
+    run(journal, "query_telemetry", {"profile": "b", "fields": ["pages"]})
+    middle = time.time()
+    run(journal, "stop_scraper", ["id-1"], result=["id-1"])
+    # Queued records are answered from memory, written ones from disk
+    queued = [(record["phase"], record["command"]) for record in journal.lookup("id-1")]
+    journal.flush()
+    assert [(record["phase"], record["command"]) for record in journal.lookup("id-1")] == queued == [
+        ("completed", "start_scraper"), ("received", "stop_scraper"), ("completed", "stop_scraper")
+    ]
+    assert [record["phase"] for record in journal.lookup("b")] == ["received"]
+    assert [record["command"] for record in journal.lookup(since=middle)] == ["stop_scraper"] * 2
+    assert len(journal.lookup(limit=3)) == 3 and journal.lookup(limit=1)[0]["phase"] == "completed"
+
+
+def test_segments_rotate_and_expire(open_journal, tmp_path):
+    journal = open_journal(max_bytes=300, backup_count=1)
+    for i in range(10):
+        run(journal, "start_scraper", f"profile_{i}", result=f"id-{i}")
+        journal.flush()
+    segments = sorted(path.name for path in tmp_path.glob("commands.*.jsonl"))
+    assert len(segments) == 2 and journal.segments == [int(name.split(".")[1]) for name in segments]
+    assert journal.lookup("profile_0") == []
+    assert [record["data"] for record in journal.lookup("profile_9")] == ["profile_9"]
+    assert all(position[1] in journal.segments for position in journal.by_time)
+
+
+def test_unfinished_commands_are_replayed_once(open_journal):
+    journal = open_journal()
+    run(journal, "start_scraper", "a", result="id-1")
+    unfinished = journal.received({"id": 7, "command": "start_scraper", "data": "b"})
+    abandoned = journal.received({"id": 8, "command": "stop_scraper", "data": "id-1"})
+    journal.close()
+    journal = open_journal()
+    assert [(record["seq"], record["id"]) for record in journal.incomplete()] == [(unfinished, 7), (abandoned, 8)]
+    journal.abandon(abandoned)
+    replay = journal.received({"id": 7, "command": "start_scraper", "data": "b"}, replay_of=unfinished)
+    assert replay > abandoned
+    # The replay stands in for the original: once it completes nothing is left to replay
+    journal.completed(replay, {"command": "start_scraper", "ok": True, "result": "id-2"})
+    journal.close()
+    assert open_journal().incomplete() == []
+
+
+def test_a_line_cut_short_by_a_crash_is_skipped(open_journal, tmp_path):
+    journal = open_journal()
+    run(journal, "start_scraper", "a")
+    journal.close()
+    with open(tmp_path / "commands.000001.jsonl", "ab") as f:
+        f.write(b'{"seq": 3, "phase": "rece')
+    journal = open_journal()
+    run(journal, "start_scraper", "b")
+    journal.flush()
+    assert [record["data"] for record in journal.lookup(since=0) if record["phase"] == "received"] == ["a", "b"]
+
+
+def test_the_writer_survives_failed_writes(open_journal, tmp_path):
+    journal = open_journal()
+    write = journal._write
+
+    def failing_write(record):
+        # Half a line reaches the file before the disk fills up
+        journal.file.write(json.dumps(record).encode()[:10])
+        raise OSError(28, "No space left on device")
+
+    journal._write = failing_write
+    run(journal, "start_scraper", "lost")
+    journal.flush(timeout=5)
+    assert journal.writer.is_alive() and not journal.unwritten
+    journal._write = write
+    run(journal, "start_scraper", "kept", result="id-2")
+    journal.flush()
+    assert [record["phase"] for record in journal.lookup("kept") + journal.lookup("id-2")] == ["received", "completed"]
+    assert journal.lookup("lost") == []
+    journal.close()
+    reopened = open_journal()
+    assert [record["data"] for record in reopened.lookup(since=0) if record["phase"] == "received"] == ["kept"]
@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+import yaml
+
+import configWatcher
+from configICD import ProfileConfig
+from configWatcher import ConfigWatcher
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return str(tmp_path / "config.yaml")
+
+
+def write(path, config, mode="w"):
+    # Replaced by a rename, as editors and deploy tools do
+    with open(path + ".tmp", mode) as f:
+        f.write(config if isinstance(config, str) else yaml.safe_dump(config.to_dict()))
+    os.replace(path + ".tmp", path)
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watch(request, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(configWatcher, "_inotify_init", lambda directory: None)
+        monkeypatch.setattr(configWatcher, "POLL_INTERVAL", 0)
+    watchers = []
+
+    def make(path):
+        watcher = ConfigWatcher(path)
+        watchers.append(watcher)
+        return watcher
+    yield make
+    for watcher in watchers:
+        watcher.close()
+
+
+def test_changes_are_parsed_once(watch, make_config, config_path):
+    config = make_config(["a"])
+    write(config_path, config)
+    watcher = watch(config_path)
+    assert watcher.check() is None
+    config.profiles["b"] = ProfileConfig("b.yaml", 60, priority=2)
+    write(config_path, config)
+    reloaded = watcher.check()
+    assert reloaded.profiles["b"] == ProfileConfig("b.yaml", 60, priority=2)
+    assert watcher.check() is None
+
+
+def test_rewriting_the_same_content_is_not_a_change(watch, make_config, config_path):
+    config = make_config(["a"])
+    write(config_path, config)
+    watcher = watch(config_path)
+    time.sleep(0.01)
+    write(config_path, config)
+    assert watcher.check() is None
+
+
+def test_invalid_files_are_ignored_until_fixed(watch, make_config, config_path):
+    config = make_config(["a"])
+    write(config_path, config)
+    watcher = watch(config_path)
+    write(config_path, "profiles: [unclosed")
+    assert watcher.check() is None
+    write(config_path, "profiles: {}\n")
+    assert watcher.check() is None
+    config.profiles["b"] = ProfileConfig("b.yaml", 60)
+    write(config_path, config)
+    assert set(watcher.check().profiles) == {"a", "b"}
+
+
+def test_other_files_in_the_directory_are_ignored(make_config, config_path, tmp_path):
+    write(config_path, make_config(["a"]))
+    watcher = ConfigWatcher(config_path)
+    try:
+        if watcher.fd is None:
+            pytest.skip("needs inotify")
+        (tmp_path / "other.yaml").write_text("x: 1\n")
+        assert not watcher._file_touched()
+        assert watcher.timeout() is None
+    finally:
+        watcher.close()
@@ -0,0 +1,114 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+import dataSink
+from configICD import Config
+from dataSink import JsonlSink, SinkWriter, SqliteSink
+
+
+class FlakySink:
+    """Fails its first `failures` writes."""
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.rows = []
+        self.closed = False
+
+    def write(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+    def close(self):
+        self.closed = True
+
+
+def decode(payload):
+    if payload == b"crash":
+        raise RuntimeError("decoder bug")
+    return json.loads(payload)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(dataSink, "RETRY_DELAY", 0)
+
+
+def test_records_are_written_in_batches():
+    sink = FlakySink()
+    writer = SinkWriter(sink, decode, batch_size=3, flush_interval=0.05)
+    for i in range(4):
+        writer.put(1.0, "s1", "p", json.dumps([i, i]).encode())
+    writer.close()
+    assert [row[3] for row in sink.rows] == [0, 0, 1, 1, 2, 2, 3, 3]
+    assert writer.stats()["written"] == 8 and sink.closed
+
+
+def test_failed_writes_are_retried():
+    sink = FlakySink(failures=dataSink.WRITE_RETRIES)
+    writer = SinkWriter(sink, decode, flush_interval=0.05)
+    writer.put(1.0, "s1", "p", b'{"id": 1}')
+    writer.close()
+    assert sink.rows == [(1.0, "s1", "p", {"id": 1})]
+    assert writer.stats()["spilled"] == 0
+
+
+def test_batches_the_sink_keeps_failing_are_spilled(tmp_path):
+    spill_path = tmp_path / "records.spill.jsonl"
+    writer = SinkWriter(FlakySink(failures=100), decode, flush_interval=0.05, spill_path=str(spill_path))
+    writer.put(1.0, "s1", "p", b'[{"id": 1}, {"id": 2}]')
+    writer.close()
+    assert [json.loads(line)["record"] for line in spill_path.read_text().splitlines()] == [{"id": 1}, {"id": 2}]
+    assert (writer.stats()["spilled"], writer.stats()["failed"]) == (2, 0)
+
+
+def test_undecodable_messages_do_not_stop_the_writer():
+    sink = FlakySink()
+    writer = SinkWriter(sink, decode, flush_interval=0.05)
+    writer.put(1.0, "s1", "p", b"crash")
+    writer.put(1.0, "s1", "p", b"not json")
+    writer.put(1.0, "s1", "p", b'{"id": 3}')
+    writer.close()
+    assert [row[3] for row in sink.rows] == [{"id": 3}]
+    assert writer.stats()["failed"] == 2
+
+
+def test_sqlite_sink(tmp_path):
+    path = str(tmp_path / "records.db")
+    sink = SqliteSink(path)
+    sink.write([(1.0, "s1", "p", {"id": 1}), (2.0, "s2", None, {"id": 2})])
+    sink.close()
+    rows = sqlite3.connect(path).execute("SELECT received, scraper, profile, record FROM records ORDER BY id").fetchall()
+    assert rows == [(1.0, "s1", "p", '{"id": 1}'), (2.0, "s2", None, '{"id": 2}')]
+
+
+def test_jsonl_sink_starts_a_new_file_past_max_bytes(tmp_path):
+    sink = JsonlSink(str(tmp_path / "records.jsonl"), max_bytes=1)
+    sink.write([(1.0, "s1", "p", {"id": 1})])
+    sink.write([(2.0, "s1", "p", {"id": 2})])
+    sink.close()
+    first, second = tmp_path / "records.000001.jsonl.gz", tmp_path / "records.000002.jsonl.gz"
+    assert json.loads(gzip.decompress(first.read_bytes()))["record"] == {"id": 1}
+    assert json.loads(gzip.decompress(second.read_bytes()))["record"] == {"id": 2}
+
+
+@pytest.mark.parametrize("data_path, name", [
+    ("records.db", "records.db.000001.jsonl.gz"),
+    ("records.jsonl", "records.000001.jsonl.gz"),
+    ("records.jsonl.gz", "records.000001.jsonl.gz")
+])
+def test_jsonl_files_are_named_after_data_path(tmp_path, data_path, name):
+    sink = JsonlSink(str(tmp_path / data_path))
+    sink.close()
+    assert [path.name for path in tmp_path.iterdir()] == [name]
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_an_unbounded_queue_is_rejected(make_config, size):
+    data = make_config().to_dict()
+    data["data_queue_size"] = size
+    with pytest.raises(ValueError, match="Invalid data_queue_size"):
+        Config.parse(data)
@@ -0,0 +1,225 @@
+import asyncio
+import time
+
+import pytest
+import zmq
+
+from ipc import IPC
+
+
+@pytest.fixture
+def ipc():
+    ipc = IPC()
+    yield ipc
+    ipc.close()
+
+
+@pytest.fixture
+def context():
+    # Scraper-side sockets, closed before the manager's context is terminated
+    context = zmq.Context()
+    yield context
+    context.destroy(linger=0)
+
+
+def publisher(context, tmp_path, name):
+    """Bind a scraper-side PUB socket and return it with its address."""
+    address = f"ipc://{tmp_path}/{name}.sock"
+    sock = context.socket(zmq.PUB)
+    sock.bind(address)
+    return sock, address
+
+
+def receive(ipc, count):
+    """Call receive_all until `count` messages arrived or 5 seconds passed."""
+    messages = []
+    deadline = time.monotonic() + 5
+    while len(messages) < count and time.monotonic() < deadline:
+        messages += ipc.receive_all(100)
+    return messages
+
+
+def joined(ipc, pub, name):
+    """Publish probes until the subscriber `name` receives one, then drain it."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        pub.send(b"{}")
+        if any(message[0] == name for message in ipc.receive_all(50)):
+            return
+    pytest.fail(f"subscriber {name} never joined")
+
+
+def test_receive_all_reads_every_subscriber_in_one_poll(ipc, context, tmp_path):
+    pubs = {}
+    for name in ("a", "b", "c"):
+        pubs[name], address = publisher(context, tmp_path, name)
+        ipc.init_subscriber(name, address)
+        joined(ipc, pubs[name], name)
+    for name, pub in pubs.items():
+        pub.send(name.encode())
+        pub.send_multipart([b"topic", name.encode() * 2])
+    messages = receive(ipc, 6)
+    assert sorted(messages) == sorted([(name, name.encode()) for name in pubs] + [(name, name.encode() * 2) for name in pubs])
+
+
+def test_removed_subscriber_is_no_longer_polled(ipc, context, tmp_path):
+    pubs = {}
+    for name in ("a", "b"):
+        pubs[name], address = publisher(context, tmp_path, name)
+        ipc.init_subscriber(name, address)
+        joined(ipc, pubs[name], name)
+    ipc.remove_subscriber("a")
+    ipc.remove_subscriber("a")
+    pubs["a"].send(b"late")
+    pubs["b"].send(b"kept")
+    assert receive(ipc, 1) == [("b", b"kept")]
+    # Closed after the poll that might still have referenced it
+    assert ipc.retired == []
+
+
+def test_close_closes_retired_subscribers(context, tmp_path):
+    ipc = IPC()
+    _, address = publisher(context, tmp_path, "a")
+    ipc.init_subscriber("a", address)
+    ipc.remove_subscriber("a")
+    ipc.close()
+    assert ipc.context.closed
+
+
+def test_wake_interrupts_a_blocking_receive(ipc):
+    ipc.init_waker()
+    ipc.wake()
+    started = time.monotonic()
+    assert ipc.receive_all(None) == []
+    assert time.monotonic() - started < 1
+
+
+def test_receive_all_sleeps_without_sockets(ipc):
+    started = time.monotonic()
+    assert ipc.receive_all(50) == []
+    assert time.monotonic() - started >= 0.04
+
+
+def test_receive_all_async_awaits_without_blocking_the_loop(ipc, context, tmp_path):
+    pub, address = publisher(context, tmp_path, "a")
+    ipc.init_subscriber("a", address)
+    ipc.init_waker()
+    joined(ipc, pub, "a")
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        asyncio.get_running_loop().call_later(0.1, pub.send, b"payload")
+        messages = await ipc.receive_all_async(5000)
+        task.cancel()
+        return messages, len(ticks)
+
+    messages, ticks = asyncio.run(scenario())
+    assert messages == [("a", b"payload")]
+    assert ticks >= 5
+
+
+def test_receive_all_async_keeps_its_readers_in_step_with_the_subscribers(ipc, context, tmp_path):
+    pub_a, address_a = publisher(context, tmp_path, "a")
+    pub_b, address_b = publisher(context, tmp_path, "b")
+    ipc.init_subscriber("a", address_a)
+    joined(ipc, pub_a, "a")
+
+    async def scenario():
+        assert await ipc.receive_all_async(50) == []
+        readers = set(ipc.async_readers)
+        # Added after the readers were bound: picked up without rebuilding them
+        ipc.init_subscriber("b", address_b)
+        assert set(ipc.async_readers) == readers | {ipc.sockets["b"]}
+        messages = []
+        deadline = time.monotonic() + 5
+        while not messages and time.monotonic() < deadline:
+            pub_b.send(b"from b")  # until the new subscriber has joined
+            messages = await ipc.receive_all_async(100)
+        ipc.remove_subscriber("a")
+        assert set(ipc.async_readers) == {ipc.sockets["b"]}
+        return messages
+
+    assert set(asyncio.run(scenario())) == {("b", b"from b")}
+
+
+def test_publish_sends_topic_frames_subscribers_filter_on(ipc, context, tmp_path):
+    address = f"ipc://{tmp_path}/status.sock"
+    ipc.init_publisher(address)
+    sub = context.socket(zmq.SUB)
+    sub.connect(address)
+    sub.setsockopt(zmq.SUBSCRIBE, b"status.profile.")
+    sub.setsockopt(zmq.RCVTIMEO, 100)
+    deadline = time.monotonic() + 5
+    while True:
+        ipc.publish("probe", topic="status.profile.probe")
+        try:
+            sub.recv_multipart()
+            break
+        except zmq.Again:
+            assert time.monotonic() < deadline, "subscriber never joined"
+    while True:
+        try:
+            sub.recv_multipart()
+        except zmq.Again:
+            break
+    ipc.publish({"seq": 1}, topic="status.scraper.x")
+    ipc.publish(b"raw", topic="telemetry.x")
+    ipc.publish({"seq": 1}, topic="status.profile.a")
+    ipc.publish("text", topic="status.profile.b")
+    assert sub.recv_multipart() == [b"status.profile.a", b'{"seq": 1}']
+    assert sub.recv_multipart() == [b"status.profile.b", b"text"]
+    with pytest.raises(zmq.Again):
+        sub.recv_multipart()
+
+
+def test_latest_keeps_the_newest_message_of_each_subscriber(ipc, context, tmp_path):
+    pubs = {}
+    for name in ("a", "b"):
+        pubs[name], address = publisher(context, tmp_path, name)
+        ipc.init_subscriber(name, address)
+        joined(ipc, pubs[name], name)
+    for i in range(5):
+        pubs["a"].send_multipart([b"topic", str(i).encode()])
+    pubs["b"].send(b"only")
+    time.sleep(0.2)
+    assert sorted(ipc.receive_all(1000, latest=True)) == [("a", b"4", 4), ("b", b"only", 0)]
+
+
+def test_latest_coalesces_fan_in_messages_per_scraper(ipc, context):
+    address = ipc.init_collector()
+    push = context.socket(zmq.PUSH)
+    push.connect(address)
+    for i in range(3):
+        push.send_multipart([b"a", str(i).encode()])
+    push.send_multipart([b"b", b"topic", b"only"])
+    push.send(b"no name")
+    time.sleep(0.2)
+    assert sorted(ipc.receive_all(1000, latest=True)) == [("a", b"2", 2), ("b", b"only", 0)]
+
+
+def test_fan_in_push_fails_instead_of_dropping_past_the_hwm(context):
+    ipc = IPC(subscriber_hwm=1)
+    try:
+        push = context.socket(zmq.PUSH)
+        push.setsockopt(zmq.SNDHWM, 1)
+        push.connect(ipc.init_collector())
+        payload = b"x" * 1024 * 1024
+        sent = 0
+        with pytest.raises(zmq.Again):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                push.send_multipart([b"a", payload], zmq.NOBLOCK)
+                sent += 1
+                time.sleep(0.01)
+        # The queue filled up instead of dropping: every accepted message is delivered
+        assert len(receive(ipc, sent)) == sent
+        assert ipc.receive_all(100) == []
+    finally:
+        ipc.close()
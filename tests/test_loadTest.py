@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import yaml
+
+from configICD import Config
+
+LOAD_TEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "load_test.py")
+
+
+def test_venv_python_defaults_to_the_base_path_venv(make_config):
+    from ScraperManager import ScraperManager
+    data = make_config(venv_python=None).to_dict()
+    assert Config.parse(yaml.safe_load(yaml.safe_dump(data))).venv_python is None
+    data["venv_python"] = "/usr/bin/python3"
+    config = Config.parse(data)
+    assert config.venv_python == "/usr/bin/python3"
+    manager = ScraperManager(make_config(venv_python=None))
+    try:
+        assert manager.venv_python("/srv/scraper") == os.path.join("/srv/scraper", "venv", "bin", "python")
+        manager.python = config.venv_python
+        assert manager.venv_python("/srv/scraper") == "/usr/bin/python3"
+    finally:
+        manager.state.close()
+        manager.ipc.close()
+
+
+def test_load_test_reports_a_row_per_fleet(tmp_path):
+    result = subprocess.run(
+        [sys.executable, LOAD_TEST, "--fleet", "1,2", "--seconds", "2", "--duration", "0.3", "--period", "0.5",
+         "--workdir", str(tmp_path)],
+        cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    rows = [line.split() for line in result.stdout.splitlines()[1:]]
+    assert [row[0] for row in rows] == ["1", "2"]
+    assert all(int(row[1]) >= 1 for row in rows)  # launches
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("load-test-")]  # scratch dir removed
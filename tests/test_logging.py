@@ -0,0 +1,41 @@
+import logging
+import queue
+
+import pytest
+
+from configICD import parse_log_level
+from utils import DeferredQueueHandler, SamplingFilter
+
+
+@pytest.mark.parametrize("value, level", [("info", "INFO"), (" Warn ", "WARNING"), ("DEBUG", "DEBUG")])
+def test_parse_log_level(value, level):
+    assert parse_log_level(value) == level
+
+
+def test_parse_log_level_rejects_unknown_levels():
+    with pytest.raises(ValueError, match="Invalid log_level"):
+        parse_log_level("verbose")
+
+
+def record(lineno, per_cycle=True):
+    record = logging.LogRecord("test", logging.INFO, "module.py", lineno, "cycle %d", (lineno,), None)
+    if per_cycle:
+        record.per_cycle = True
+    return record
+
+
+def test_sampling_keeps_one_in_every_per_call_site():
+    sampling = SamplingFilter(3)
+    assert [sampling.filter(record(1)) for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert sampling.filter(record(2))
+    assert all(sampling.filter(record(1, per_cycle=False)) for _ in range(3))
+
+
+def test_deferred_queue_handler_leaves_formatting_to_the_listener():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    payload = ["unformatted"]
+    handler.handle(logging.LogRecord("test", logging.INFO, "module.py", 1, "payload %s", (payload,), None))
+    queued = log_queue.get_nowait()
+    assert queued.msg == "payload %s" and queued.args == (payload,)
+    assert queued.getMessage() == "payload ['unformatted']"
@@ -0,0 +1,96 @@
+import pytest
+
+import rateLimiter
+from configICD import RateLimit
+from rateLimiter import RateLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rateLimiter, "time", clock)
+    return clock
+
+
+def test_burst_is_granted_without_delay(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    assert bucket.reserve(4) == (4, 0)
+
+
+def test_reservations_past_the_burst_wait_for_the_debt(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    bucket.reserve(4)
+    assert bucket.reserve(2) == (2, 1.0)
+    assert bucket.reserve(1) == (1, 1.5)
+    clock.now += 1.5
+    # 3 tokens owed, 3 repaid: the next permit is half a token interval away
+    assert bucket.reserve(1) == (1, 0.5)
+
+
+def test_tokens_refill_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    bucket.reserve(4)
+    clock.now += 60
+    assert bucket.reserve(10) == (4, 0)
+
+
+def test_max_delay_denies_and_reports_when_a_permit_is_available(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    bucket.reserve(4)
+    assert bucket.reserve(2, max_delay=0.5) == (0, 0.5)
+    assert bucket.reserve(1, max_delay=0.5) == (1, 0.5)
+    stats = bucket.stats()
+    assert (stats["denied"], stats["delayed"], stats["granted"], stats["total_delay"]) == (1, 1, 5, 0.5)
+
+
+def test_domains_match_subdomains_case_insensitively(clock):
+    limiter = RateLimiter(RateLimit.parse({"Avito.MA": {"rate": 1, "burst": 1}}))
+    assert limiter.domain("www.AVITO.ma") == "avito.ma"
+    assert limiter.domain("avito.ma.") == "avito.ma"
+    assert limiter.domain("notavito.ma") is None
+    assert limiter.acquire({"url": "https://WWW.Avito.ma/annonces"}) == {"granted": 1, "delay": 0}
+    assert limiter.acquire({"domain": "avito.ma"}) == {"granted": 1, "delay": 1.0}
+    assert limiter.acquire({"domain": "example.com", "permits": 7}) == {"granted": 7, "delay": 0}
+
+
+def test_configure_keeps_unchanged_buckets(clock):
+    limiter = RateLimiter(RateLimit.parse({"a.com": {"rate": 1}, "b.com": {"rate": 1}}))
+    a, b = limiter.buckets["a.com"], limiter.buckets["b.com"]
+    limiter.configure(RateLimit.parse({"A.com": {"rate": 1}, "b.com": {"rate": 2}}))
+    assert limiter.buckets["a.com"] is a
+    assert limiter.buckets["b.com"] is not b and limiter.buckets["b.com"].rate == 2
+    limiter.configure({})
+    assert limiter.acquire({"domain": "a.com", "permits": 3}) == {"granted": 3, "delay": 0}
+
+
+def test_acquire_needs_a_domain():
+    with pytest.raises(ValueError):
+        RateLimiter({}).acquire({"permits": 1})
+
+
+@pytest.mark.parametrize("limit", [{"rate": 0}, {"rate": -1}, {"rate": 1, "burst": 0}])
+def test_invalid_limits_are_rejected(limit):
+    with pytest.raises(ValueError):
+        RateLimit.parse({"avito.ma": limit})
+
+
+@pytest.mark.parametrize("permits", [0, -2])
+def test_acquire_needs_at_least_one_permit(permits):
+    limiter = RateLimiter(RateLimit.parse({"a.com": {"rate": 1}}))
+    with pytest.raises(ValueError, match="Invalid permits"):
+        limiter.acquire({"domain": "a.com", "permits": permits})
+
+
+def test_burst_is_a_whole_number_of_permits(clock):
+    [limit] = RateLimit.parse({"a.com": {"rate": 1, "burst": 2.5}}).values()
+    assert limit.burst == 2
+    limiter = RateLimiter({"a.com": limit})
+    assert limiter.acquire({"domain": "a.com", "permits": 10}) == {"granted": 2, "delay": 0}
@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+from datetime import datetime
+
+import pytest
+import zmq
+
+from commandJournal import CommandJournal
+from remoteManager import RemoteManager
+from stateStore import StateStore
+from workerPool import WorkerPool, find_jobs
+
+
+class Recorder:
+    def __init__(self):
+        self.published = []
+
+    def __call__(self, payload, topic=None):
+        self.published.append((topic, payload))
+
+
+@pytest.fixture
+def make_remote(make_config):
+    remotes = []
+
+    def make(*args, **kwargs):
+        remote = RemoteManager(make_config(*args, **kwargs))
+        remotes.append(remote)
+        return remote
+    yield make
+    for remote in remotes:
+        remote.journal.close()
+        remote.manager.state.close()
+        remote.ipc.close()
+        remote.manager.ipc.close()
+
+
+def test_telemetry_is_forwarded_once_per_new_message(make_remote, monkeypatch):
+    remote = make_remote()
+    published = Recorder()
+    monkeypatch.setattr(remote.ipc, "publish", published)
+    assert remote.forward_telemetry({"a": (1, b"{}"), "b": (0, None)}) == 2
+    assert remote.forward_telemetry({"a": (1, b"{}")}) == 0
+    remote.forward_telemetry({"a": (2, b'{"n": 2}')})
+    assert published.published == [("telemetry.a", b"{}"), ("telemetry.a", b'{"n": 2}')]
+    remote.forward_telemetry({})
+    assert remote.forwarded_telemetry == {}
+
+
+def test_status_is_published_per_object_topic(make_remote, monkeypatch):
+    remote = make_remote(["a", "b"])
+    published = Recorder()
+    monkeypatch.setattr(remote.ipc, "publish", published)
+    remote.send_status()
+    topics = [topic for topic, _ in published.published]
+    assert {"status.profile.a", "status.profile.b", "status.manager", "status.commands"} <= set(topics)
+    payload = json.loads(dict(published.published)["status.profile.a"])
+    assert payload["keyframe"] is True and payload["data"]["interval"] == 24 * 60
+
+
+def decode(reply):
+    return json.loads(reply)
+
+
+def test_requests_get_structured_replies(make_remote):
+    remote = make_remote()
+    reply = decode(remote.handle_request(b'{"id": 7, "command": "snapshot"}'))
+    assert (reply["id"], reply["command"], reply["ok"], reply["result"]) == (7, "snapshot", True, True)
+    assert reply["latency_ms"] >= 0
+    reply = decode(remote.handle_request(b'{"id": 8, "command": "reboot"}'))
+    assert (reply["ok"], reply["error"]) == (False, "Unknown command: reboot")
+    assert remote.command_stats["reboot"]["errors"] == 1
+
+
+def test_batches_are_answered_in_order(make_remote):
+    remote = make_remote()
+    replies = decode(remote.handle_request(json.dumps([
+        {"id": 1, "command": "query_telemetry", "data": "profile_0"},
+        {"id": 2, "command": "snapshot"},
+        "not a request"
+    ]).encode()))
+    assert [(reply["id"], reply["ok"]) for reply in replies] == [(1, False), (2, True), (None, False)]
+
+
+def test_legacy_text_commands(make_remote):
+    remote = make_remote()
+    reply = decode(remote.handle_request(b"query_telemetry::profile_0"))
+    assert (reply["command"], reply["ok"], reply["error"]) == ("query_telemetry", False, "query_telemetry expects an object")
+    reply = decode(remote.handle_request(b"journal::"))
+    assert reply["ok"] and "query_telemetry" in [record.get("command") for record in reply["result"]]
+
+
+def test_pipelined_requests_over_the_router(make_remote):
+    remote = make_remote()
+    context = zmq.Context()
+    client = context.socket(zmq.DEALER)
+    client.connect(f"tcp://127.0.0.1:{remote.config.response_port}")
+    try:
+        for request_id in range(3):
+            client.send_multipart([b"", json.dumps({"id": request_id, "command": "snapshot"}).encode()])
+        replies = []
+        deadline = time.monotonic() + 5
+        while len(replies) < 3 and time.monotonic() < deadline:
+            remote.poll_commands(100)
+            while client.poll(0):
+                replies.append(decode(client.recv_multipart()[-1])["id"])
+        assert replies == [0, 1, 2]
+    finally:
+        client.close(linger=0)
+        context.term()
+
+
+def crash_with_unfinished_commands(config):
+    """Leave the journal of a run that crashed while starting profiles a and b, a having launched."""
+    journal = CommandJournal(config.journal_path)
+    seqs = [journal.received({"id": i, "command": command, "data": data}) for i, (command, data) in enumerate(
+        [("start_scraper", "a"), ("start_scraper", "b"), ("stop_scraper", "id-1")]
+    )]
+    journal.close()
+    state = StateStore(config.state_path)
+    state.record_start("id-1", "a", datetime.now())
+    state.close()
+    return seqs
+
+
+def test_only_commands_that_did_not_take_effect_are_replayed(make_remote, make_config):
+    start_a, start_b, stop = crash_with_unfinished_commands(make_config(["a", "b"]))
+    remote = make_remote(["a", "b"], journal_replay=True)
+    assert remote.pop_replays() == [({"id": 1, "command": "start_scraper", "data": "b"}, start_b)]
+    assert remote.pop_replays() == []
+    remote.journal.flush()
+    abandoned = [record["seq"] for record in remote.journal.lookup(since=0) if record["phase"] == "abandoned"]
+    assert abandoned == [start_a, stop]
+
+
+def test_unfinished_commands_are_abandoned_without_replay(make_remote, make_config):
+    seqs = crash_with_unfinished_commands(make_config(["a", "b"]))
+    remote = make_remote(["a", "b"])
+    assert remote.pop_replays() == []
+    remote.journal.flush()
+    assert [record["seq"] for record in remote.journal.lookup(since=0) if record["phase"] == "abandoned"] == seqs
+
+
+def test_commands_running_on_a_pool_worker_are_not_replayed(make_remote, make_config, tmp_path):
+    config = make_config(["a", "b"])
+    crash_with_unfinished_commands(config)
+    # b was handed to a pool worker just before the crash, and no run was recorded for it
+    pool = WorkerPool(1, jobs_dir=config.state_path + ".pool")
+    (tmp_path / "main.py").write_text("import time\ntime.sleep(30)\n")
+    pool.add_target(str(tmp_path), sys.executable)
+    pool.refill()
+    worker = pool.run(str(tmp_path), [sys.executable, str(tmp_path / "main.py"), "--config", config.profiles["b"].config_file])
+    try:
+        deadline = time.monotonic() + 10
+        while not find_jobs(pool.jobs_dir, config.profiles["b"].config_file) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        remote = make_remote(["a", "b"], journal_replay=True)
+        assert remote.pop_replays() == []
+    finally:
+        worker.kill()
+        worker.wait()
+        pool.close()
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+import resources
+from configICD import ResourceLimits
+from resources import ResourceSampler, apply_limits, find_processes, read_process, wrap_command
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs /proc")
+
+
+@pytest.fixture
+def sleeper():
+    marker = f"marker-{uuid.uuid4()}"
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)", marker])
+    yield process, marker
+    process.kill()
+    process.wait()
+
+
+def test_read_process_reports_the_current_process():
+    usage = read_process(os.getpid())
+    assert usage["rss_bytes"] > 0 and usage["rss_peak_bytes"] >= usage["rss_bytes"]
+    assert usage["threads"] >= 1 and usage["fds"] >= 3 and usage["cpu_time"] > 0
+    assert read_process(2 ** 22 + 1) is None
+
+
+def test_find_processes_matches_whole_arguments(sleeper):
+    process, marker = sleeper
+    deadline = time.monotonic() + 5
+    while not find_processes(marker) and time.monotonic() < deadline:
+        time.sleep(0.01)  # the command line is set once the child has exec'd
+    assert find_processes(marker) == [process.pid]
+    assert find_processes(marker[:-1]) == []
+
+
+def test_sampler_derives_cpu_percent_between_samples():
+    sampler = ResourceSampler(os.getpid())
+    assert "cpu_percent" not in sampler.sample()
+    deadline = time.process_time() + 0.2
+    while time.process_time() < deadline:
+        pass
+    assert sampler.sample()["cpu_percent"] > 10
+
+
+def test_wrap_command_prefixes_ionice(monkeypatch):
+    command = ["python", "main.py"]
+    assert wrap_command(command, None) is command
+    assert wrap_command(command, ResourceLimits(nice=5)) is command
+    monkeypatch.setattr(resources.shutil, "which", lambda name: "/usr/bin/ionice")
+    assert wrap_command(command, ResourceLimits(ionice_class=2, ionice_level=7)) == [
+        "/usr/bin/ionice", "-c", "2", "-n", "7", "python", "main.py"
+    ]
+    monkeypatch.setattr(resources.shutil, "which", lambda name: None)
+    assert wrap_command(command, ResourceLimits(ionice_class=3)) is command
+
+
+@pytest.mark.skipif(resources.resource is None, reason="needs the resource module")
+def test_apply_limits_sets_rlimits_and_niceness(sleeper):
+    process, _ = sleeper
+    apply_limits(process.pid, ResourceLimits(memory_mb=512, cpu_seconds=30, nice=5))
+    assert resources.resource.prlimit(process.pid, resources.resource.RLIMIT_AS) == (512 * 1024 * 1024,) * 2
+    assert resources.resource.prlimit(process.pid, resources.resource.RLIMIT_CPU) == (30, 31)
+    assert os.getpriority(os.PRIO_PROCESS, process.pid) >= 5
+
+
+def test_resource_samples_get_their_own_series(make_config):
+    from ScraperManager import ScraperManager
+    manager = ScraperManager(make_config(["a"], resource_sample_interval=0.01))
+    try:
+        scraper = manager.create_scraper("a")
+        scraper.last_started = datetime.now()
+        scraper.sampler = ResourceSampler(os.getpid())
+        scraper.poll = lambda: None
+        manager.register_scraper(scraper)
+        manager.sample_resources()
+        manager.update_monitoring_data(scraper.unique_id, b'{"pages": 1}')
+        resources_series = manager.query_telemetry(scraper.unique_id, series="resources")
+        telemetry_series = manager.query_telemetry(scraper.unique_id)
+        assert "rss_bytes" in resources_series["fields"] and "pages" not in resources_series["fields"]
+        assert list(telemetry_series["fields"]) == ["pages"]
+        assert scraper.resources["rss_bytes"] > 0
+        manager.scrapers.pop(scraper.unique_id).release()
+    finally:
+        manager.state.close()
+        manager.ipc.close()
@@ -0,0 +1,136 @@
+from email.utils import formatdate
+
+import pytest
+
+import responseCache
+from responseCache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(responseCache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.db"), memory_bytes=1000, disk_bytes=300, default_ttl=60)
+    yield cache
+    cache.close()
+
+
+def put(cache, url, body="x" * 100, **headers):
+    return cache.put({"url": url, "headers": {name.replace("_", "-"): value for name, value in headers.items()}, "body": body})
+
+
+def disk_keys(cache):
+    return sorted(key for (key,) in cache.conn.execute("SELECT key FROM responses"))
+
+
+def test_hit_then_miss_after_ttl(cache, clock):
+    put(cache, "a")
+    assert cache.get({"url": "a"})["fresh"] is True
+    clock.now += 61
+    assert cache.get({"url": "a"}) is None
+    assert disk_keys(cache) == []
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entry_with_validator_is_returned_for_revalidation(cache, clock):
+    put(cache, "a", ETag='"v1"')
+    clock.now += 61
+    entry = cache.get({"url": "a"})
+    assert entry["fresh"] is False and entry["etag"] == '"v1"'
+    assert cache.revalidate({"url": "a"}) is True
+    assert cache.get({"url": "a"})["fresh"] is True
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.db"), memory_bytes=250, disk_bytes=1000, default_ttl=60)
+    put(cache, "a")
+    put(cache, "b")
+    cache.get({"url": "a"})
+    put(cache, "c")
+    assert list(cache.memory) == ["a", "c"]
+    assert cache.get({"url": "b"})["body"] == "x" * 100
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+def test_disk_tier_evicts_oldest_access_only_until_under_limit(cache, clock):
+    for url in "abc":
+        put(cache, url)
+        clock.now += 1
+    put(cache, "d")
+    assert disk_keys(cache) == ["b", "c", "d"]
+    assert cache.stats()["disk_evictions"] == 1
+    assert cache.disk_bytes == 300
+
+
+def test_memory_hits_keep_entries_on_disk(cache, clock):
+    for url in "abc":
+        put(cache, url)
+        clock.now += 1
+    cache.get({"url": "a"})
+    clock.now += 1
+    put(cache, "d")
+    assert disk_keys(cache) == ["a", "c", "d"]
+
+
+def test_no_store_and_private_are_not_stored(cache):
+    assert put(cache, "a", Cache_Control="no-store") is False
+    assert put(cache, "b", Cache_Control="private, max-age=600") is False
+    assert cache.get({"url": "a"}) is None and cache.get({"url": "b"}) is None
+
+
+def test_no_cache_and_max_age_zero_are_only_served_for_revalidation(cache):
+    put(cache, "a", Cache_Control="no-cache", ETag='"v1"')
+    put(cache, "b", Cache_Control="max-age=0", Last_Modified="Mon, 12 Oct 2026 10:00:00 GMT")
+    put(cache, "c", Cache_Control="max-age=0")
+    assert cache.get({"url": "a"})["fresh"] is False
+    assert cache.get({"url": "b"})["fresh"] is False
+    assert cache.get({"url": "c"}) is None
+
+
+def test_freshness_from_headers(cache, clock):
+    put(cache, "max-age", Cache_Control="public, max-age=600")
+    put(cache, "s-maxage", Cache_Control="max-age=10, s-maxage=900")
+    put(cache, "expires", Date=formatdate(clock.now, usegmt=True), Expires=formatdate(clock.now + 300, usegmt=True))
+    put(cache, "invalid", Expires="0", ETag='"v1"')
+    assert cache.get({"url": "max-age"})["expires"] == clock.now + 600
+    assert cache.get({"url": "s-maxage"})["expires"] == clock.now + 900
+    assert cache.get({"url": "expires"})["expires"] == clock.now + 300
+    assert cache.get({"url": "invalid"})["fresh"] is False
+    assert cache.put({"url": "explicit", "headers": {"Cache-Control": "max-age=5"}, "body": "", "ttl": 20}) is True
+    assert cache.get({"url": "explicit"})["expires"] == clock.now + 20
+
+
+def test_bytes_and_text_bodies_survive_the_disk_tier(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, memory_bytes=1000, disk_bytes=1000, default_ttl=60)
+    cache.put({"url": "bytes", "body": b"\x00\xff"})
+    cache.put({"url": "text", "body": "café"})
+    cache.close()
+    cache = ResponseCache(path, memory_bytes=1000, disk_bytes=1000, default_ttl=60)
+    assert cache.get({"url": "bytes"})["body"] == b"\x00\xff"
+    assert cache.get({"url": "text"})["body"] == "café"
+    cache.close()
+
+
+def test_revalidated_text_bodies_stay_text_on_disk(cache, clock):
+    put(cache, "a", body="hello", ETag='"v1"')
+    clock.now += 61
+    assert cache.revalidate({"url": "a"}) is True
+    cache.memory.clear()
+    cache.memory_bytes = 0
+    entry = cache.get({"url": "a"})
+    assert entry["body"] == "hello" and entry["fresh"] is True
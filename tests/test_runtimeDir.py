@@ -0,0 +1,83 @@
+import os
+import socket
+
+import pytest
+import zmq
+
+from ipc import IPC
+
+pytestmark = pytest.mark.skipif(not zmq.has("ipc"), reason="needs ipc:// transport")
+
+
+@pytest.fixture
+def base(tmp_path):
+    return str(tmp_path / "run")
+
+
+def unix_socket(path, listening):
+    """Create a socket file; unless `listening`, nothing accepts connections on it anymore."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    if listening:
+        sock.listen()
+        return sock
+    sock.close()
+    return None
+
+
+def stale_manager(base, name):
+    """Leave behind the directory and unlocked lock file of a manager that died."""
+    os.makedirs(os.path.join(base, name))
+    open(os.path.join(base, name + ".lock"), "w").close()
+    return os.path.join(base, name)
+
+
+def test_each_manager_binds_in_its_own_directory(base):
+    first, second = IPC(runtime_dir=base), IPC(runtime_dir=base)
+    try:
+        assert first.runtime_dir != second.runtime_dir
+        assert os.path.dirname(first.runtime_dir) == base
+        assert first.new_endpoint("scraper") == f"ipc://{first.runtime_dir}/scraper.sock"
+        address = first.init_collector()
+        assert address == f"ipc://{first.runtime_dir}/telemetry.sock"
+        assert os.path.exists(address[len("ipc://"):])
+    finally:
+        first.close()
+        second.close()
+    assert os.listdir(base) == []
+
+
+def test_stale_directories_are_removed_unless_a_socket_is_live(base):
+    dead = stale_manager(base, "manager-dead")
+    unix_socket(os.path.join(dead, "a.sock"), listening=False)
+    alive = stale_manager(base, "manager-alive")
+    listener = unix_socket(os.path.join(alive, "b.sock"), listening=True)
+    unix_socket(os.path.join(alive, "c.sock"), listening=False)
+    ipc = IPC(runtime_dir=base)
+    try:
+        assert not os.path.exists(dead) and not os.path.exists(dead + ".lock")
+        # A scraper of the dead manager still listens there
+        assert os.listdir(alive) == ["b.sock"]
+        assert os.path.exists(alive + ".lock")
+    finally:
+        ipc.close()
+        listener.close()
+
+
+def test_directories_of_running_managers_are_kept(base):
+    running = IPC(runtime_dir=base)
+    try:
+        address = running.new_endpoint("scraper")
+        unix_socket(address[len("ipc://"):], listening=False)
+        IPC(runtime_dir=base).close()
+        assert os.path.exists(address[len("ipc://"):])
+    finally:
+        running.close()
+
+
+def test_long_paths_fall_back_to_tcp(base):
+    ipc = IPC(runtime_dir=base)
+    try:
+        assert ipc.new_endpoint("x" * 200).startswith("tcp://localhost:")
+    finally:
+        ipc.close()
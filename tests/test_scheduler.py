@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import scheduler
+from scheduler import RunQueue, Scheduler
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def test_pop_due_returns_due_profiles_earliest_first():
+    scheduler = Scheduler()
+    scheduler.schedule("c", at(3))
+    scheduler.schedule("a", at(1))
+    scheduler.schedule("b", at(2))
+    assert scheduler.next_deadline() == at(1)
+    assert scheduler.pop_due(at(2)) == ["a", "b"]
+    assert scheduler.pop_due(at(2)) == []
+    assert len(scheduler) == 1 and "c" in scheduler and "a" not in scheduler
+    assert scheduler.next_deadline() == at(3)
+
+
+def test_rescheduling_moves_the_deadline():
+    scheduler = Scheduler()
+    scheduler.schedule("a", at(1))
+    scheduler.schedule("b", at(2))
+    scheduler.schedule("a", at(5))
+    assert scheduler.next_deadline() == at(2)
+    assert scheduler.pop_due(at(4)) == ["b"]
+    assert scheduler.next_deadline() == at(5)
+    assert scheduler.pop_due(at(5)) == ["a"]
+
+
+def test_unscheduled_profiles_are_skipped():
+    scheduler = Scheduler()
+    scheduler.schedule("a", at(1))
+    scheduler.schedule("b", at(2))
+    scheduler.unschedule("a")
+    scheduler.unschedule("missing")
+    assert scheduler.next_deadline() == at(2)
+    assert len(scheduler) == 1 and "a" not in scheduler
+    assert scheduler.pop_due(at(10)) == ["b"]
+    assert scheduler.next_deadline() is None
+
+
+def test_stale_entries_are_compacted():
+    scheduler = Scheduler()
+    for minute in range(1000):
+        scheduler.schedule("a", at(minute))
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 33
+    assert scheduler.pop_due(at(1000)) == ["a"]
+
+
+def pop(queue, now=T0, running=0, running_by_base_path=None, base_paths=None):
+    base_paths = base_paths or {}
+    return queue.pop_ready(now, running, running_by_base_path or {}, lambda name: base_paths.get(name, "/base"))
+
+
+def test_higher_priority_first_then_longest_waiting():
+    queue = RunQueue()
+    queue.push("low", 0, T0)
+    queue.push("old", 5, T0)
+    queue.push("new", 5, T0 + timedelta(seconds=1))
+    queue.push("old", 9, T0)
+    assert queue.positions() == {"old": 1, "new": 2, "low": 3}
+    assert queue.queued_at("new") == T0 + timedelta(seconds=1)
+    assert pop(queue) == ["old", "new", "low"]
+    assert len(queue) == 0
+
+
+def test_max_concurrent_counts_running_scrapers():
+    queue = RunQueue(max_concurrent=2)
+    for name in "abc":
+        queue.push(name, 0, T0)
+    assert pop(queue, running=1) == ["a"]
+    assert pop(queue, running=2) == []
+    assert pop(queue, running=0) == ["b", "c"]
+
+
+def test_base_path_limit_does_not_block_other_base_paths():
+    queue = RunQueue(max_per_base_path=1)
+    base_paths = {"a1": "/a", "a2": "/a", "b1": "/b"}
+    for name in ("a1", "a2", "b1"):
+        queue.push(name, 0, T0)
+    assert pop(queue, base_paths=base_paths) == ["a1", "b1"]
+    assert "a2" in queue
+    assert pop(queue, running_by_base_path={"/a": 1}, base_paths=base_paths) == []
+    assert pop(queue, base_paths=base_paths) == ["a2"]
+
+
+def test_stagger_spaces_launches(monkeypatch):
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: high)
+    queue = RunQueue(stagger=30, jitter=10)
+    for name in "ab":
+        queue.push(name, 0, T0)
+    assert pop(queue) == ["a"]
+    assert queue.next_launch == T0 + timedelta(seconds=40)
+    assert pop(queue, now=T0 + timedelta(seconds=39)) == []
+    assert pop(queue, now=T0 + timedelta(seconds=40)) == ["b"]
+
+
+def test_remove():
+    queue = RunQueue()
+    for name in "abc":
+        queue.push(name, 0, T0)
+    queue.remove("b")
+    queue.remove("missing")
+    assert queue.queued_at("b") is None
+    assert pop(queue) == ["a", "c"]
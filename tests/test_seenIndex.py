@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from seenIndex import BloomFilter, SeenIndex, key_hash
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "seen.db")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    hashes = [key_hash(i) for i in range(1000)]
+    for h in hashes:
+        bloom.add(h)
+    assert all(h in bloom for h in hashes)
+    false_positives = sum(key_hash(f"other-{i}") in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_load_rejects_another_size(tmp_path):
+    path = str(tmp_path / "bloom")
+    BloomFilter(1000, 0.01).save(path)
+    assert BloomFilter.load(path, 1000, 0.01) is not None
+    assert BloomFilter.load(path, 2000, 0.01) is None
+    assert BloomFilter.load(str(tmp_path / "missing"), 1000, 0.01) is None
+
+
+def test_check_add_reports_keys_seen_before(path):
+    index = SeenIndex(path, capacity=1000)
+    assert index.check_add(["a", "b"]) == [False, False]
+    assert index.check_add(["b", "c"]) == [True, False]
+    assert index.check(["a", "c", "d"]) == [True, True, False]
+    assert index.stats()["items"] == 3
+    index.close()
+
+
+def test_check_add_dedupes_within_a_batch(path):
+    index = SeenIndex(path, capacity=1000)
+    assert index.check_add(["a", "b", "a", "a"]) == [False, False, True, True]
+    assert index.check_add({"keys": ["a"]}) == [True]
+    assert index.stats()["items"] == 2
+    index.close()
+
+
+def test_namespaces_are_separate(path):
+    index = SeenIndex(path, capacity=1000)
+    index.add({"keys": ["1"], "namespace": "vente"})
+    assert index.check({"keys": ["1"], "namespace": "location"}) == [False]
+    assert index.check({"keys": ["1"], "namespace": "vente"}) == [True]
+    index.close()
+
+
+def test_reopen_loads_the_saved_bloom_filter(path, monkeypatch):
+    index = SeenIndex(path, capacity=1000)
+    index.add(["a", "b"])
+    index.close()
+    monkeypatch.setattr(SeenIndex, "rebuild", lambda self: pytest.fail("the saved filter should be reused"))
+    index = SeenIndex(path, capacity=1000)
+    assert index.check(["a", "b", "c"]) == [True, True, False]
+    index.close()
+
+
+def test_reopen_rebuilds_a_filter_missing_items(path):
+    index = SeenIndex(path, capacity=1000)
+    index.add(["a"])
+    index.close()
+    # A crash loses the additions made since the last save
+    index = SeenIndex(path, capacity=1000)
+    index.add(["b", "c"])
+    index.conn.close()
+    index = SeenIndex(path, capacity=1000)
+    assert index.bloom.items == 3
+    assert index.check(["a", "b", "c"]) == [True, True, True]
+    os.remove(path + ".bloom")
+    index.conn.close()
+    index = SeenIndex(path, capacity=1000)
+    assert index.check(["a", "b", "c"]) == [True, True, True]
+    index.close()
+
+
+def test_items_expire_after_ttl(path):
+    index = SeenIndex(path, capacity=1000, ttl_days=1)
+    index.add(["old", "new"])
+    index.conn.execute("UPDATE seen SET last_seen = last_seen - 2 * 86400 WHERE hash = ?", (key_hash("old"),))
+    assert index.check(["old", "new"]) == [False, True]
+    assert index.check_add(["old"]) == [False]
+    assert index.check(["old"]) == [True]
+    index.conn.execute("UPDATE seen SET last_seen = last_seen - 2 * 86400 WHERE hash = ?", (key_hash("old"),))
+    index.close()
+    index = SeenIndex(path, capacity=1000, ttl_days=1)
+    assert index.stats()["items"] == 1
+    assert index.check(["old", "new"]) == [False, True]
+    index.close()
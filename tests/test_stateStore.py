@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import stateStore
+from stateStore import StateStore
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"), history=2)
+    yield store
+    store.close()
+
+
+def test_load_returns_the_latest_run_and_marks_interrupted_ones(store):
+    store.record_start("a-1", "a", T0)
+    store.record_finish("a-1", T0 + timedelta(minutes=5), 0, "success", 300.0)
+    store.record_start("a-2", "a", T0 + timedelta(hours=1))
+    store.record_start("b-1", "b", T0)
+    store.record_finish("b-1", T0 + timedelta(minutes=1), 1, "failure", 60.0)
+    assert store.load() == {
+        "a": {"last_exec": T0 + timedelta(hours=1), "last_outcome": "interrupted", "last_duration": None},
+        "b": {"last_exec": T0 + timedelta(minutes=1), "last_outcome": "failure", "last_duration": 60.0}
+    }
+
+
+def test_state_survives_reopening(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.record_start("a-1", "a", T0)
+    store.record_finish("a-1", T0 + timedelta(minutes=5), 0, "success", 300.0)
+    store.close()
+    store = StateStore(path)
+    try:
+        assert store.last_run("a")["last_outcome"] == "success"
+        assert store.last_run("missing") == {}
+    finally:
+        store.close()
+
+
+def test_started_since(store):
+    store.record_start("a-1", "a", T0)
+    assert store.started_since("a", T0)
+    assert not store.started_since("a", T0 + timedelta(seconds=1))
+    assert not store.started_since("b", T0 - timedelta(days=1))
+
+
+def test_compaction_keeps_the_newest_runs_of_each_profile(store, monkeypatch):
+    monkeypatch.setattr(stateStore, "COMPACT_EVERY", 4)
+    for profile in ("a", "b"):
+        for i in range(3):
+            store.record_start(f"{profile}-{i}", profile, T0 + timedelta(hours=i))
+    for i in range(3):
+        store.record_finish(f"a-{i}", T0 + timedelta(hours=i, minutes=1), 0, "success", 60.0)
+    assert store.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 6
+    store.record_finish("b-0", T0 + timedelta(minutes=1), 0, "success", 60.0)
+    rows = store.conn.execute("SELECT unique_id FROM runs ORDER BY unique_id").fetchall()
+    assert [row[0] for row in rows] == ["a-1", "a-2", "b-1", "b-2"]
+    assert store.finished_since_compaction == 0
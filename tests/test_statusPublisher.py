@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from codec import JsonCodec
+from statusPublisher import StatusPublisher
+
+
+class FakeIPC:
+    """Records what would be published instead of sending it."""
+    def __init__(self):
+        self.codec = JsonCodec()
+        self.published = []
+
+    def publish(self, payload, topic=None):
+        self.published.append((topic, json.loads(payload)))
+
+    def take(self):
+        published, self.published = self.published, []
+        return dict(published)
+
+
+@pytest.fixture
+def ipc():
+    return FakeIPC()
+
+
+def test_first_tick_is_a_keyframe_then_deltas(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    publisher.tick({"status.profile": {"a": {"running": False, "interval": 5}}})
+    assert ipc.take() == {"status.profile.a": {"seq": 1, "keyframe": True, "data": {"running": False, "interval": 5}}}
+    publisher.tick({"status.profile": {"a": {"running": True, "interval": 5}}})
+    assert ipc.take() == {"status.profile.a": {"seq": 2, "keyframe": False, "changed": {"running": True}}}
+
+
+def test_unchanged_objects_publish_nothing(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    channels = {"status.profile": {"a": {"running": False}}}
+    publisher.tick(channels)
+    ipc.take()
+    assert publisher.tick(channels) == 0
+    assert ipc.take() == {}
+
+
+def test_new_and_removed_objects(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    publisher.tick({"status.scraper": {"a": {"x": 1}}})
+    ipc.take()
+    publisher.tick({"status.scraper": {"b": {"x": 2}}})
+    assert ipc.take() == {
+        "status.scraper.b": {"seq": 1, "keyframe": True, "data": {"x": 2}},
+        "status.scraper.a": {"seq": 2, "removed": True}
+    }
+    # A returning object starts a new sequence
+    publisher.tick({"status.scraper": {"a": {"x": 3}, "b": {"x": 2}}})
+    assert ipc.take() == {"status.scraper.a": {"seq": 1, "keyframe": True, "data": {"x": 3}}}
+
+
+def test_keyframes_every_interval_and_on_request(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=3)
+    channels = {"status.profile": {"a": {"running": False}}}
+    keyframes = []
+    for _ in range(7):
+        publisher.tick(channels)
+        keyframes.append(ipc.take().get("status.profile.a", {}).get("keyframe"))
+    assert keyframes == [True, None, None, True, None, None, True]
+    publisher.request_keyframe()
+    publisher.tick(channels)
+    assert ipc.take() == {"status.profile.a": {"seq": 4, "keyframe": True, "data": {"running": False}}}
+
+
+def test_sequence_numbers_are_per_topic(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    publisher.tick({"status.profile": {"a": {"n": 0}, "b": {"n": 0}}})
+    for n in range(1, 4):
+        publisher.tick({"status.profile": {"a": {"n": n}, "b": {"n": 0}}})
+    publisher.tick({"status.profile": {"a": {"n": 3}, "b": {"n": 1}}})
+    assert ipc.take()["status.profile.b"]["seq"] == 2
+    assert publisher.sequence == {"status.profile.a": 4, "status.profile.b": 2}
+
+
+class Counted:
+    """Status object exposing a revision, counting its to_dict calls."""
+    def __init__(self, **fields):
+        self.fields = fields
+        self.revision = 0
+        self.calls = 0
+
+    def to_dict(self):
+        self.calls += 1
+        return dict(self.fields)
+
+
+def test_objects_are_serialized_only_when_their_revision_changes(ipc):
+    publisher = StatusPublisher(ipc, keyframe_interval=0)
+    obj = Counted(running=False)
+    for _ in range(4):
+        publisher.tick({"status.profile": {"a": obj}})
+    assert obj.calls == 1
+    obj.fields["running"] = True
+    obj.revision += 1
+    publisher.tick({"status.profile": {"a": obj}})
+    assert obj.calls == 2
+    assert ipc.published[-1] == ("status.profile.a", {"seq": 2, "keyframe": False, "changed": {"running": True}})
+
+
+def test_keyframes_reuse_the_cached_encoding(ipc, monkeypatch):
+    publisher = StatusPublisher(ipc, keyframe_interval=1)
+    encoded = []
+    encode = ipc.codec.encode
+    monkeypatch.setattr(ipc.codec, "encode", lambda obj: encoded.append(obj) or encode(obj))
+    obj = Counted(running=False)
+    for _ in range(3):
+        publisher.tick({"status.profile": {"a": obj}})
+    assert encoded.count({"running": False}) == 1
+    assert [payload["seq"] for _, payload in ipc.published] == [1, 2, 3]
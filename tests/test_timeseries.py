@@ -0,0 +1,56 @@
+import pytest
+
+from timeseries import RingBuffer, TimeSeries, flatten
+
+
+def test_flatten_keeps_numeric_leaves():
+    assert flatten({"pages": 3, "http": {"errors": 1.5, "last_url": "x"}, "state": None}) == {
+        "pages": 3.0, "http.errors": 1.5
+    }
+
+
+def test_ring_buffer_overwrites_the_oldest_samples():
+    ring = RingBuffer(capacity=3, max_fields=1)
+    for t in range(5):
+        ring.append(float(t), {"a": t * 10, "b": t})
+    order = ring.indices()
+    assert [ring.times[index] for index in order] == [2.0, 3.0, 4.0]
+    assert ring.column("a", order) == [20.0, 30.0, 40.0]
+    assert ring.column("b", order) == [None, None, None]  # beyond max_fields
+    assert [ring.times[index] for index in ring.indices(since=3)] == [3.0, 4.0]
+
+
+def test_fields_missing_from_a_sample_are_none():
+    series = TimeSeries()
+    series.add(1.0, {"a": 1})
+    series.add(2.0, {"b": 2})
+    series.add(3.0, {"a": 3})
+    result = series.query(fields=["a", "b"])
+    assert result["t"] == [1.0, 2.0, 3.0]
+    assert result["fields"]["a"]["value"] == [1.0, None, 3.0]
+    assert result["fields"]["b"]["value"] == [None, 2.0, None]
+
+
+def test_rollup_buckets_include_the_open_bucket():
+    series = TimeSeries()
+    for t, pages in ((0.0, 1), (30.0, 5), (59.0, 3), (60.0, 10), (90.0, 20)):
+        series.add(t, {"pages": pages})
+    result = series.query("1m", ["pages"])
+    assert result["t"] == [0.0, 60.0]
+    assert result["fields"]["pages"] == {
+        "mean": [3.0, 15.0], "min": [1.0, 10.0], "max": [5.0, 20.0], "last": [3.0, 20.0]
+    }
+    assert series.query("1m", ["pages"], since=60)["t"] == [60.0]
+
+
+def test_rate_turns_counters_into_throughput():
+    series = TimeSeries()
+    for t, pages in ((0.0, 0), (2.0, 10), (4.0, 10)):
+        series.add(t, {"pages": pages})
+    assert series.query(fields=["pages"], rate=True)["fields"]["pages"]["rate"] == [None, 5.0, 0.0]
+    assert series.query("1s", ["pages"], rate=True)["fields"]["pages"]["rate"] == [None, 5.0, 0.0]
+
+
+def test_unknown_resolution_is_rejected():
+    with pytest.raises(ValueError, match="Unknown resolution"):
+        TimeSeries().query("1d")
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from workerPool import WorkerPool, find_jobs
+
+SCRIPT = """
+import json, os, sys
+import utils
+with open(sys.argv[1], "w") as f:
+    json.dump({"argv": sys.argv, "env": os.environ.get("JOB_ENV"), "path0": sys.path[0], "utils": utils.NAME}, f)
+"""
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(2, preload=["json"])
+    yield pool
+    for workers in pool.idle.values():
+        for worker in workers:
+            worker.kill()
+    pool.close()
+
+
+def test_worker_runs_a_script_like_a_cold_start(pool, tmp_path):
+    (tmp_path / "main.py").write_text(SCRIPT)
+    (tmp_path / "utils.py").write_text("NAME = 'scraper helper'\n")
+    pool.add_target(str(tmp_path), sys.executable)
+    pool.refill()
+    assert pool.available() == {str(tmp_path): 2}
+    output = tmp_path / "out.json"
+    worker = pool.run(str(tmp_path), [sys.executable, str(tmp_path / "main.py"), str(output)], {"JOB_ENV": "set"})
+    assert worker.wait(10) == 0
+    assert json.loads(output.read_text()) == {
+        "argv": [str(tmp_path / "main.py"), str(output)],
+        "env": "set",
+        "path0": str(tmp_path),
+        "utils": "scraper helper"
+    }
+    assert pool.available() == {str(tmp_path): 1}
+
+
+def test_refill_replaces_dead_workers_and_close_lets_idle_ones_exit(pool, tmp_path):
+    pool.add_target(str(tmp_path), sys.executable)
+    pool.refill()
+    dead = pool.idle[str(tmp_path)][0]
+    dead.kill()
+    dead.wait()
+    pool.refill()
+    workers = list(pool.idle[str(tmp_path)])
+    assert dead not in workers and len(workers) == 2
+    pool.close()
+    assert [worker.wait(10) for worker in workers] == [0, 0]
+    assert pool.run(str(tmp_path), [sys.executable, "main.py"]) is None
+
+
+def test_running_jobs_are_found_until_the_worker_exits(tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+    pool = WorkerPool(1, jobs_dir=jobs_dir)
+    try:
+        (tmp_path / "main.py").write_text("import sys, time\nwhile True:\n    time.sleep(0.05)\n")
+        pool.add_target(str(tmp_path), sys.executable)
+        pool.refill()
+        worker = pool.run(str(tmp_path), [sys.executable, str(tmp_path / "main.py"), "--config", "a.yaml"])
+        deadline = time.monotonic() + 10
+        while not find_jobs(jobs_dir, "a.yaml") and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert find_jobs(jobs_dir, "a.yaml") == [worker.pid]
+        assert find_jobs(jobs_dir, "b.yaml") == []
+        worker.kill()
+        worker.wait()
+        assert find_jobs(jobs_dir, "a.yaml") == []
+        assert os.listdir(jobs_dir) == []  # the killed worker's record is removed
+    finally:
+        pool.close()
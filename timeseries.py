@@ -0,0 +1,167 @@
+import math
+from array import array
+
+NAN = float('nan')
+STATS = ("mean", "min", "max", "last")
+ROLLUPS = (("1s", 1, 300), ("1m", 60, 240), ("1h", 3600, 168))  # name, bucket seconds, buckets kept
+
+
+def flatten(data, prefix="", into=None):
+    """Return the numeric leaves of a nested dict as {"a.b": float}; other values are skipped."""
+    into = {} if into is None else into
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flatten(value, name + ".", into)
+        elif isinstance(value, (int, float)):
+            into[name] = float(value)
+    return into
+
+
+class RingBuffer:
+    """Fixed-capacity store of timestamped samples, one array('d') column per field.
+
+    Columns grow with the first `capacity` samples and are then overwritten in
+    place, so memory is bounded by capacity * (fields + 1) doubles. Fields
+    beyond `max_fields` are dropped; missing values are stored as NaN.
+    """
+    def __init__(self, capacity, max_fields):
+        self.capacity = capacity
+        self.max_fields = max_fields
+        self.times = array('d')
+        self.columns = {}
+        self.start = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, timestamp, values):
+        if len(self.times) < self.capacity:
+            index = len(self.times)
+            self.times.append(timestamp)
+            for key, column in self.columns.items():
+                column.append(values.get(key, NAN))
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+            self.times[index] = timestamp
+            for key, column in self.columns.items():
+                column[index] = values.get(key, NAN)
+        for key, value in values.items():
+            if key not in self.columns and len(self.columns) < self.max_fields:
+                column = array('d', [NAN]) * len(self.times)
+                column[index] = value
+                self.columns[key] = column
+
+    def indices(self, since=None):
+        """Return the positions of the stored samples in chronological order, optionally from `since` on."""
+        count, start = len(self.times), self.start
+        order = [(start + offset) % count for offset in range(count)] if count else []
+        if since is not None:
+            order = [index for index in order if self.times[index] >= since]
+        return order
+
+    def column(self, key, order):
+        column = self.columns.get(key)
+        if column is None:
+            return [None] * len(order)
+        return [None if index >= len(column) or math.isnan(column[index]) else column[index] for index in order]
+
+
+class Rollup:
+    """Downsamples samples into fixed buckets, keeping mean/min/max/last per field in a RingBuffer."""
+    def __init__(self, interval, capacity, max_fields):
+        self.interval = interval
+        self.buffer = RingBuffer(capacity, max_fields * len(STATS))
+        self.bucket = None
+        self.aggregates = {}
+
+    def add(self, timestamp, values):
+        bucket = timestamp // self.interval * self.interval
+        if self.bucket is not None and bucket != self.bucket:
+            self.buffer.append(self.bucket, self.summary())
+            self.aggregates = {}
+        self.bucket = bucket
+        for key, value in values.items():
+            aggregate = self.aggregates.get(key)
+            if aggregate is None:
+                self.aggregates[key] = [value, 1, value, value, value]
+            else:
+                aggregate[0] += value
+                aggregate[1] += 1
+                aggregate[2] = min(aggregate[2], value)
+                aggregate[3] = max(aggregate[3], value)
+                aggregate[4] = value
+
+    def summary(self):
+        """Return the open bucket as {(field, stat): value}."""
+        summary = {}
+        for key, (total, count, low, high, last) in self.aggregates.items():
+            summary[(key, "mean")] = total / count
+            summary[(key, "min")] = low
+            summary[(key, "max")] = high
+            summary[(key, "last")] = last
+        return summary
+
+
+class TimeSeries:
+    """Telemetry history of one scraper: the latest raw samples plus 1s/1m/1h rollups."""
+    def __init__(self, capacity=300, max_fields=32):
+        self.raw = RingBuffer(capacity, max_fields)
+        self.rollups = {name: Rollup(interval, buckets, max_fields) for name, interval, buckets in ROLLUPS}
+
+    def add(self, timestamp, data):
+        """Record one telemetry message received at `timestamp` (seconds since the epoch)."""
+        values = flatten(data) if isinstance(data, dict) else {}
+        if not values:
+            return
+        self.raw.append(timestamp, values)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, values)
+
+    def fields(self):
+        return list(self.raw.columns)
+
+    def query(self, resolution="raw", fields=None, since=None, rate=False):
+        """Return {"resolution", "t": [...], "fields": {field: {series: [...]}}}.
+
+        Raw series are {"value"}, rollups {"mean", "min", "max", "last"}; the
+        open bucket is included. With `rate` each field also gets a per-second
+        "rate" computed from consecutive values (or bucket last values), which
+        turns counters such as pages_scraped into throughput.
+        """
+        fields = self.fields() if fields is None else fields
+        if resolution == "raw":
+            order = self.raw.indices(since)
+            times = [self.raw.times[index] for index in order]
+            series = {field: {"value": self.raw.column(field, order)} for field in fields}
+        elif resolution in self.rollups:
+            rollup = self.rollups[resolution]
+            order = rollup.buffer.indices(since)
+            times = [rollup.buffer.times[index] for index in order]
+            series = {
+                field: {stat: rollup.buffer.column((field, stat), order) for stat in STATS}
+                for field in fields
+            }
+            if rollup.bucket is not None and (since is None or rollup.bucket >= since):
+                times.append(rollup.bucket)
+                summary = rollup.summary()
+                for field in fields:
+                    for stat in STATS:
+                        series[field][stat].append(summary.get((field, stat)))
+        else:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        if rate:
+            source = "value" if resolution == "raw" else "last"
+            for values in series.values():
+                values["rate"] = self.rate(times, values[source])
+        return {"resolution": resolution, "t": times, "fields": series}
+
+    @staticmethod
+    def rate(times, values):
+        rates = [None]
+        for index in range(1, len(values)):
+            before, after = values[index - 1], values[index]
+            elapsed = times[index] - times[index - 1]
+            rates.append(None if before is None or after is None or elapsed <= 0 else (after - before) / elapsed)
+        return rates[:len(values)]
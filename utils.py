@@ -13,13 +13,47 @@ Author: mdakk072
 Date: 5 May 2024
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import yaml
 import json
 import xml.etree.ElementTree as ET
 import configparser
 
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted.
+
+    The stock QueueHandler merges the message with its arguments in the calling
+    thread; here %-formatting and handler I/O both happen on the listener
+    thread, so logging a large payload costs the caller one queue put.
+    Arguments are formatted after the call returns and must not be mutated.
+    """
+    def prepare(self, record):
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through one in `every` records logged with extra={'per_cycle': True}, per call site.
+    """
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self.counts = {}
+
+    def filter(self, record):
+        if self.every <= 1 or not getattr(record, 'per_cycle', False):
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0)
+        self.counts[site] = count + 1
+        return count % self.every == 0
+
+
 class Utils:
     """
     A utility class for common operations such as file I/O, logging, and timestamp generation.
@@ -32,10 +66,12 @@ class Utils:
         _logger (logging.Logger): The class-level logger instance used for logging.
     """
     _logger = None  # Class-level attribute to hold the logger
-    
+    _listener = None  # Background writer when logging asynchronously
+
 
     @staticmethod
-    def setup_logging(file_path='data/logs/app.log', log_level='INFO', console_logging=True, file_logging=True):
+    def setup_logging(file_path='data/logs/app.log', log_level='INFO', console_logging=True, file_logging=True,
+                      async_logging=False, max_bytes=0, backup_count=5, rotate_when=None, sample_every=1):
         """
         Configure and return a logger instance.
 
@@ -48,6 +84,12 @@ class Utils:
             log_level (str): The logging level (e.g., DEBUG, INFO, WARNING, ERROR). Defaults to INFO.
             console_logging (bool): Flag to indicate whether to log to the console. Defaults to True.
             file_logging (bool): Flag to indicate whether to log to a file. Defaults to True.
+            async_logging (bool): Hand records to a background thread that formats and writes them,
+                so logging never blocks the caller on I/O. Defaults to False.
+            max_bytes (int): Rotate the log file when it reaches this size; 0 disables. Defaults to 0.
+            backup_count (int): Number of rotated log files to keep. Defaults to 5.
+            rotate_when (str): Rotate the log file on time instead (e.g. 'midnight', 'H'). Defaults to None.
+            sample_every (int): Keep one in N records logged with extra={'per_cycle': True}. Defaults to 1.
 
         Returns:
             logging.Logger: The configured logger instance.
@@ -63,22 +105,51 @@ class Utils:
         log_format = '[%(asctime)s] [%(levelname)s] [%(module)s.%(funcName)s:%(lineno)d] : %(message)s'
         formatter = logging.Formatter(log_format, datefmt='%d-%m-%Y %H:%M:%S')
 
+        handlers = []
+
         # Create console handler if enabled
         if console_logging:
             c_handler = logging.StreamHandler()
             c_handler.setFormatter(formatter)
-            Utils._logger.addHandler(c_handler)
+            handlers.append(c_handler)
 
         # Create file handler if enabled
         if file_logging:
             logs_folder = os.path.dirname(file_path)
             if  logs_folder  and not os.path.exists(logs_folder):
                 os.makedirs(logs_folder)
-            f_handler = logging.FileHandler(file_path)
+            if rotate_when:
+                f_handler = logging.handlers.TimedRotatingFileHandler(file_path, when=rotate_when, backupCount=backup_count)
+            elif max_bytes:
+                f_handler = logging.handlers.RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backup_count)
+            else:
+                f_handler = logging.FileHandler(file_path)
             f_handler.setFormatter(formatter)
-            Utils._logger.addHandler(f_handler)
+            handlers.append(f_handler)
+
+        # Sampling runs in the caller, so dropped records are never queued or formatted
+        Utils._logger.addFilter(SamplingFilter(sample_every))
+
+        if async_logging:
+            log_queue = queue.SimpleQueue()
+            Utils._logger.addHandler(DeferredQueueHandler(log_queue))
+            Utils._listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            Utils._listener.start()
+            atexit.register(Utils.stop_logging)
+        else:
+            for handler in handlers:
+                Utils._logger.addHandler(handler)
 
         return Utils._logger
+
+    @staticmethod
+    def stop_logging():
+        """
+        Flush and stop the background log writer, if any.
+        """
+        if Utils._listener is not None:
+            Utils._listener.stop()
+            Utils._listener = None
     @staticmethod
     def get_logger():
         """
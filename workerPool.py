@@ -0,0 +1,115 @@
+import atexit
+import json
+import os
+import subprocess
+from collections import deque
+from resources import find_processes
+from utils import Utils
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poolWorker.py")
+
+
+def find_jobs(jobs_dir, argument):
+    """Return the pids of pool workers whose job has `argument` as one of its arguments.
+
+    A worker's command line never shows its job, so workers record it as
+    jobs_dir/<pid>.json; records left by workers that are gone are removed.
+    """
+    pids = []
+    try:
+        names = os.listdir(jobs_dir)
+    except OSError:
+        return pids
+    workers = set(find_processes(WORKER_SCRIPT))
+    for name in names:
+        pid, ext = os.path.splitext(name)
+        if ext != ".json" or not pid.isdigit():
+            continue
+        path = os.path.join(jobs_dir, name)
+        if int(pid) not in workers:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if argument in job.get("args", []):
+            pids.append(int(pid))
+    return pids
+
+
+class WorkerPool:
+    """Keeps `size` idle, pre-warmed interpreters per base_path (see poolWorker.py).
+
+    A worker is used for exactly one run: once handed a job it becomes the
+    scraper process, so exit detection, stopping and resource accounting are
+    the same as for a cold spawn. The pool is refilled outside the launch path.
+    Workers record the job they run in `jobs_dir` (see find_jobs).
+    """
+    def __init__(self, size, preload=None, jobs_dir=None):
+        self.size = size
+        self.preload = list(preload or [])
+        self.jobs_dir = jobs_dir
+        if jobs_dir:
+            os.makedirs(jobs_dir, exist_ok=True)
+        self.targets = {}  # base_path -> python executable
+        self.idle = {}  # base_path -> deque of Popen
+        atexit.register(self.close)
+
+    def add_target(self, base_path, python):
+        """Keep workers warm for scrapers run from `base_path` with `python`."""
+        self.targets[base_path] = python
+        self.idle.setdefault(base_path, deque())
+
+    def refill(self):
+        """Replace dead workers and spawn new ones until every base_path has `size` idle workers."""
+        for base_path, python in self.targets.items():
+            workers = self.idle[base_path]
+            for worker in [worker for worker in workers if worker.poll() is not None]:
+                workers.remove(worker)
+            while len(workers) < self.size:
+                try:
+                    workers.append(self.spawn(base_path, python))
+                except OSError as e:
+                    Utils.get_logger().warning("Failed to spawn pool worker in %s: %s", base_path, e)
+                    break
+
+    def spawn(self, base_path, python):
+        command = [python, WORKER_SCRIPT]
+        if self.preload:
+            command += ["--preload", ",".join(self.preload)]
+        if self.jobs_dir:
+            command += ["--jobs-dir", self.jobs_dir]
+        return subprocess.Popen(command, cwd=base_path, stdin=subprocess.PIPE)
+
+    def run(self, base_path, command, env=None):
+        """Hand `command` ([python, script, *args]) and extra `env` variables to an idle worker and return its process, or None if none is ready."""
+        workers = self.idle.get(base_path)
+        while workers:
+            worker = workers.popleft()
+            if worker.poll() is not None:
+                continue
+            try:
+                worker.stdin.write(json.dumps({"script": command[1], "args": command[2:], "env": env or {}}).encode() + b"\n")
+                worker.stdin.close()
+            except OSError:
+                continue
+            return worker
+        return None
+
+    def available(self):
+        return {base_path: len(workers) for base_path, workers in self.idle.items()}
+
+    def close(self):
+        """Let every idle worker exit by closing its stdin."""
+        for workers in self.idle.values():
+            while workers:
+                worker = workers.popleft()
+                try:
+                    worker.stdin.close()
+                except OSError:
+                    pass